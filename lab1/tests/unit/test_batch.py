@@ -0,0 +1,35 @@
+import csv
+import json
+
+from vacuum_world.agent.vacuum_agent import SearchMethod
+from vacuum_world.batch import make_configs, run_batch, summarize, write_records
+from vacuum_world.world.maze import MazeType
+
+
+def test_batch_records_and_summary(tmp_path):
+    configs = make_configs(maze_types=[MazeType.MAZE_LABYRINTH, MazeType.MAZE_CAVES],
+                           sizes=[12],
+                           dirt_counts=[3],
+                           methods=[SearchMethod.ARRAY_BREADTH_FIRST_SEARCH, SearchMethod.JUMP_POINT_SEARCH],
+                           seeds=range(3))
+    episodes, plans = run_batch(configs, workers=1)
+
+    assert len(episodes) == 12
+    assert all(episode['success'] for episode in episodes)
+    assert len(plans) == sum(episode['plans'] for episode in episodes)
+    # Both searches find shortest paths, so the agent takes the same steps in every world
+    steps = {}
+    for episode in episodes:
+        steps.setdefault((episode['maze'], episode['seed']), set()).add(episode['steps'])
+    assert all(len(values) == 1 for values in steps.values())
+
+    summary = summarize(episodes)
+    assert len(summary) == 4
+    assert all(row['episodes'] == 3 and row['success_rate'] == 1 for row in summary)
+
+    write_records(str(tmp_path / 'episodes.csv'), episodes)
+    write_records(str(tmp_path / 'plans.jsonl'), plans)
+    with open(tmp_path / 'episodes.csv') as file:
+        assert len(list(csv.DictReader(file))) == len(episodes)
+    with open(tmp_path / 'plans.jsonl') as file:
+        assert [json.loads(line) for line in file] == plans
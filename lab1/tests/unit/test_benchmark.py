@@ -0,0 +1,36 @@
+from vacuum_world.benchmark import DEFAULT_TOLERANCES, TIME_TOLERANCE, benchmark, compare, make_corpus
+
+
+def test_benchmark_measures_optimality():
+    corpus = make_corpus(sizes=[13], seeds=[0])
+    results = benchmark(['bfs-array', 'dfs'], corpus, repeat=1)
+
+    assert len(results) == 2 * 4
+    for key, metrics in results.items():
+        assert metrics['problems'] == 3
+        assert metrics['failures'] == 0
+        assert metrics['expanded_nodes'] > 0
+        assert metrics['peak_frontier'] > 0
+        if key.startswith('bfs-array/'):
+            assert metrics['path_excess'] == 0
+    assert any(metrics['path_excess'] > 0 for key, metrics in results.items() if key.startswith('dfs/'))
+
+
+def test_compare_applies_tolerances():
+    baseline = {'bfs/caves/15': {'time_ms': 10.0, 'expanded_nodes': 100, 'peak_frontier': 50,
+                                 'peak_kib': 50.0, 'path_excess': 0, 'failures': 0}}
+    within = {'bfs/caves/15': {'time_ms': 14.0, 'expanded_nodes': 102, 'peak_frontier': 51,
+                               'peak_kib': 60.0, 'path_excess': 0, 'failures': 0},
+              'jps/caves/15': {'time_ms': 99.0, 'expanded_nodes': 9, 'peak_frontier': 9,
+                               'peak_kib': 9.0, 'path_excess': 9, 'failures': 9}}
+    assert compare(within, baseline) == []
+
+    worse = {'bfs/caves/15': {'time_ms': 16.0, 'expanded_nodes': 103, 'peak_frontier': 52,
+                              'peak_kib': 80.0, 'path_excess': 1, 'failures': 0}}
+    assert [regression['metric'] for regression in compare(worse, baseline)] == [
+        'expanded_nodes', 'peak_frontier', 'peak_kib', 'path_excess'
+    ]
+
+    # Times are only gated on request
+    timed = dict(DEFAULT_TOLERANCES, time_ms=TIME_TOLERANCE)
+    assert [regression['metric'] for regression in compare(worse, baseline, timed)][-1] == 'time_ms'
@@ -0,0 +1,35 @@
+from vacuum_world.search.array_breadth_first_search import ArrayBreadthFirstSearch
+from vacuum_world.search.distance_field import DistanceField
+from vacuum_world.search.problem import SearchProblem
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.world import World
+
+
+def test_distances_match_breadth_first_search():
+    world = World(width=15, height=15, num_dirt=0, maze_type=MazeType.MAZE_CAVES, seed=7)
+    source = GridPos(world.agent.x, world.agent.y)
+    field = DistanceField(world.maze, source)
+
+    for pos in world.maze.get_all_free_positions():
+        path = ArrayBreadthFirstSearch().search(SearchProblem(world, source, pos))
+        if path:
+            assert field.distance_to(pos) == len(path) - 1
+            assert len(field.path_to(pos)) == len(path)
+            assert field.path_from(pos)[-1].get_state() == source
+        else:
+            assert field.distance_to(pos) is None
+            assert field.path_to(pos) == []
+
+
+def test_sweep_stops_at_nearest_target():
+    world = World(width=12, height=12, num_dirt=0, maze_type=MazeType.MAZE_ONLY_BORDER, seed=1)
+    near, far = GridPos(3, 1), GridPos(10, 10)
+    field = DistanceField(world.maze, GridPos(1, 1), [far, near], target_limit=1)
+
+    assert field.nearest_target() == near
+    assert field.reached_targets == [near]
+    assert field.distance_to(far) is None
+    assert [node.get_state() for node in field.path_to(near)] == [
+        GridPos(1, 1), GridPos(2, 1), GridPos(3, 1)
+    ]
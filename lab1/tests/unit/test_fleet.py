@@ -0,0 +1,102 @@
+import itertools
+import random
+
+import pytest
+
+from vacuum_world.agent.assignment import solve_assignment
+from vacuum_world.agent.fleet import ReservationTable, VacuumFleet
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.world import Action, World
+
+
+def run_fleet(world: World, workers: int = 0, max_steps: int = 5000) -> int:
+    fleet = VacuumFleet(world, workers=workers)
+    fleet.set_verbose(False)
+    steps = 0
+    try:
+        while not world.is_terminated() and steps < max_steps:
+            before = [(agent.x, agent.y) for agent in world.agents]
+            fleet.step(world)
+            steps += 1
+            after = [(agent.x, agent.y) for agent in world.agents]
+            assert len(set(after)) == len(after)
+            for (a, b), (c, d) in itertools.combinations(zip(before, after), 2):
+                assert not (a == d and b == c), "agents swapped cells"
+    finally:
+        fleet.close()
+    return steps
+
+
+@pytest.mark.parametrize("shape", [(3, 3), (2, 5), (5, 2)])
+def test_assignment_matches_brute_force(shape):
+    rng = random.Random(1)
+    rows, columns = shape
+    for _ in range(30):
+        costs = [[rng.randrange(20) for _ in range(columns)] for _ in range(rows)]
+        pairs = solve_assignment(costs)
+
+        assert len(pairs) == min(rows, columns)
+        assert len({row for row, _ in pairs}) == len({column for _, column in pairs}) == len(pairs)
+        if rows <= columns:
+            best = min(sum(costs[row][column] for row, column in enumerate(choice))
+                       for choice in itertools.permutations(range(columns), rows))
+        else:
+            best = min(sum(costs[row][column] for column, row in enumerate(choice))
+                       for choice in itertools.permutations(range(rows), columns))
+        assert sum(costs[row][column] for row, column in pairs) == best
+
+
+def test_world_with_a_fleet_keeps_its_dirt():
+    single = World(width=20, height=20, num_dirt=8, maze_type=MazeType.MAZE_CAVES, seed=5)
+    fleet = World(width=20, height=20, num_dirt=8, maze_type=MazeType.MAZE_CAVES, seed=5, num_agents=4)
+
+    assert set(fleet.uncleaned_dirt) == set(single.uncleaned_dirt)
+    assert fleet.agent is fleet.agents[0] and fleet.agent.at_position(single.agent)
+    positions = {(agent.x, agent.y) for agent in fleet.agents}
+    assert len(positions) == 4
+    assert not positions & {(dirt.x, dirt.y) for dirt in fleet.get_all_uncleaned_dirt()}
+
+    # Agents do not walk into each other
+    first, second = fleet.agents[:2]
+    second.move_to(GridPos(first.x + 1, first.y))
+    if fleet.maze.is_valid_position(second):
+        assert not fleet.move_agent(Action.GO_EAST, first)
+
+
+def test_reservations_block_cells_and_swaps():
+    table = ReservationTable()
+    table.reserve_path(0, 10, [1, 2, 2, 3])
+    table.park(0, 3, 13)
+
+    assert not table.is_free(2, 11, 1) and table.is_free(2, 11, 0) and table.is_free(2, 13, 1)
+    assert not table.can_move(3, 2, 10, 1) and not table.can_move(2, 1, 10, 1)
+    assert table.can_move(2, 1, 12, 1)
+    assert not table.is_free(3, 20, 1) and table.is_free(3, 12, 1)
+    assert not table.can_park(2, 12, 1) and table.can_park(2, 13, 1)
+
+    table.release_path(0)
+    table.unpark(0)
+    assert table.cells == {} and table.moves == {} and table.parked == {}
+
+
+@pytest.mark.parametrize("maze_type", list(MazeType))
+def test_fleet_cleans_without_collisions(maze_type):
+    world = World(width=25, height=25, num_dirt=20, maze_type=maze_type, seed=3, num_agents=4)
+    run_fleet(world)
+    assert world.is_terminated()
+    assert sum(agent.get_dirt_collected() for agent in world.agents) == 20
+
+
+def test_more_agents_clean_faster():
+    steps = [run_fleet(World(width=45, height=45, num_dirt=40, maze_type=MazeType.MAZE_ONLY_BORDER,
+                             seed=1, num_agents=num_agents))
+             for num_agents in (1, 4)]
+    assert steps[1] < steps[0] / 2
+
+
+def test_worker_pool_plans_like_the_main_process():
+    steps = [run_fleet(World(width=20, height=20, num_dirt=6, maze_type=MazeType.MAZE_OFFICE,
+                             seed=4, num_agents=3), workers=workers)
+             for workers in (0, 2)]
+    assert steps[0] == steps[1]
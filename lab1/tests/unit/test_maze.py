@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from vacuum_world.world.maze import Maze, MazeType
+from vacuum_world.world.grid_pos import GridPos
+
+
+def make_maze(width: int, height: int, maze_type: MazeType, seed: int = 42) -> Maze:
+    random.seed(seed)
+    return Maze(width, height, maze_type)
+
+
+def test_occupancy_grid_matches_walls():
+    maze = make_maze(12, 9, MazeType.MAZE_LABYRINTH)
+
+    assert len(maze.grid) == 12 * 9
+    for x in range(maze.width):
+        for y in range(maze.height):
+            pos = GridPos(x, y)
+            assert maze.is_wall(pos) == (pos in maze.walls)
+            assert maze.is_wall(pos) == bool(maze.grid[maze.cell_id(x, y)])
+            assert maze.cell_pos(maze.cell_id(x, y)) == pos
+
+
+def test_out_of_bounds_positions():
+    maze = make_maze(5, 5, MazeType.MAZE_ONLY_BORDER)
+
+    assert not maze.is_wall(GridPos(-1, 2))
+    assert not maze.is_valid_position(GridPos(5, 2))
+    assert maze.get_reachable_positions(GridPos(2, 2)) == [
+        GridPos(2, 1), GridPos(2, 3), GridPos(3, 2), GridPos(1, 2)
+    ]
+    assert maze.get_reachable_positions(GridPos(1, 1)) == [GridPos(1, 2), GridPos(2, 1)]
+    assert len(maze.get_all_free_positions()) == 3 * 3
+
+
+def test_adjacency_table_matches_grid():
+    maze = make_maze(11, 8, MazeType.MAZE_CAVES)
+
+    for cell in range(maze.width * maze.height):
+        pos = maze.cell_pos(cell)
+        expected = [maze.cell_id(n.x, n.y) for n in pos.get_neighbors() if maze.is_valid_position(n)]
+        assert list(maze.get_neighbor_cells(cell)) == expected
+
+
+def test_set_wall_invalidates_adjacency():
+    maze = make_maze(5, 5, MazeType.MAZE_ONLY_BORDER)
+    center = maze.cell_id(2, 2)
+    assert list(maze.get_neighbor_cells(center)) == [7, 17, 13, 11]
+    with pytest.raises(TypeError):
+        maze.get_neighbor_cells(center)[0] = 0
+
+    maze.set_wall(GridPos(2, 1))
+    assert list(maze.get_neighbor_cells(center)) == [17, 13, 11]
+
+    maze.set_wall(GridPos(2, 1), False)
+    assert GridPos(2, 1) in maze.get_reachable_positions(GridPos(2, 2))
+
+
+def test_components_match_flood_fill():
+    maze = make_maze(30, 20, MazeType.MAZE_CAVES, seed=9)
+    labels = maze.get_component_labels()
+    sizes = maze.get_component_sizes()
+
+    seen = set()
+    for cell in range(maze.width * maze.height):
+        if maze.grid[cell] or cell in seen:
+            continue
+        # Flood the region of the cell and check that it carries a single, new label
+        region, stack = {cell}, [cell]
+        while stack:
+            for neighbor in maze.get_neighbor_cells(stack.pop()):
+                if neighbor not in region:
+                    region.add(neighbor)
+                    stack.append(neighbor)
+        assert {labels[c] for c in region} == {labels[cell]}
+        assert sizes[labels[cell]] == len(region)
+        seen |= region
+    assert len(sizes) > 1
+
+
+def test_set_wall_splits_component():
+    maze = make_maze(5, 4, MazeType.MAZE_ONLY_BORDER)
+    assert maze.are_connected(GridPos(1, 1), GridPos(3, 2))
+    assert not maze.are_connected(GridPos(1, 1), GridPos(0, 0))
+    assert not maze.are_connected(GridPos(1, 1), GridPos(-1, 1))
+
+    maze.set_wall(GridPos(2, 1))
+    maze.set_wall(GridPos(2, 2))
+    assert not maze.are_connected(GridPos(1, 1), GridPos(3, 2))
+    assert list(maze.get_component_sizes()) == [2, 2]
+    assert list(maze.get_free_cells(1)) == [maze.cell_id(3, 1), maze.cell_id(3, 2)]
+
+
+def test_move_costs():
+    maze = make_maze(5, 5, MazeType.MAZE_ONLY_BORDER)
+    fingerprint = maze.get_fingerprint()
+    assert maze.costs is None and maze.get_move_cost(GridPos(2, 2)) == 1
+
+    assert maze.set_costs([(GridPos(2, 2), 4), (GridPos(1, 1), 1)]) == [maze.cell_id(2, 2)]
+    assert maze.get_move_cost(GridPos(2, 2)) == 4
+    assert maze.get_cell_cost(maze.cell_id(1, 2)) == 1
+    assert maze.get_max_move_cost() == 4
+    assert maze.get_fingerprint() != fingerprint
+
+    with pytest.raises(ValueError):
+        maze.set_costs([(GridPos(2, 2), 0)])
+
+
+def test_terrain_keeps_the_maze():
+    maze = make_maze(40, 30, MazeType.MAZE_LABYRINTH)
+    grid = bytes(maze.grid)
+    maze.generate_terrain(6, seed=1)
+
+    assert bytes(maze.grid) == grid
+    costs = set(maze.costs)
+    assert 1 in costs and costs <= set(range(1, 7)) and len(costs) > 2
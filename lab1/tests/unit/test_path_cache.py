@@ -0,0 +1,51 @@
+from vacuum_world.agent.path_cache import PathCache
+from vacuum_world.search.array_breadth_first_search import ArrayBreadthFirstSearch
+from vacuum_world.search.problem import SearchProblem
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.world import World
+
+
+def make_world(seed: int) -> World:
+    return World(width=12, height=12, num_dirt=0, maze_type=MazeType.MAZE_ONLY_BORDER, seed=seed)
+
+
+def test_paths_are_shared_between_worlds_with_the_same_seed():
+    cache = PathCache()
+    start, goal = GridPos(1, 1), GridPos(10, 10)
+    world = make_world(1)
+    path = ArrayBreadthFirstSearch().search(SearchProblem(world, start, goal))
+
+    assert cache.get_path(world.maze, start, goal, "bfs") is None
+    cache.put_path(world.maze, start, goal, "bfs", path)
+
+    cached = cache.get_path(make_world(1).maze, start, goal, "bfs")
+    assert [node.get_state() for node in cached] == [node.get_state() for node in path]
+    assert cache.get_path(world.maze, start, goal, "astar") is None
+    assert cache.get_stats()['path_hits'] == 1
+    assert cache.get_stats()['path_misses'] == 2
+
+    # A failed search is not remembered, it may have hit a limit
+    cache.put_path(world.maze, goal, start, "bfs", [])
+    assert cache.get_path(world.maze, goal, start, "bfs") is None
+
+
+def test_wall_changes_and_limits_evict_entries():
+    cache = PathCache(max_paths=2, max_field_cells=2 * 12 * 12)
+    world = make_world(2)
+    goals = [GridPos(5, 5), GridPos(6, 6), GridPos(7, 7)]
+    for goal in goals:
+        field = cache.get_distance_field(world.maze, goal)
+        cache.put_path(world.maze, GridPos(1, 1), goal, "bfs", field.path_from(GridPos(1, 1)))
+    assert cache.get_stats()['paths'] == 2
+    assert cache.get_stats()['fields'] == 2
+    assert cache.get_stats()['evictions'] == 2
+
+    old_fingerprint = world.maze.get_fingerprint()
+    world.maze.set_wall(GridPos(3, 3))
+    assert world.maze.get_fingerprint() != old_fingerprint
+    assert cache.get_path(world.maze, GridPos(1, 1), goals[2], "bfs") is None
+
+    cache.invalidate(old_fingerprint)
+    assert cache.get_stats()['paths'] == 0
+    assert cache.get_stats()['fields'] == 0
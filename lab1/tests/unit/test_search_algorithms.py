@@ -0,0 +1,238 @@
+import random
+from functools import lru_cache
+
+import pytest
+
+from vacuum_world.search.a_star_search import AStarSearch
+from vacuum_world.search.array_a_star_search import ArrayAStarSearch
+from vacuum_world.search.array_breadth_first_search import ArrayBreadthFirstSearch
+from vacuum_world.search.bidirectional_search import BidirectionalAStarSearch, BidirectionalBreadthFirstSearch
+from vacuum_world.search.breadth_first_search import BreadthFirstSearch
+from vacuum_world.search.d_star_lite import DStarLiteSearch
+from vacuum_world.search.depth_first_search import DepthFirstSearch
+from vacuum_world.search.fringe_search import FringeSearch
+from vacuum_world.search.iterative_deepening import IterativeDeepeningAStarSearch, IterativeDeepeningDepthFirstSearch
+from vacuum_world.search.jump_point_search import JumpPointSearch
+from vacuum_world.search.problem import SearchProblem
+from vacuum_world.search.uniform_cost_search import BucketUniformCostSearch
+from vacuum_world.search.weighted_a_star_search import WeightedAStarSearch
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.world import World
+
+
+SEARCHES = [BreadthFirstSearch, DepthFirstSearch, AStarSearch]
+
+# Searches that must find shortest paths, checked against BreadthFirstSearch
+OPTIMAL_SEARCHES = [
+    ArrayBreadthFirstSearch,
+    ArrayAStarSearch,
+    JumpPointSearch,
+    BidirectionalBreadthFirstSearch,
+    BidirectionalAStarSearch,
+    DStarLiteSearch,
+    IterativeDeepeningAStarSearch,
+    FringeSearch,
+    BucketUniformCostSearch,
+    WeightedAStarSearch,
+]
+
+
+def make_problem(seed: int, use_cell_ids: bool) -> SearchProblem:
+    maze_type = list(MazeType)[seed % len(MazeType)]
+    world = World(width=15, height=15, num_dirt=1, maze_type=maze_type, seed=seed)
+    agent_pos = GridPos(world.agent.x, world.agent.y)
+    goal_pos = world.maze.get_all_free_positions()[-1]
+    return SearchProblem(world, agent_pos, goal_pos, use_cell_ids=use_cell_ids)
+
+
+@lru_cache(maxsize=None)
+def shortest_path_length(seed: int) -> int:
+    return len(BreadthFirstSearch().search(make_problem(seed, use_cell_ids=True)))
+
+
+def assert_valid_path(problem: SearchProblem, path):
+    assert path[0].get_state() == problem.initial_state
+    assert path[-1].get_state() == problem.goal_state
+    for node, next_node in zip(path, path[1:]):
+        assert isinstance(next_node.get_state(), GridPos)
+        assert next_node.get_state() in problem.maze.get_reachable_positions(node.get_state())
+
+
+@pytest.mark.parametrize("search_class", SEARCHES)
+def test_cell_ids_give_same_path(search_class):
+    for seed in range(8):
+        grid_problem = make_problem(seed, use_cell_ids=False)
+        cell_problem = make_problem(seed, use_cell_ids=True)
+
+        grid_path = search_class().search(grid_problem)
+        cell_path = search_class().search(cell_problem)
+
+        assert [node.get_state() for node in grid_path] == [node.get_state() for node in cell_path]
+        assert grid_problem.get_num_expanded_nodes() == cell_problem.get_num_expanded_nodes()
+        if cell_path:
+            assert_valid_path(cell_problem, cell_path)
+
+
+@pytest.mark.parametrize("search_class", OPTIMAL_SEARCHES)
+@pytest.mark.parametrize("use_cell_ids", [False, True])
+def test_optimal_path_length(search_class, use_cell_ids):
+    for seed in range(12):
+        problem = make_problem(seed, use_cell_ids)
+
+        search = search_class()
+        path = search.search(problem)
+
+        assert len(path) == shortest_path_length(seed)
+        assert search.get_path() == path
+        if path:
+            assert_valid_path(problem, path)
+        for node in search.get_explored_nodes() + search.get_frontier_nodes():
+            assert isinstance(node.get_state(), GridPos)
+
+
+def test_goal_reachability_matches_search():
+    for seed in range(12):
+        problem = make_problem(seed, use_cell_ids=True)
+        assert problem.is_goal_reachable() == (shortest_path_length(seed) > 0)
+
+
+def test_dirt_is_placed_in_the_region_of_the_agent():
+    for seed in range(6):
+        world = World(width=20, height=20, num_dirt=30, maze_type=MazeType.MAZE_CAVES, seed=seed)
+        agent_pos = GridPos(world.agent.x, world.agent.y)
+        assert all(world.maze.are_connected(agent_pos, dirt) for dirt in world.get_all_uncleaned_dirt())
+
+
+@pytest.mark.parametrize("search_class", SEARCHES + OPTIMAL_SEARCHES)
+def test_traced_search_stats(search_class):
+    for seed, use_cell_ids in zip(range(4), (False, True, False, True)):
+        plain_problem = make_problem(seed, use_cell_ids)
+        plain_path, plain_stats = search_class().search_with_stats(plain_problem)
+        assert not plain_stats.traced and plain_stats.expanded_nodes == 0
+
+        expanded = []
+        problem = make_problem(seed, use_cell_ids)
+        path, stats = search_class().search_with_stats(problem, on_expand=expanded.append)
+
+        assert [node.get_state() for node in path] == [node.get_state() for node in plain_path]
+        assert stats.generated_nodes == plain_stats.generated_nodes == problem.get_num_expanded_nodes()
+        assert stats.expanded_nodes == len(expanded)
+        assert all(isinstance(pos, GridPos) for pos in expanded)
+        assert stats.path_length == len(path)
+        if path and len(path) > 2:
+            assert stats.expanded_nodes > 0
+            assert stats.peak_visited_size > 0
+        assert stats.get_time_ms("search") >= stats.get_time_ms("expand")
+        # The plain methods are back once the search is over
+        assert 'get_successors' not in vars(problem) and problem.stats is None
+
+
+def test_d_star_lite_repairs_path_after_wall_changes():
+    rng = random.Random(4)
+    for seed in range(6):
+        problem = make_problem(seed, use_cell_ids=False)
+        maze = problem.maze
+        search = DStarLiteSearch()
+        path = search.search(problem)
+        first_expanded = len(search.get_explored_nodes())
+
+        for _ in range(5):
+            # Move the start along the path, then toggle a few cells away from start and goal
+            if len(path) > 2:
+                start = path[rng.randrange(1, len(path) - 1)].get_state()
+            else:
+                start = problem.initial_state
+            candidates = [GridPos(x, y) for x in range(1, maze.width - 1) for y in range(1, maze.height - 1)
+                          if GridPos(x, y) not in (start, problem.goal_state)]
+            changed = maze.set_walls((pos, not maze.is_wall(pos)) for pos in rng.sample(candidates, 3))
+
+            search.update_start(start)
+            search.update_cells(changed)
+            path = search.replan()
+
+            fresh = SearchProblem(problem.world, start, problem.goal_state)
+            expected = BreadthFirstSearch().search(fresh) if fresh.is_goal_reachable() else []
+            assert len(path) == len(expected)
+            if path:
+                assert_valid_path(fresh, path)
+        assert first_expanded > 0
+
+
+@pytest.mark.parametrize("search_class", [IterativeDeepeningDepthFirstSearch, IterativeDeepeningAStarSearch])
+def test_iterative_deepening_keeps_only_the_path(search_class):
+    for seed in range(8):
+        problem = make_problem(seed, use_cell_ids=True)
+        start = problem.initial_state
+        # Near goals only: iterative deepening expands cells again in every iteration
+        goal = next(pos for pos in reversed(problem.maze.get_all_free_positions())
+                    if 0 < abs(pos.x - start.x) + abs(pos.y - start.y) <= 6
+                    and SearchProblem(problem.world, start, pos).is_goal_reachable())
+        near_problem = SearchProblem(problem.world, start, goal)
+        search = search_class()
+        path = search.search(near_problem)
+
+        expected = BreadthFirstSearch().search(SearchProblem(problem.world, start, goal))
+        assert len(path) == len(expected)
+        assert_valid_path(near_problem, path)
+        assert search.get_search_sizes()[1] == len(path)
+
+
+@pytest.mark.parametrize("search_class", [IterativeDeepeningDepthFirstSearch, IterativeDeepeningAStarSearch])
+def test_iterative_deepening_in_an_open_room(search_class):
+    world = World(width=12, height=14, num_dirt=0, maze_type=MazeType.MAZE_ONLY_BORDER, seed=0)
+    problem = SearchProblem(world, GridPos(1, 1), GridPos(10, 12))
+    search = search_class()
+    path = search.search(problem)
+    assert len(path) == 21 and not search.budget_spent
+    assert search.num_expansions < 10000
+
+    # Running out of budget is told apart from finding no path
+    search = search_class(max_depth=search.num_expansions // 2)
+    assert search.search(problem) == [] and search.budget_spent
+
+
+@pytest.mark.parametrize("maze_type", list(MazeType))
+def test_jump_point_search_on_large_mazes(maze_type):
+    world = World(width=120, height=90, num_dirt=0, maze_type=maze_type, seed=6)
+    start = GridPos(world.agent.x, world.agent.y)
+    goals = [pos for pos in world.maze.get_all_free_positions()[::97] if world.maze.are_connected(start, pos)]
+    # Goals in the row and column of the start too
+    goals += [pos for pos in (GridPos(1, start.y), GridPos(start.x, 1)) if world.maze.are_connected(start, pos)]
+    for goal in goals:
+        problem = SearchProblem(world, start, goal)
+        path = JumpPointSearch().search(problem)
+        assert len(path) == len(ArrayBreadthFirstSearch().search(problem))
+        assert_valid_path(problem, path)
+
+
+def test_cost_searches_find_cheapest_paths_on_terrain():
+    for seed in range(8):
+        problem = make_problem(seed, use_cell_ids=False)
+        if not problem.is_goal_reachable():
+            continue
+        problem.maze.generate_terrain(2 + seed, seed=seed)
+
+        path = BucketUniformCostSearch().search(problem)
+        cost = problem.get_path_cost(path)
+        assert_valid_path(problem, path)
+        assert path[-1].get_cost() == cost
+        assert cost <= problem.get_path_cost(BreadthFirstSearch().search(problem))
+
+        assert problem.get_path_cost(WeightedAStarSearch().search(problem)) == cost
+        assert cost <= problem.get_path_cost(WeightedAStarSearch(2.0).search(problem)) <= 2 * cost
+
+
+@pytest.mark.parametrize("search_class", SEARCHES + OPTIMAL_SEARCHES)
+def test_expanded_cells_match_expanded_nodes(search_class):
+    for seed, use_cell_ids in zip(range(4), (False, True, False, True)):
+        problem = make_problem(seed, use_cell_ids)
+        search = search_class()
+        search.search(problem)
+
+        num_explored = len(search.get_explored_nodes())
+        nodes = search.get_all_expanded_nodes()
+        assert len(search.get_explored_nodes()) == num_explored
+        width = problem.maze.width
+        assert set(search.get_expanded_cells()) == {node.get_state().y * width + node.get_state().x
+                                                    for node in nodes}
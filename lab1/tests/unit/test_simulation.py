@@ -0,0 +1,49 @@
+from vacuum_world.agent.path_cache import PathCache
+from vacuum_world.agent.vacuum_agent import IntelligentVacuumAgent, SearchMethod
+from vacuum_world.simulation import SimulationRunner
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.world import World
+
+
+def make_runner(**kwargs) -> SimulationRunner:
+    world = World(width=15, height=15, num_dirt=4, maze_type=MazeType.MAZE_LABYRINTH, seed=6)
+    agent = IntelligentVacuumAgent(world, path_cache=PathCache())
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod.ARRAY_BREADTH_FIRST_SEARCH)
+    return SimulationRunner(world, agent, **kwargs)
+
+
+def test_runner_records_a_snapshot_per_step():
+    runner = make_runner(steps_per_second=None)
+    first = runner.latest()
+    runner.start()
+    runner.thread.join(timeout=30)
+
+    assert runner.is_finished() and runner.latest().terminated
+    ticks = [snapshot.tick for snapshot in runner.history]
+    assert ticks == list(range(runner.steps + 1))
+    assert runner.get_snapshot(-5) is first and runner.get_snapshot(10 ** 6) is runner.latest()
+    assert len(first.dirt_cells) == 4 and not runner.latest().dirt_cells
+
+    # Unchanged parts are shared, and every change of the agent position is a dirty cell
+    for before, after in zip(runner.history, list(runner.history)[1:]):
+        if before.agent_pos != after.agent_pos:
+            assert runner.world.maze.cell_id(before.agent_pos.x, before.agent_pos.y) in after.cells
+        assert after.grid is first.grid
+        assert (after.dirt_cells is before.dirt_cells) == (after.dirt_collected == before.dirt_collected)
+    assert runner.get_changed_cells(3, 1) == runner.history[2].cells | runner.history[3].cells
+
+
+def test_runner_pauses_limits_steps_and_history():
+    runner = make_runner(steps_per_second=None, max_steps=12, history_limit=5)
+    runner.start(paused=True)
+    assert runner.is_paused() and runner.latest().tick == 0
+    runner.set_paused(False)
+    runner.thread.join(timeout=30)
+
+    assert runner.steps == 12
+    assert runner.get_tick_range() == (8, 12)
+    assert runner.get_snapshot(0).tick == 8
+    assert isinstance(runner.latest().agent_pos, GridPos)
+    runner.stop()
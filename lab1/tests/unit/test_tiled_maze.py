@@ -0,0 +1,206 @@
+import random
+
+import numpy as np
+import pytest
+
+from vacuum_world.agent.path_cache import PathCache
+from vacuum_world.agent.vacuum_agent import IntelligentVacuumAgent, SearchMethod, TargetSelection
+from vacuum_world.search.a_star_search import AStarSearch
+from vacuum_world.search.array_breadth_first_search import ArrayBreadthFirstSearch
+from vacuum_world.search.d_star_lite import DStarLiteSearch
+from vacuum_world.search.distance_field import DistanceField
+from vacuum_world.search.fringe_search import FringeSearch
+from vacuum_world.search.jump_point_search import JumpPointSearch
+from vacuum_world.search.problem import SearchProblem
+from vacuum_world.search.uniform_cost_search import BucketUniformCostSearch
+from vacuum_world.simulation import take_snapshot
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.tiled_grid import TiledGrid
+from vacuum_world.world.tiled_maze import TiledMaze
+from vacuum_world.world.world import World
+
+TILE = TiledGrid.MIN_TILE_SIZE
+
+
+def copy_to_memory(world: World) -> World:
+    """Get a world with the layout, terrain and agent of a tiled world in an in-memory maze."""
+    copy = World(width=world.width, height=world.height, num_dirt=0,
+                 maze_type=MazeType.MAZE_ONLY_BORDER, seed=0)
+    walls = world.maze.get_grid_window(0, 0, world.width, world.height)
+    copy.maze.set_walls((GridPos(x, y), bool(walls[y, x]))
+                        for y in range(world.height) for x in range(world.width))
+    if world.maze.has_terrain():
+        costs = world.maze.get_cost_window(0, 0, world.width, world.height)
+        copy.maze.set_costs((GridPos(x, y), int(costs[y, x]))
+                            for y in range(world.height) for x in range(world.width))
+    copy.agent.move_to(GridPos(world.agent.x, world.agent.y))
+    return copy
+
+
+def test_tiled_grid_keeps_cells_across_evictions():
+    rng = random.Random(1)
+    grid = TiledGrid(3 * TILE + 5, 2 * TILE + 3, tile_size=TILE, max_resident_tiles=2)
+    expected = np.zeros((grid.height, grid.width), dtype=np.uint8)
+    for _ in range(2000):
+        x, y, value = rng.randrange(grid.width), rng.randrange(grid.height), rng.randrange(256)
+        grid[y * grid.width + x] = value
+        expected[y, x] = value
+
+    assert len(grid) == grid.width * grid.height
+    assert grid.get_num_resident_tiles() <= 2
+    assert all(grid[cell] == value for cell, value in enumerate(expected.ravel().tolist()))
+    assert np.array_equal(grid.read_window(0, 0, grid.width, grid.height), expected)
+    assert np.array_equal(grid.read_window(TILE - 3, 7, 2 * TILE + 9, TILE + 1),
+                          expected[7:TILE + 1, TILE - 3:2 * TILE + 9])
+    with pytest.raises(IndexError):
+        grid[len(grid)]
+    with pytest.raises(ValueError):
+        TiledGrid(100, 100, tile_size=TILE + 1)
+    grid.close()
+
+
+def test_tiles_are_generated_when_first_used():
+    maze = TiledMaze(100000, 100000, seed=1, tile_size=TILE)
+    assert maze.grid.get_num_used_tiles() == 0
+
+    assert maze.is_wall(GridPos(0, 5)) and not maze.is_wall(GridPos(1, 1))
+    assert maze.grid.get_num_used_tiles() == 1
+    maze.close()
+
+
+@pytest.mark.parametrize("maze_type", list(MazeType))
+def test_tiled_maze_layout_does_not_depend_on_tile_order(maze_type):
+    width, height = 3 * TILE + 10, 2 * TILE + 20
+    forward = TiledMaze(width, height, maze_type, seed=3, tile_size=TILE, max_resident_tiles=1)
+    backward = TiledMaze(width, height, maze_type, seed=3, tile_size=TILE)
+    walls = np.zeros((height, width), dtype=np.uint8)
+    for y in reversed(range(0, height, TILE)):
+        for x in reversed(range(0, width, TILE)):
+            walls[y:y + TILE, x:x + TILE] = backward.get_grid_window(x, y, x + TILE, y + TILE)
+
+    assert np.array_equal(forward.get_grid_window(0, 0, width, height), walls)
+    assert walls[0].all() and walls[-1].all() and walls[:, 0].all() and walls[:, -1].all()
+    assert 0 < walls.mean() < 0.7
+    assert forward.get_fingerprint() == backward.get_fingerprint()
+
+    # Edits and terrain change the fingerprint
+    fingerprint = forward.get_fingerprint()
+    forward.set_wall(GridPos(5, 5), not walls[5, 5])
+    assert forward.get_fingerprint() != fingerprint
+    fingerprint = forward.get_fingerprint()
+    forward.generate_terrain(4, seed=1)
+    assert forward.get_fingerprint() != fingerprint
+    assert forward.get_max_move_cost() == 4
+
+
+def test_tiled_maze_neighbours_match_in_memory_maze():
+    world = World(width=2 * TILE + 7, height=TILE + 9, num_dirt=1, maze_type=MazeType.MAZE_CAVES,
+                  seed=2, tile_size=TILE)
+    copy = copy_to_memory(world)
+
+    for cell in range(world.width * world.height):
+        assert list(world.maze.get_neighbor_cells(cell)) == list(copy.maze.get_neighbor_cells(cell))
+    for pos in (GridPos(-1, 3), GridPos(world.width, 3), GridPos(4, -1)):
+        assert world.maze.get_reachable_positions(pos) == copy.maze.get_reachable_positions(pos)
+
+
+def test_whole_maze_operations_read_every_tile():
+    world = World(width=2 * TILE + 7, height=TILE + 9, num_dirt=4, maze_type=MazeType.MAZE_OFFICE,
+                  seed=6, tile_size=TILE)
+    copy = copy_to_memory(world)
+    agent_pos = GridPos(world.agent.x, world.agent.y)
+
+    assert list(world.maze.get_free_cells()) == list(copy.maze.get_free_cells())
+    assert world.maze.get_all_free_positions() == copy.maze.get_all_free_positions()
+    assert world.maze.walls == copy.maze.walls
+    assert world.maze.get_component_sizes().tolist() == [len(copy.maze.get_free_cells())]
+    field = DistanceField(world.maze, agent_pos)
+    expected = DistanceField(copy.maze, agent_pos)
+    for dirt in world.get_all_uncleaned_dirt():
+        assert field.distance_to(dirt) == expected.distance_to(dirt)
+
+    agent = IntelligentVacuumAgent(world, path_cache=PathCache())
+    agent.set_verbose(False)
+    agent.set_target_selection(TargetSelection.TOUR)
+    steps = 0
+    while not world.is_terminated() and steps < 2000:
+        agent.step(world)
+        steps += 1
+    assert world.is_terminated()
+
+    with pytest.raises(ValueError):
+        World(width=2 * TILE, height=2 * TILE, num_dirt=3, seed=1, num_agents=2, tile_size=TILE)
+
+
+def test_walled_off_dirt_is_not_connected_in_a_tiled_maze():
+    world = World(width=2 * TILE, height=2 * TILE, num_dirt=6, maze_type=MazeType.MAZE_ONLY_BORDER,
+                  seed=3, tile_size=TILE)
+    agent_pos = GridPos(world.agent.x, world.agent.y)
+    occupied = {(dirt.x, dirt.y) for dirt in world.get_all_uncleaned_dirt()} | {(agent_pos.x, agent_pos.y)}
+    pocket = next(dirt for dirt in world.get_all_uncleaned_dirt()
+                  if not {(dirt.x + dx, dirt.y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))} & occupied)
+    around = [GridPos(pocket.x + dx, pocket.y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))]
+    world.maze.set_walls((pos, True) for pos in around)
+
+    assert world.maze.are_connected(pocket, pocket)
+    assert not world.maze.are_connected(agent_pos, pocket)
+    assert not world.maze.are_connected(pocket, agent_pos)
+
+    # The agent cleans the rest without ever searching for the walled-off dirt
+    agent = IntelligentVacuumAgent(world)
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod.A_STAR_SEARCH)
+    for _ in range(2000):
+        agent.step(world)
+    assert list(world.get_all_uncleaned_dirt()) == [pocket]
+    assert not agent.unreachable_targets
+
+    world.maze.set_wall(around[0], False)
+    assert world.maze.are_connected(GridPos(world.agent.x, world.agent.y), pocket)
+    world.maze.close()
+
+
+@pytest.mark.parametrize("search_class", [AStarSearch, ArrayBreadthFirstSearch, JumpPointSearch,
+                                          DStarLiteSearch, FringeSearch])
+def test_searches_work_on_tiled_mazes(search_class):
+    for seed in range(4):
+        world = World(width=2 * TILE, height=2 * TILE, num_dirt=3, seed=seed, tile_size=TILE)
+        copy = copy_to_memory(world)
+        agent_pos = GridPos(world.agent.x, world.agent.y)
+        for dirt in world.get_all_uncleaned_dirt():
+            expected = len(ArrayBreadthFirstSearch().search(SearchProblem(copy, agent_pos, GridPos(dirt.x, dirt.y))))
+            path = search_class().search(SearchProblem(world, agent_pos, GridPos(dirt.x, dirt.y)))
+            assert expected > 0 and len(path) == expected
+            assert path[-1].get_state() == GridPos(dirt.x, dirt.y)
+
+
+def test_cheapest_paths_on_tiled_terrain():
+    world = World(width=2 * TILE, height=2 * TILE, num_dirt=3, seed=5, tile_size=TILE)
+    world.maze.generate_terrain(6, seed=5)
+    copy = copy_to_memory(world)
+    agent_pos = GridPos(world.agent.x, world.agent.y)
+    for dirt in world.get_all_uncleaned_dirt():
+        goal = GridPos(dirt.x, dirt.y)
+        path = BucketUniformCostSearch().search(SearchProblem(world, agent_pos, goal))
+        expected = BucketUniformCostSearch().search(SearchProblem(copy, agent_pos, goal))
+        assert path[-1].get_cost() == expected[-1].get_cost()
+
+
+def test_large_tiled_world_keeps_few_tiles():
+    world = World(width=10000, height=10000, num_dirt=5, seed=4, tile_size=TILE)
+    agent = IntelligentVacuumAgent(world)
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod.A_STAR_SEARCH)
+
+    assert take_snapshot(world).grid is None
+    steps = 0
+    while not world.is_terminated() and steps < 5000:
+        agent.step(world)
+        steps += 1
+
+    assert world.is_terminated()
+    grid = world.maze.grid
+    assert grid.get_num_resident_tiles() <= grid.max_resident_tiles
+    assert grid.get_num_used_tiles() < grid.tiles_x * grid.tiles_y // 100
+    world.maze.close()
@@ -0,0 +1,60 @@
+import itertools
+import random
+
+from vacuum_world.agent.path_cache import PathCache
+from vacuum_world.agent.tour_planner import (
+    build_distance_matrix, held_karp, nearest_neighbour_tour, plan_dirt_tour, plan_tour, tour_length, two_opt, or_opt
+)
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.world import World
+
+
+def random_matrix(rng: random.Random, size: int):
+    points = [(rng.randint(0, 30), rng.randint(0, 30)) for _ in range(size + 1)]
+    return [[abs(a[0] - b[0]) + abs(a[1] - b[1]) for b in points] for a in points]
+
+
+def test_held_karp_finds_shortest_tour():
+    rng = random.Random(3)
+    for size in range(1, 7):
+        matrix = random_matrix(rng, size)
+        best = min(tour_length((0,) + order, matrix) for order in itertools.permutations(range(1, size + 1)))
+        assert tour_length(held_karp(matrix), matrix) == best
+
+
+def test_local_search_keeps_start_and_improves():
+    matrix = random_matrix(random.Random(5), 40)
+    greedy = nearest_neighbour_tour(matrix)
+
+    for improve in (two_opt, or_opt):
+        order = improve(greedy, matrix)
+        assert order[0] == 0
+        assert sorted(order) == list(range(41))
+        assert tour_length(order, matrix) <= tour_length(greedy, matrix)
+    assert tour_length(plan_tour(matrix), matrix) <= tour_length(greedy, matrix)
+
+
+def test_dirt_tour_visits_all_reachable_dirt():
+    world = World(width=20, height=20, num_dirt=15, maze_type=MazeType.MAZE_ONLY_BORDER, seed=4)
+    dirt = list(world.get_all_uncleaned_dirt())
+
+    tour = plan_dirt_tour(world.maze, GridPos(world.agent.x, world.agent.y), dirt)
+
+    assert sorted(d.to_tuple() for d in tour) == sorted(d.to_tuple() for d in dirt)
+
+
+def test_distance_fields_are_only_cached_when_they_all_fit():
+    world = World(width=20, height=20, num_dirt=6, maze_type=MazeType.MAZE_CAVES, seed=4)
+    start = GridPos(world.agent.x, world.agent.y)
+    dirt = [d for d in world.get_all_uncleaned_dirt() if world.maze.are_connected(start, d)]
+    expected = build_distance_matrix(world.maze, start, dirt)
+
+    small = PathCache(max_field_cells=(len(dirt) - 1) * 20 * 20)
+    assert build_distance_matrix(world.maze, start, dirt, small) == expected
+    assert small.get_stats()['fields'] == 0
+
+    large = PathCache(max_field_cells=len(dirt) * 20 * 20)
+    assert build_distance_matrix(world.maze, start, dirt, large) == expected
+    assert large.get_stats()['fields'] == len(dirt)
+    assert all(large.has_distance_field(world.maze, d) for d in dirt)
@@ -0,0 +1,198 @@
+from vacuum_world.agent.path_cache import PathCache
+from vacuum_world.agent.vacuum_agent import IntelligentVacuumAgent, SearchMethod
+from vacuum_world.world.grid_pos import GridPos
+from vacuum_world.world.maze import MazeType
+from vacuum_world.world.world import World, WorldEvent
+
+
+def test_sucking_all_dirt_terminates():
+    world = World(width=10, height=10, num_dirt=5, maze_type=MazeType.MAZE_ONLY_BORDER, seed=2)
+    assert world.get_num_uncleaned_dirt() == 5
+    assert world.get_dirt_at_position(GridPos(-1, 3)) is None
+
+    for count, dirt in enumerate(world.get_all_uncleaned_dirt(), start=1):
+        assert not world.is_terminated()
+        assert world.get_dirt_at_position(dirt) is dirt
+        world.agent.move_to(dirt)
+        assert world.suck_dirt()
+        assert not world.suck_dirt()
+        assert world.get_dirt_at_position(dirt) is None
+        assert world.get_num_uncleaned_dirt() == 5 - count
+
+    assert world.is_terminated()
+    assert list(world.get_all_uncleaned_dirt()) == []
+    assert all(dirt.is_cleaned() for dirt in world.dirt_particles)
+
+
+def test_set_walls_notifies_listeners_and_spares_the_agent():
+    world = World(width=10, height=10, num_dirt=1, maze_type=MazeType.MAZE_ONLY_BORDER, seed=2)
+    agent_pos = GridPos(world.agent.x, world.agent.y)
+    other = next(pos for pos in world.maze.get_all_free_positions() if pos != agent_pos)
+    edits = []
+    world.maze.add_change_listener(edits.append)
+
+    changed = world.set_walls([(agent_pos, True), (other, True), (GridPos(0, 0), True)])
+    assert changed == [world.maze.cell_id(other.x, other.y)]
+    assert edits == [changed]
+    assert not world.maze.is_wall(agent_pos) and world.maze.is_wall(other)
+
+    assert not world.set_wall(other)
+    assert world.set_wall(other, False)
+    assert len(edits) == 2
+
+
+def test_d_star_lite_agent_cleans_a_changing_maze():
+    world = World(width=15, height=15, num_dirt=4, maze_type=MazeType.MAZE_ONLY_BORDER, seed=3)
+    agent = IntelligentVacuumAgent(world, path_cache=PathCache())
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod.D_STAR_LITE)
+
+    # Drop a wall on the next cell of the path every few steps
+    steps = 0
+    while not world.is_terminated() and steps < 500:
+        if steps % 3 == 1 and agent.current_path_index < len(agent.current_path) - 1:
+            blocked = agent.current_path[agent.current_path_index].get_state()
+            if world.get_dirt_at_position(blocked) is None:
+                world.set_wall(blocked)
+        agent.step(world)
+        steps += 1
+
+    assert world.is_terminated()
+    # Besides one search per dirt, the plan was repaired after the new walls
+    assert len(agent.plan_records) > 4
+    assert any(record['expanded_nodes'] < agent.plan_records[0]['expanded_nodes']
+               for record in agent.plan_records[1:])
+
+
+def test_changes_are_batched_per_tick():
+    world = World(width=10, height=10, num_dirt=2, maze_type=MazeType.MAZE_ONLY_BORDER, seed=2)
+    agent = IntelligentVacuumAgent(world, path_cache=PathCache())
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod.ARRAY_A_STAR_SEARCH)
+    ticks, cleaned, updates = [], [], []
+    world.subscribe(ticks.append)
+    world.subscribe(cleaned.append, [WorldEvent.DIRT_CLEANED])
+
+    class Observer:
+        def update(self):
+            updates.append(world.tick)
+
+    observer = Observer()
+    world.add_observer(observer)
+
+    start = world.maze.cell_id(world.agent.x, world.agent.y)
+    agent.step(world)
+    # Planning and the first step of the path are delivered together
+    changes = ticks[0]
+    assert changes.tick == 0
+    assert changes.events == {WorldEvent.PATH_CHANGED, WorldEvent.EXPANDED_CHANGED}
+    assert {world.maze.cell_id(pos.x, pos.y) for pos in world.current_path} <= changes.cells
+
+    while not world.is_terminated():
+        agent.step(world)
+    assert len(updates) == len(ticks) == world.tick
+    assert any(changes.has(WorldEvent.AGENT_MOVED) and start in changes.cells for changes in ticks)
+    assert [dirt for changes in cleaned for dirt in changes.cleaned_dirt] == \
+        [dirt for changes in ticks for dirt in changes.cleaned_dirt]
+    assert sum(len(changes.cleaned_dirt) for changes in cleaned) == 2
+
+    # Changes made between steps are delivered with the next tick
+    world.unsubscribe(ticks.append)
+    world.set_wall(GridPos(3, 3), not world.maze.is_wall(GridPos(3, 3)))
+    world.end_tick()
+    assert updates[-1] == world.tick and len(ticks) == world.tick - 1
+
+    world.remove_observer(observer)
+    world.set_wall(GridPos(3, 3), not world.maze.is_wall(GridPos(3, 3)))
+    world.end_tick()
+    assert updates[-1] == world.tick - 1
+
+
+def test_expanded_cells_are_only_captured_when_observed():
+    for observed in (False, True):
+        world = World(width=12, height=12, num_dirt=2, maze_type=MazeType.MAZE_ONLY_BORDER, seed=2)
+        agent = IntelligentVacuumAgent(world, path_cache=PathCache())
+        agent.set_verbose(False)
+        agent.set_search_method(SearchMethod.ARRAY_BREADTH_FIRST_SEARCH)
+        ticks = []
+        if observed:
+            world.subscribe(ticks.append, [WorldEvent.EXPANDED_CHANGED])
+
+        agent.step(world)
+        assert bool(world.expanded_nodes) == observed
+        if observed:
+            assert ticks[0].cells == {world.maze.cell_id(pos.x, pos.y) for pos in world.expanded_nodes}
+            assert all(world.is_expanded(pos) for pos in world.expanded_nodes)
+            assert not world.is_expanded(GridPos(0, 0))
+
+
+def test_agent_skips_dirt_its_search_cannot_reach():
+    world = World(width=15, height=15, num_dirt=4, maze_type=MazeType.MAZE_ONLY_BORDER, seed=3)
+    cache = PathCache()
+    agent = IntelligentVacuumAgent(world, path_cache=cache)
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod.ARRAY_BREADTH_FIRST_SEARCH)
+    agent.max_depth = 1
+
+    for _ in range(50):
+        agent.step(world)
+
+    # Every failed search gives up on its target instead of retrying it from the cache
+    assert agent.unreachable_targets == set(world.get_all_uncleaned_dirt())
+    assert agent.target is None
+    assert len(agent.plan_records) == 4
+    assert cache.get_stats()['paths'] == 0
+
+
+def test_requested_dirt_is_placed_in_reach_of_the_agent():
+    # These seeds used to start the agent in a small pocket of the labyrinth
+    for seed in (62, 110, 132, 145, 177, 270):
+        world = World(width=20, height=20, num_dirt=10, seed=seed)
+        agent_pos = GridPos(world.agent.x, world.agent.y)
+        assert world.get_num_uncleaned_dirt() == 10
+        assert all(world.maze.are_connected(agent_pos, dirt) for dirt in world.get_all_uncleaned_dirt())
+        sizes = world.maze.get_component_sizes()
+        assert sizes[world.maze.get_component(agent_pos)] == sizes.max()
+
+
+def test_d_star_lite_is_set_up_for_cached_plans():
+    cache = PathCache()
+    for _ in range(2):
+        world = World(width=15, height=15, num_dirt=4, maze_type=MazeType.MAZE_ONLY_BORDER, seed=3)
+        agent = IntelligentVacuumAgent(world, path_cache=cache)
+        agent.set_verbose(False)
+        agent.set_search_method(SearchMethod.D_STAR_LITE)
+        agent.step(world)
+    # The second agent took its plan from the cache of the first one
+    assert agent.replanner is None and agent.plan_records[-1]['cached']
+
+    # A wall off the path leaves the plan valid, but D* Lite gets set up for later repairs
+    on_path = {node.get_state() for node in agent.current_path}
+    off_path = next(pos for pos in world.maze.get_all_free_positions()
+                    if pos not in on_path and world.get_dirt_at_position(pos) is None)
+    world.set_wall(off_path)
+    agent.step(world)
+    assert agent.replanner is not None
+    assert agent.current_path[-1].get_state() == agent.target
+
+    # Once closed, the agent no longer follows the maze
+    agent.close()
+    world.set_wall(off_path, False)
+    assert agent.changed_cells == []
+
+
+def test_agent_searches_again_when_its_search_runs_out_of_budget():
+    world = World(width=12, height=12, num_dirt=3, maze_type=MazeType.MAZE_ONLY_BORDER, seed=1)
+    agent = IntelligentVacuumAgent(world, path_cache=PathCache())
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod.ITERATIVE_DEEPENING_DEPTH_FIRST_SEARCH)
+    agent.max_depth = 4
+
+    steps = 0
+    while not world.is_terminated() and steps < 500:
+        agent.step(world)
+        steps += 1
+
+    assert world.is_terminated()
+    assert not agent.unreachable_targets
+    assert agent.budget_factor > 1
@@ -0,0 +1,73 @@
+"""
+Minimum-cost assignment of rows to columns of a cost matrix, e.g. of agents to dirt.
+"""
+from typing import List, Sequence, Tuple
+import numpy as np
+
+
+def solve_assignment(costs: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+    """Assign rows to distinct columns so that the total cost is as low as possible.
+
+    The Hungarian algorithm in its shortest augmenting path form: every row is added in
+    turn and the assignment repaired along the cheapest alternating path, keeping dual
+    potentials on rows and columns so that the reduced costs stay non-negative. It takes
+    O(n^2 m) time for n rows and m >= n columns, and each step of the inner loop works on a
+    whole row of the matrix at once.
+
+    Args:
+        costs: A matrix of finite costs; with more rows than columns, only as many rows as
+               there are columns get a column
+
+    Returns:
+        The (row, column) pairs of the assignment, ordered by row
+    """
+    matrix = np.asarray(costs, dtype=np.float64)
+    if matrix.size == 0:
+        return []
+    transposed = matrix.shape[0] > matrix.shape[1]
+    if transposed:
+        matrix = matrix.T
+    num_rows, num_columns = matrix.shape
+
+    # Index 0 is a virtual column that holds the row being added
+    row_potential = np.zeros(num_rows + 1)
+    column_potential = np.zeros(num_columns + 1)
+    column_row = np.zeros(num_columns + 1, dtype=np.int64)
+    previous_column = np.zeros(num_columns + 1, dtype=np.int64)
+
+    for row in range(1, num_rows + 1):
+        column_row[0] = row
+        column = 0
+        min_reduced = np.full(num_columns + 1, np.inf)
+        used = np.zeros(num_columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = column_row[column]
+            reduced = matrix[current_row - 1] - row_potential[current_row] - column_potential[1:]
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            previous_column[1:][better] = column
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            row_potential[column_row[used]] += delta
+            column_potential[used] -= delta
+            min_reduced[1:][free] -= delta
+
+            column = next_column
+            if column_row[column] == 0:
+                break
+
+        # Shift the assignment along the augmenting path
+        while column:
+            previous = previous_column[column]
+            column_row[column] = column_row[previous]
+            column = previous
+
+    pairs = [(int(column_row[column]) - 1, column - 1)
+             for column in range(1, num_columns + 1) if column_row[column]]
+    if transposed:
+        pairs = [(column, row) for row, column in pairs]
+    return sorted(pairs)
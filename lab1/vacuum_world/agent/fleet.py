@@ -0,0 +1,464 @@
+"""
+A fleet of vacuum agents cleaning one world together.
+
+Every tick, the idle agents get dirt by a minimum-cost assignment on their maze distances,
+the agents with a new target plan a path through space and time that avoids the others,
+and every agent makes one move along its plan.
+"""
+import heapq
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from rich import print
+from ..world.world import World, Action, WorldEvent
+from ..world.grid_pos import GridPos
+from ..world.maze import Maze
+from ..search.distance_field import DistanceField
+from .assignment import solve_assignment
+
+
+# Ticks an agent keeps trying to plan to its target before giving the dirt back
+MAX_FAILED_PLANS = 8
+
+# Extra ticks a space-time path may take beyond twice the shortest path, to wait for others
+WAIT_SLACK = 32
+
+
+def fleet_print(message: str):
+    print(f"[bold cyan]Fleet:[/bold cyan] {message}")
+
+
+# The maze of a worker process, handed over once when the pool starts
+_worker_maze: Optional[Maze] = None
+
+# The distance fields a worker process computed, from their target cell
+_worker_fields: Dict[int, array] = {}
+
+# The number of distance fields a worker process keeps
+WORKER_FIELDS = 16
+
+
+def _init_worker(maze: Maze):
+    global _worker_maze
+    _worker_maze = maze
+    _worker_fields.clear()
+
+
+def _run_on_worker_maze(function: Callable, *args):
+    return function(_worker_maze, *args)
+
+
+def sweep_distances(maze: Maze, source: GridPos, targets: List[GridPos], target_limit: int) -> List[int]:
+    """Get the maze distances from a position to the nearest targets, run in the worker pool.
+
+    Returns:
+        The distance to every target, -1 for the targets beyond the target_limit nearest ones
+    """
+    field = DistanceField(maze, source, targets, target_limit)
+    distance, cell_id = field.distance, maze.cell_id
+    return [distance[cell_id(target.x, target.y)] for target in targets]
+
+
+def sweep_region(maze: Maze, source: GridPos) -> array:
+    """Get the maze distances from a position to every cell of its region."""
+    return DistanceField(maze, source).distance
+
+
+class ReservationTable:
+    """
+    Space-time reservations of the cells of a maze, so that agents never meet.
+
+    An agent following a path reserves every (cell, time) pair on it, and every move from
+    one cell to the next, so that no other agent enters the same cell at the same time or
+    crosses it on the same edge. An agent that stops, at the end of its path or when it
+    has nothing to do, parks: its cell is taken from then on, for good.
+    """
+
+    def __init__(self):
+        # Per cell, the agent that reserved it per time
+        self.cells: Dict[int, Dict[int, int]] = {}
+        # The agent moving along (from cell, to cell) between a time and the next
+        self.moves: Dict[Tuple[int, int, int], int] = {}
+        # Per parked cell, its agent and the time it parks from
+        self.parked: Dict[int, Tuple[int, int]] = {}
+        self.parking: Dict[int, int] = {}
+        # The reserved path of every agent, as its start time and cells
+        self.paths: Dict[int, Tuple[int, List[int]]] = {}
+
+    def is_free(self, cell: int, time: int, agent: int) -> bool:
+        """Check whether an agent may be on a cell at a time."""
+        owner = self.cells.get(cell, {}).get(time)
+        if owner is not None and owner != agent:
+            return False
+        parked = self.parked.get(cell)
+        return parked is None or parked[0] == agent or parked[1] > time
+
+    def can_move(self, from_cell: int, to_cell: int, time: int, agent: int) -> bool:
+        """Check whether an agent may move between neighbouring cells from a time to the next."""
+        if not self.is_free(to_cell, time + 1, agent):
+            return False
+        owner = self.moves.get((to_cell, from_cell, time))
+        return owner is None or owner == agent
+
+    def can_park(self, cell: int, time: int, agent: int) -> bool:
+        """Check whether an agent may stay on a cell from a time on, for good."""
+        parked = self.parked.get(cell)
+        if parked is not None and parked[0] != agent:
+            return False
+        return all(owner == agent or reserved < time for reserved, owner in self.cells.get(cell, {}).items())
+
+    def reserve_path(self, agent: int, start_time: int, cells: List[int]):
+        """Reserve the cells of a path from a start time on, replacing the previous path of the agent."""
+        self.release_path(agent)
+        for offset, cell in enumerate(cells):
+            self.cells.setdefault(cell, {})[start_time + offset] = agent
+        for offset, (cell, next_cell) in enumerate(zip(cells, cells[1:])):
+            if cell != next_cell:
+                self.moves[(cell, next_cell, start_time + offset)] = agent
+        self.paths[agent] = (start_time, cells)
+
+    def allows_path(self, agent: int, start_time: int, cells: List[int]) -> bool:
+        """Check whether a path planned on fewer reservations still respects the current ones."""
+        for offset in range(1, len(cells)):
+            cell, next_cell = cells[offset - 1], cells[offset]
+            if next_cell == cell:
+                if not self.is_free(cell, start_time + offset, agent):
+                    return False
+            elif not self.can_move(cell, next_cell, start_time + offset - 1, agent):
+                return False
+        return self.can_park(cells[-1], start_time + len(cells) - 1, agent)
+
+    def release_path(self, agent: int):
+        start_time, cells = self.paths.pop(agent, (0, []))
+        for offset, cell in enumerate(cells):
+            times = self.cells[cell]
+            del times[start_time + offset]
+            if not times:
+                del self.cells[cell]
+        for offset, (cell, next_cell) in enumerate(zip(cells, cells[1:])):
+            self.moves.pop((cell, next_cell, start_time + offset), None)
+
+    def park(self, agent: int, cell: int, since: int):
+        """Take a cell for good from a time on, instead of the previous parking cell of the agent."""
+        self.unpark(agent)
+        self.parked[cell] = (agent, since)
+        self.parking[agent] = cell
+
+    def unpark(self, agent: int):
+        cell = self.parking.pop(agent, None)
+        if cell is not None:
+            del self.parked[cell]
+
+
+def plan_space_time_path(maze: Maze,
+                         reservations: ReservationTable,
+                         agent: int,
+                         start: int,
+                         start_time: int,
+                         goal: int,
+                         distance: array,
+                         max_expansions: int = 200000) -> Optional[List[int]]:
+    """Find the quickest path to a goal that respects the reservations, waiting where needed.
+
+    A* on (cell, time) states, whose successors are the free neighbours and the cell itself
+    (waiting), one tick later. The heuristic is the exact maze distance to the goal, given by
+    a distance field from the goal, so the search goes straight to the goal unless other
+    agents are in the way. The goal only counts as reached once the agent can park on it.
+
+    Args:
+        maze: The maze to move in
+        reservations: The reservations of the other agents
+        agent: The index of the agent
+        start: The cell of the agent at the start time
+        start_time: The tick the path starts at
+        goal: The cell to reach
+        distance: The maze distance of every cell to the goal, -1 if it cannot be reached
+        max_expansions: The number of states after which the search gives up
+
+    Returns:
+        The cell of the agent at every tick from the start time to its arrival, or None
+    """
+    if distance[start] < 0:
+        return None
+    max_time = start_time + 2 * distance[start] + WAIT_SLACK
+    get_neighbor_cells = maze.get_neighbor_cells
+    is_free, can_move, can_park = reservations.is_free, reservations.can_move, reservations.can_park
+
+    parent = {(start, start_time): None}
+    frontier = [(distance[start], distance[start], 0, start, start_time)]
+    closed = set()
+    counter = 0
+    while frontier and len(closed) < max_expansions:
+        _, _, _, cell, time = heapq.heappop(frontier)
+        state = (cell, time)
+        if state in closed:
+            continue
+        closed.add(state)
+
+        if cell == goal and can_park(goal, time, agent):
+            cells = []
+            while state is not None:
+                cells.append(state[0])
+                state = parent[state]
+            cells.reverse()
+            return cells
+        if time >= max_time:
+            continue
+
+        for next_cell in (cell, *get_neighbor_cells(cell)):
+            next_state = (next_cell, time + 1)
+            if next_state in parent:
+                continue
+            if next_cell == cell:
+                if not is_free(cell, time + 1, agent):
+                    continue
+            elif not can_move(cell, next_cell, time, agent):
+                continue
+            h = distance[next_cell]
+            parent[next_state] = state
+            counter += 1
+            heapq.heappush(frontier, (time + 1 - start_time + h, h, counter, next_cell, time + 1))
+    return None
+
+
+def draft_space_time_path(maze: Maze,
+                          reservations: ReservationTable,
+                          agent: int,
+                          start: int,
+                          start_time: int,
+                          goal: int) -> Optional[List[int]]:
+    """Plan a space-time path with the distance field of the goal, run in the worker pool.
+
+    The worker keeps the last distance fields it computed, so that only the cells of the
+    path travel back to the main process.
+    """
+    distance = _worker_fields.pop(goal, None)
+    if distance is None:
+        distance = sweep_region(maze, maze.cell_pos(goal))
+        if len(_worker_fields) >= WORKER_FIELDS:
+            del _worker_fields[next(iter(_worker_fields))]
+    _worker_fields[goal] = distance
+    return plan_space_time_path(maze, reservations, agent, start, start_time, goal, distance)
+
+
+class VacuumFleet:
+    """
+    Controls all agents of a world, as a single agent would control one.
+
+    Dirt is handed out to idle agents by solving an assignment problem on their maze
+    distances to the unassigned dirt, so that the fleet spreads over the dirt instead of
+    racing for the same particles. The distances come from one Breadth-First sweep per idle
+    agent, which stops once it reached as many dirt particles as there are idle agents.
+
+    The agents with a new target plan in order of their index, each with a space-time A*
+    that respects the reservations of the paths planned before it and books its own path
+    in turn, so the agents never collide. The distance field of every target gives the
+    exact heuristic of that search.
+
+    With a pool of worker processes, the sweeps and the space-time searches run there. The
+    maze goes to every worker once, when the pool starts, and the pool starts again after the
+    walls changed. The workers plan all new paths at once, on the reservations made before
+    this tick; the main process then books them in order of the agents, and only plans again
+    the paths that cross one booked before them in the same tick. Small fleets and maps are
+    faster without the pool (``workers`` of 0 or 1).
+    """
+
+    def __init__(self, world: World, workers: Optional[int] = None):
+        """Initialize the fleet.
+
+        Args:
+            world: The world whose agents the fleet controls
+            workers: The number of worker processes, by default one per agent up to the
+                     number of CPUs
+        """
+        self.world = world
+        self.agents = world.agents
+        num_agents = len(self.agents)
+        self.workers = workers if workers is not None else min(num_agents, os.cpu_count() or 1)
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+        # Per agent, the cell of its dirt, its path as (start tick, cells) and failed plans
+        self.targets: List[Optional[int]] = [None] * num_agents
+        self.plans: List[Optional[Tuple[int, List[int]]]] = [None] * num_agents
+        self.failed_plans = [0] * num_agents
+
+        self.reservations = ReservationTable()
+        for index, agent in enumerate(self.agents):
+            self.reservations.park(index, world.maze.cell_id(agent.x, agent.y), world.tick)
+
+        # Distance fields from the targets, for the maze fingerprint they were computed for
+        self.fields: Dict[int, array] = {}
+        self.maze_fingerprint = world.maze.get_fingerprint()
+
+        self.verbose = True
+        self.planning_ms = 0.0
+        self.num_plans = 0
+
+    def set_verbose(self, enabled: bool):
+        self.verbose = enabled
+
+    def log(self, message: str):
+        if self.verbose:
+            fleet_print(message)
+
+    def map(self, function: Callable, *iterables: Iterable) -> list:
+        """Apply a function of the maze to the arguments of several calls, on the worker pool if there is one.
+
+        Args:
+            function: A module level function whose first argument is the maze
+            iterables: The other arguments of every call
+        """
+        maze = self.world.maze
+        if self.workers <= 1:
+            return [function(maze, *args) for args in zip(*iterables)]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                initializer=_init_worker, initargs=(maze,))
+        return list(self.executor.map(_run_on_worker_maze, repeat(function), *iterables))
+
+    def close(self):
+        """Shut the worker pool down."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def step(self, world: World):
+        """Move every agent once, assigning dirt and planning first where needed."""
+        if world.is_terminated():
+            return
+
+        started = time.perf_counter()
+        self.check_maze()
+        self.assign_dirt()
+        self.plan_paths()
+        self.planning_ms += (time.perf_counter() - started) * 1000
+
+        for index in range(len(self.agents)):
+            self.act(index)
+        world.end_tick()
+
+    def check_maze(self):
+        """Drop the distance fields and paths planned before the walls changed."""
+        fingerprint = self.world.maze.get_fingerprint()
+        if fingerprint == self.maze_fingerprint:
+            return
+        self.maze_fingerprint = fingerprint
+        self.fields.clear()
+        # The workers hold the old maze
+        self.close()
+        for index, plan in enumerate(self.plans):
+            if plan is not None:
+                self.drop_plan(index)
+
+    def drop_plan(self, index: int):
+        """Stop an agent where it is, to plan again."""
+        agent = self.agents[index]
+        self.plans[index] = None
+        self.reservations.release_path(index)
+        self.reservations.park(index, self.world.maze.cell_id(agent.x, agent.y), self.world.tick)
+
+    def assign_dirt(self):
+        """Hand the unassigned dirt out to the idle agents, minimizing their total distance."""
+        idle = [index for index, target in enumerate(self.targets) if target is None]
+        if not idle:
+            return
+        assigned = set(self.targets)
+        dirt = [dirt for cell, dirt in self.world.uncleaned_dirt.items() if cell not in assigned]
+        if not dirt:
+            return
+
+        maze = self.world.maze
+        sources = [GridPos(self.agents[index].x, self.agents[index].y) for index in idle]
+        distances = self.map(sweep_distances, sources, repeat(dirt), repeat(len(idle)))
+
+        # Dirt beyond the nearest ones of an agent costs more than any path
+        unreached = maze.width * maze.height
+        costs = [[distance if distance >= 0 else unreached for distance in row] for row in distances]
+        for row, column in solve_assignment(costs):
+            if distances[row][column] >= 0:
+                index, target = idle[row], dirt[column]
+                self.targets[index] = maze.cell_id(target.x, target.y)
+                self.log(f"agent {index} goes to {target}, {distances[row][column]} moves away")
+
+    def plan_paths(self):
+        """Plan the paths of the agents with a target and no path, in order of their index."""
+        waiting = [index for index, target in enumerate(self.targets)
+                   if target is not None and self.plans[index] is None]
+        if not waiting:
+            return
+
+        maze = self.world.maze
+        now = self.world.tick
+        starts = [maze.cell_id(self.agents[index].x, self.agents[index].y) for index in waiting]
+        targets = [self.targets[index] for index in waiting]
+        if self.workers > 1:
+            drafts = self.map(draft_space_time_path, repeat(self.reservations), waiting,
+                              starts, repeat(now), targets)
+        else:
+            drafts = [None] * len(waiting)
+
+        for index, start, target, cells in zip(waiting, starts, targets, drafts):
+            # Booking paths mostly adds reservations, so a draft that failed is not planned again
+            if self.workers <= 1 or (cells is not None and not self.reservations.allows_path(index, now, cells)):
+                if target not in self.fields:
+                    self.fields[target] = sweep_region(maze, maze.cell_pos(target))
+                cells = plan_space_time_path(maze, self.reservations, index, start, now, target,
+                                             self.fields[target])
+            self.num_plans += 1
+            if cells is None:
+                # Stay parked, and give the dirt back if the way stays blocked
+                self.failed_plans[index] += 1
+                if self.failed_plans[index] >= MAX_FAILED_PLANS:
+                    self.log(f"agent {index} gives up on {maze.cell_pos(target)}")
+                    self.fields.pop(target, None)
+                    self.targets[index] = None
+                    self.failed_plans[index] = 0
+                continue
+            self.failed_plans[index] = 0
+            self.plans[index] = (now, cells)
+            self.reservations.reserve_path(index, now, cells)
+            self.reservations.park(index, target, now + len(cells) - 1)
+
+        if self.world.is_observed(WorldEvent.PATH_CHANGED):
+            cell_pos = maze.cell_pos
+            self.world.mark_current_path([cell_pos(cell) for plan in self.plans if plan is not None
+                                          for cell in dict.fromkeys(plan[1])])
+
+    def act(self, index: int):
+        """Make the move of an agent for the current tick, or vacuum at the end of its path."""
+        plan = self.plans[index]
+        if plan is None:
+            return
+        world, agent = self.world, self.agents[index]
+        start_time, cells = plan
+        offset = world.tick - start_time
+
+        if offset >= len(cells) - 1:
+            world.suck_dirt(agent)
+            target = self.targets[index]
+            self.fields.pop(target, None)
+            self.targets[index] = None
+            self.plans[index] = None
+            self.reservations.release_path(index)
+            return
+
+        cell, next_cell = cells[offset], cells[offset + 1]
+        if next_cell == cell:
+            return
+        width = world.maze.width
+        if next_cell == cell + 1:
+            action = Action.GO_EAST
+        elif next_cell == cell - 1:
+            action = Action.GO_WEST
+        elif next_cell == cell - width:
+            action = Action.GO_NORTH
+        else:
+            action = Action.GO_SOUTH
+        if not world.move_agent(action, agent):
+            self.drop_plan(index)
+
+    def get_dirt_collected(self) -> List[int]:
+        return [agent.get_dirt_collected() for agent in self.agents]
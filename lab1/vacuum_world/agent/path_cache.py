@@ -0,0 +1,139 @@
+"""
+Bounded cache of planned paths and distance fields, shared between plans on identical mazes.
+"""
+from array import array
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+from ..world.grid_pos import GridPos
+from ..world.maze import Maze
+from ..search.search_node import SearchNode
+from ..search.distance_field import DistanceField
+
+
+class PathCache:
+    """
+    Least-recently-used cache of paths and of distance fields rooted at goals.
+
+    Entries are keyed by the fingerprint of the maze walls, so worlds generated with the same
+    seed share entries, and entries of a maze whose walls changed are never returned again.
+    Paths are keyed by (fingerprint, start, goal, method) and stored as cell ids; failed
+    searches are not cached, as they may have hit a depth or time limit. Distance fields are keyed by (fingerprint, goal)
+    and give the path from any start to that goal.
+    """
+
+    def __init__(self, max_paths: int = 4096, max_field_cells: int = 4_000_000):
+        """Initialize an empty cache.
+
+        Args:
+            max_paths: Maximum number of cached paths
+            max_field_cells: Maximum total number of maze cells covered by the cached distance fields
+        """
+        self.max_paths = max_paths
+        self.max_field_cells = max_field_cells
+        self.paths: 'OrderedDict[Tuple, array]' = OrderedDict()
+        self.fields: 'OrderedDict[Tuple, DistanceField]' = OrderedDict()
+        self.field_cells = 0
+
+        self.path_hits = 0
+        self.path_misses = 0
+        self.field_hits = 0
+        self.field_misses = 0
+        self.evictions = 0
+
+    def get_path(self, maze: Maze, start: GridPos, goal: GridPos, method: Hashable) -> Optional[List[SearchNode]]:
+        """Look up a path planned earlier.
+
+        Args:
+            maze: The maze the path is planned in
+            start: The start position
+            goal: The goal position
+            method: Identifies the planner, as paths of different planners may differ
+
+        Returns:
+            The path as SearchNode objects, or None on a cache miss
+        """
+        key = (maze.get_fingerprint(), maze.cell_id(start.x, start.y), maze.cell_id(goal.x, goal.y), method)
+        cells = self.paths.get(key)
+        if cells is None:
+            self.path_misses += 1
+            return None
+
+        self.path_hits += 1
+        self.paths.move_to_end(key)
+        path = []
+        node = None
+        for cost, cell in enumerate(cells):
+            node = SearchNode(maze.cell_pos(cell), node, None, cost)
+            path.append(node)
+        return path
+
+    def put_path(self, maze: Maze, start: GridPos, goal: GridPos, method: Hashable, path: List[SearchNode]):
+        """Store a planned path, evicting the least recently used paths beyond the size limit; empty paths are ignored."""
+        if not path:
+            return
+        key = (maze.get_fingerprint(), maze.cell_id(start.x, start.y), maze.cell_id(goal.x, goal.y), method)
+        self.paths[key] = array('i', (maze.cell_id(node.state.x, node.state.y) for node in path))
+        self.paths.move_to_end(key)
+        while len(self.paths) > self.max_paths:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+
+    def can_hold_fields(self, maze: Maze, count: int) -> bool:
+        """Tell whether count distance fields of a maze fit in the cache together."""
+        return count * maze.width * maze.height <= self.max_field_cells
+
+    def has_distance_field(self, maze: Maze, goal: GridPos) -> bool:
+        """Tell whether the distance field rooted at a goal is cached, without counting a hit or miss."""
+        return (maze.get_fingerprint(), maze.cell_id(goal.x, goal.y)) in self.fields
+
+    def get_distance_field(self, maze: Maze, goal: GridPos) -> DistanceField:
+        """Get the distance field rooted at a goal, sweeping the maze on a cache miss.
+
+        Args:
+            maze: The maze to sweep
+            goal: The root of the field
+
+        Returns:
+            The full distance field from the goal over its connected region
+        """
+        key = (maze.get_fingerprint(), maze.cell_id(goal.x, goal.y))
+        field = self.fields.get(key)
+        if field is not None:
+            self.field_hits += 1
+            self.fields.move_to_end(key)
+            return field
+
+        self.field_misses += 1
+        field = DistanceField(maze, goal)
+        self.fields[key] = field
+        self.field_cells += maze.width * maze.height
+        # Always keep the newest field, even if it exceeds the limit by itself
+        while self.field_cells > self.max_field_cells and len(self.fields) > 1:
+            _, evicted = self.fields.popitem(last=False)
+            self.field_cells -= evicted.maze.width * evicted.maze.height
+            self.evictions += 1
+        return field
+
+    def invalidate(self, fingerprint: Optional[bytes] = None):
+        """Drop the entries of one maze fingerprint, or all entries."""
+        for entries in (self.paths, self.fields):
+            for key in [key for key in entries if fingerprint is None or key[0] == fingerprint]:
+                entry = entries.pop(key)
+                if isinstance(entry, DistanceField):
+                    self.field_cells -= entry.maze.width * entry.maze.height
+
+    def get_stats(self) -> dict:
+        """Get the hit and miss counters and the current size of the cache."""
+        return {
+            'path_hits': self.path_hits,
+            'path_misses': self.path_misses,
+            'field_hits': self.field_hits,
+            'field_misses': self.field_misses,
+            'evictions': self.evictions,
+            'paths': len(self.paths),
+            'fields': len(self.fields),
+        }
+
+
+# Process-wide cache used by agents that are not given their own
+shared_path_cache = PathCache()
@@ -0,0 +1,221 @@
+"""
+Planning of the order in which the agent visits all dirt particles.
+
+The visiting order is an open travelling salesman tour starting at the agent, over the maze
+distances between the agent and the dirt particles.
+"""
+from typing import List, Optional, Sequence
+from ..world.grid_pos import GridPos
+from ..world.maze import Maze
+from ..search.distance_field import DistanceField
+from .path_cache import PathCache
+
+
+# Up to this many dirt particles, the order is found exactly with Held-Karp
+HELD_KARP_LIMIT = 12
+
+DistanceMatrix = List[List[int]]
+
+
+def build_distance_matrix(maze: Maze,
+                          start: GridPos,
+                          points: Sequence[GridPos],
+                          path_cache: Optional[PathCache] = None) -> DistanceMatrix:
+    """Compute the maze distances between the start and all points with one sweep per point.
+
+    Args:
+        maze: The maze to measure distances in
+        start: The start of the tour (index 0 of the matrix)
+        points: The points to visit (indices 1.. of the matrix), all reachable from the start
+        path_cache: If given and it can hold the fields of all points, the full distance
+                    fields of the points are taken from and kept in this cache, so that they
+                    also serve the paths along the tour
+
+    Returns:
+        The symmetric matrix of maze distances
+    """
+    nodes = [start] + list(points)
+    size = len(nodes)
+    matrix = [[0] * size for _ in range(size)]
+
+    # Full fields that would evict each other before the tour uses them cost a sweep of the
+    # whole region each, for nothing
+    use_cache = path_cache is not None and path_cache.can_hold_fields(maze, size - 1)
+
+    # Distances are symmetric, so the sweep from point i only has to reach the nodes before it
+    for i in range(1, size):
+        if use_cache:
+            field = path_cache.get_distance_field(maze, nodes[i])
+        else:
+            field = DistanceField(maze, nodes[i], nodes[:i])
+        for j in range(i):
+            distance = field.distance_to(nodes[j])
+            matrix[i][j] = distance
+            matrix[j][i] = distance
+    return matrix
+
+
+def tour_length(order: Sequence[int], matrix: DistanceMatrix) -> int:
+    """Get the length of an open tour given as a sequence of matrix indices."""
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def held_karp(matrix: DistanceMatrix) -> List[int]:
+    """Find the shortest open tour from index 0 through all other indices by dynamic programming.
+
+    Runs in O(2^n * n^2) time, for small numbers of points only.
+
+    Returns:
+        The visiting order, starting with 0
+    """
+    n = len(matrix) - 1
+    if n <= 0:
+        return [0]
+
+    full = (1 << n) - 1
+    infinity = float('inf')
+    # cost[mask][j]: shortest path from the start through the points in mask, ending at point j
+    cost = [[infinity] * n for _ in range(1 << n)]
+    previous = [[-1] * n for _ in range(1 << n)]
+    for j in range(n):
+        cost[1 << j][j] = matrix[0][j + 1]
+
+    for mask in range(1, full + 1):
+        mask_cost = cost[mask]
+        for j in range(n):
+            current = mask_cost[j]
+            if current == infinity or not (mask >> j) & 1:
+                continue
+            row = matrix[j + 1]
+            for k in range(n):
+                if (mask >> k) & 1:
+                    continue
+                next_mask = mask | (1 << k)
+                candidate = current + row[k + 1]
+                if candidate < cost[next_mask][k]:
+                    cost[next_mask][k] = candidate
+                    previous[next_mask][k] = j
+
+    last = min(range(n), key=lambda j: cost[full][j])
+    order = []
+    mask = full
+    while last >= 0:
+        order.append(last + 1)
+        last, mask = previous[mask][last], mask & ~(1 << last)
+    order.append(0)
+    return order[::-1]
+
+
+def nearest_neighbour_tour(matrix: DistanceMatrix) -> List[int]:
+    """Build an open tour from index 0 by always moving to the closest unvisited point."""
+    unvisited = set(range(1, len(matrix)))
+    order = [0]
+    while unvisited:
+        row = matrix[order[-1]]
+        closest = min(unvisited, key=lambda j: (row[j], j))
+        unvisited.remove(closest)
+        order.append(closest)
+    return order
+
+
+def two_opt(order: List[int], matrix: DistanceMatrix) -> List[int]:
+    """Improve an open tour by reversing segments while that makes it shorter. The start stays first."""
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = order[i - 1], order[i]
+            row_a = matrix[a]
+            for j in range(i + 1, n):
+                c = order[j]
+                d = order[j + 1] if j + 1 < n else None
+                removed = row_a[b] + (matrix[c][d] if d is not None else 0)
+                added = row_a[c] + (matrix[b][d] if d is not None else 0)
+                if added < removed:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    b = order[i]
+                    improved = True
+    return order
+
+
+def or_opt(order: List[int], matrix: DistanceMatrix, max_segment: int = 3) -> List[int]:
+    """Improve an open tour by moving short segments to a better place. The start stays first."""
+    order = list(order)
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            i = 1
+            while i + length <= len(order):
+                n = len(order)
+                segment = order[i:i + length]
+                before = order[i - 1]
+                after = order[i + length] if i + length < n else None
+                # Gain of cutting the segment out and closing the gap
+                gain = matrix[before][segment[0]]
+                if after is not None:
+                    gain += matrix[segment[-1]][after] - matrix[before][after]
+                rest = order[:i] + order[i + length:]
+
+                best_delta, best_position, best_reversed = 0, None, False
+                for position in range(1, len(rest) + 1):
+                    left = rest[position - 1]
+                    right = rest[position] if position < len(rest) else None
+                    for reverse in (False, True):
+                        first, last = (segment[-1], segment[0]) if reverse else (segment[0], segment[-1])
+                        cost = matrix[left][first]
+                        if right is not None:
+                            cost += matrix[last][right] - matrix[left][right]
+                        delta = cost - gain
+                        if delta < best_delta:
+                            best_delta, best_position, best_reversed = delta, position, reverse
+
+                if best_position is not None:
+                    moved = segment[::-1] if best_reversed else segment
+                    order = rest[:best_position] + moved + rest[best_position:]
+                    improved = True
+                else:
+                    i += 1
+    return order
+
+
+def plan_tour(matrix: DistanceMatrix) -> List[int]:
+    """Choose the visiting order: exact for few points, nearest neighbour plus local search otherwise.
+
+    Returns:
+        The visiting order as matrix indices, starting with 0
+    """
+    if len(matrix) - 1 <= HELD_KARP_LIMIT:
+        return held_karp(matrix)
+    order = nearest_neighbour_tour(matrix)
+    length = tour_length(order, matrix)
+    while True:
+        order = or_opt(two_opt(order, matrix), matrix)
+        new_length = tour_length(order, matrix)
+        if new_length >= length:
+            return order
+        length = new_length
+
+
+def plan_dirt_tour(maze: Maze,
+                   start: GridPos,
+                   dirt: Sequence[GridPos],
+                   path_cache: Optional[PathCache] = None) -> List[GridPos]:
+    """Plan the order in which to visit all dirt reachable from the start.
+
+    Args:
+        maze: The maze to plan in
+        start: The position of the agent
+        dirt: The dirt particles to clean
+        path_cache: Optional cache of the distance fields of the dirt
+
+    Returns:
+        The reachable dirt particles in visiting order
+    """
+    reachable = [d for d in dirt if maze.are_connected(start, d)]
+    if not reachable:
+        return []
+    matrix = build_distance_matrix(maze, start, reachable, path_cache)
+    return [reachable[i - 1] for i in plan_tour(matrix)[1:]]
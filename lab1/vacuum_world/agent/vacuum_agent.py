@@ -2,17 +2,29 @@
 Intelligent vacuum agent that uses search algorithms to clean dirt.
 """
 import time
-from typing import List, Optional
+from typing import List, Optional, Set
 from enum import Enum
 from rich import print
-from ..world.world import World, Action
+from ..world.world import World, Action, WorldEvent
 from ..world.grid_pos import GridPos
 from ..search.search_node import SearchNode
-from ..search.problem import SearchProblem
+from ..search.problem import SearchProblem, Heuristic
 from ..search.breadth_first_search import BreadthFirstSearch
+from ..search.array_breadth_first_search import ArrayBreadthFirstSearch
 from ..search.depth_first_search import DepthFirstSearch
 from ..search.a_star_search import AStarSearch
+from ..search.array_a_star_search import ArrayAStarSearch
+from ..search.jump_point_search import JumpPointSearch
+from ..search.bidirectional_search import BidirectionalBreadthFirstSearch, BidirectionalAStarSearch
+from ..search.d_star_lite import DStarLiteSearch
+from ..search.iterative_deepening import IterativeDeepeningAStarSearch, IterativeDeepeningDepthFirstSearch
+from ..search.fringe_search import FringeSearch
+from ..search.uniform_cost_search import BucketUniformCostSearch
+from ..search.weighted_a_star_search import WeightedAStarSearch
 from ..search.random_search import RandomSearch
+from ..search.distance_field import DistanceField
+from .tour_planner import plan_dirt_tour
+from .path_cache import PathCache, shared_path_cache
 
 
 def agent_print(message: str):
@@ -21,29 +33,140 @@ def agent_print(message: str):
 
 class SearchMethod(Enum):
     BREADTH_FIRST_SEARCH = "bfs"
+    ARRAY_BREADTH_FIRST_SEARCH = "bfs-array"
     DEPTH_FIRST_SEARCH = "dfs"
     A_STAR_SEARCH = "astar"
+    ARRAY_A_STAR_SEARCH = "astar-array"
+    JUMP_POINT_SEARCH = "jps"
+    BIDIRECTIONAL_BREADTH_FIRST_SEARCH = "bibfs"
+    BIDIRECTIONAL_A_STAR_SEARCH = "biastar"
+    D_STAR_LITE = "dstar"
+    ITERATIVE_DEEPENING_A_STAR_SEARCH = "ida"
+    FRINGE_SEARCH = "fringe"
+    ITERATIVE_DEEPENING_DEPTH_FIRST_SEARCH = "iddfs"
+    UNIFORM_COST_SEARCH = "ucs"
+    WEIGHTED_A_STAR_SEARCH = "wastar"
     RANDOM_SEARCH = "random"
 
 
+class TargetSelection(Enum):
+    # Closest dirt by straight-line distance, then a search to it with the search method
+    EUCLIDEAN = "euclidean"
+    # Closest dirt by maze distance, with the path taken from the same Breadth-First sweep
+    DISTANCE_FIELD = "field"
+    # Next dirt of a tour through all dirt, planned once from the pairwise maze distances
+    TOUR = "tour"
+
+
 class IntelligentVacuumAgent:
-    def __init__(self, world: World):
+    def __init__(self, world: World, path_cache: Optional[PathCache] = None):
+        """Initialize the agent.
+        
+        Args:
+            world: The world the agent cleans
+            path_cache: Cache of planned paths, the process-wide shared cache by default
+        """
         self.world = world
         self.search_method = SearchMethod.BREADTH_FIRST_SEARCH
         self.target: Optional[GridPos] = None
+        # Targets the search found no path to, skipped until the walls change or dirt is
+        # sucked, after which they are tried again from the new position
+        self.unreachable_targets: Set[GridPos] = set()
         self.current_path: List[SearchNode] = []
         self.current_path_index = 0
         self.max_depth = 1000000
+        # Whether the last search gave up on its budget, and the factor max_depth is raised by
+        # for the current target after each such failure
+        self.search_gave_up = False
+        self.budget_factor = 1
+        self.use_cell_ids = False
+        self.heuristic = Heuristic.MANHATTAN
+        self.heuristic_weight = 1.0
+        self.target_selection = TargetSelection.EUCLIDEAN
+        
+        # The sweep that selected the current target, and the time it took in msec
+        self.target_field: Optional[DistanceField] = None
+        self.target_field_time = 0.0
+        
+        # Remaining dirt in visiting order, for the tour target selection
+        self.tour: List[GridPos] = []
+        
+        self.path_cache = path_cache if path_cache is not None else shared_path_cache
+        self.maze_fingerprint: Optional[bytes] = None
+        
+        # Whether progress is printed, and one record per planned path (see record_plan)
+        self.verbose = True
+        self.plan_records: List[dict] = []
+        
+        # The D* Lite search of the current plan, repaired instead of run again when walls
+        # change, and the cells whose walls changed since the last step
+        self.replanner: Optional[DStarLiteSearch] = None
+        self.changed_cells: List[int] = []
+        world.maze.add_change_listener(self.on_walls_changed)
+    
+    def close(self):
+        """Stop following the edits of the maze, e.g. when a fleet takes over the world."""
+        self.world.maze.remove_change_listener(self.on_walls_changed)
     
     def set_search_method(self, method: SearchMethod):
         self.search_method = method
     
+    def set_use_cell_ids(self, enabled: bool):
+        """Let the searches work on integer cell ids instead of GridPos states."""
+        self.use_cell_ids = enabled
+    
+    def set_heuristic(self, heuristic: Heuristic):
+        """Set the heuristic used by the informed searches."""
+        self.heuristic = heuristic
+    
+    def set_heuristic_weight(self, weight: float):
+        """Set the factor applied to the heuristic by weighted A* (1 finds the cheapest paths)."""
+        self.heuristic_weight = weight
+    
+    def set_target_selection(self, selection: TargetSelection):
+        """Set how the next dirt to clean is chosen."""
+        self.target_selection = selection
+    
+    def set_verbose(self, enabled: bool):
+        """Enable or disable the progress messages, e.g. for headless batch runs."""
+        self.verbose = enabled
+    
+    def log(self, message: str):
+        if self.verbose:
+            agent_print(message)
+    
+    def record_plan(self,
+                    elapsed_time: float,
+                    path_length: int,
+                    num_expanded: int,
+                    cached: bool = False,
+                    print_result: bool = True):
+        """Record the outcome of planning a path, and print it when verbose.
+        
+        Args:
+            elapsed_time: The time spent on planning, in msec
+            path_length: The number of nodes of the path (0 if none was found)
+            num_expanded: The number of nodes expanded while planning
+            cached: Whether the path came from the path cache
+            print_result: Whether to print the record (only when verbose)
+        """
+        self.plan_records.append({
+            'planning_ms': elapsed_time,
+            'path_length': path_length,
+            'expanded_nodes': num_expanded,
+            'cached': cached,
+        })
+        if print_result and self.verbose:
+            print(f"\tNeeded {elapsed_time:.1f} msec, PathLength: {path_length}, "
+                  f"NumExpNodes: {num_expanded}{' (cached)' if cached else ''}")
+    
     def step(self, real_world: World):
         if real_world.is_terminated():
             return
         
         action = self.choose_action()
         self.act(action, real_world)
+        real_world.end_tick()
     
     def choose_action(self) -> Action:
         """
@@ -63,15 +186,24 @@ class IntelligentVacuumAgent:
             else:
                 # Suck dirt
                 self.target = None
+                self.unreachable_targets.clear()
                 return Action.SUCK_DIRT
         
+        # Did walls change under the plan?
+        if self.changed_cells:
+            self.repair_plan()
+        
         # Do we need to select a new target dirt?
         target = self.select_target(self.target)
         if target is None:
-            agent_print("No more dirt, the maze is shining clean!")
+            if self.world.is_terminated():
+                self.log("No more dirt, the maze is shining clean!")
+            else:
+                self.log("No reachable dirt left!")
             return Action.NO_OPERATION
         elif target != self.target:
                 self.target = target
+                self.budget_factor = 1
                 self.reset_plan()
         
         # Do we need to plan a path?
@@ -80,9 +212,20 @@ class IntelligentVacuumAgent:
             self.current_path = path
             self.current_path_index = 0
         
-        # If we still have no path, then path planning failed (check if the target was unreachable?)
+        # A search that ran out of budget says nothing about the target: search again with twice
+        # the budget at the next step
+        if not self.current_path and self.search_gave_up:
+            self.budget_factor *= 2
+            self.log(f"The search gave up on {self.target}, trying again with a budget of "
+                     f"{self.max_depth * self.budget_factor} expansions")
+            return Action.NO_OPERATION
+        
+        # If we still have no path, then path planning failed: try another target next
         if not self.current_path:
-            agent_print("No path found!")
+            self.log("No path found!")
+            self.unreachable_targets.add(GridPos(self.target.x, self.target.y))
+            self.target = None
+            self.reset_plan()
             return Action.NO_OPERATION
         else:
             # Follow the plan
@@ -97,7 +240,7 @@ class IntelligentVacuumAgent:
             world: The world to act in
         """
         if action == Action.SUCK_DIRT:
-            agent_print("Vacuuming Dirt")
+            self.log("Vacuuming Dirt")
             world.suck_dirt()
         elif action == Action.GO_NORTH:
             world.move_agent(Action.GO_NORTH)
@@ -108,9 +251,9 @@ class IntelligentVacuumAgent:
         elif action == Action.GO_WEST:
             world.move_agent(Action.GO_WEST)
         elif action == Action.NO_OPERATION:
-            agent_print("NO-OP Action")
+            self.log("NO-OP Action")
         else:
-            agent_print(f"Unknown Action: {action}")
+            self.log(f"Unknown Action: {action}")
     
     def select_target(self, last_target: Optional[GridPos]) -> Optional[GridPos]:
         """Select the closest dirt particle as target.
@@ -121,16 +264,27 @@ class IntelligentVacuumAgent:
         Returns:
             Selected target or None if no dirt available
         """
-        uncleaned_dirt = self.world.get_all_uncleaned_dirt()
-        
-        if len(uncleaned_dirt) == 0:
+        if self.world.is_terminated():
             return None
         
         if last_target is None:
             if not self.world.agent:
-                return uncleaned_dirt[0]
+                return next(self.world.iter_uncleaned_dirt())
             
+            # Dirt outside the region of the agent can never be reached, whatever the search,
+            # and dirt the search failed on is skipped until the walls change
             agent_pos = GridPos(self.world.agent.x, self.world.agent.y)
+            maze = self.world.maze
+            uncleaned_dirt = [dirt for dirt in self.world.iter_uncleaned_dirt()
+                              if maze.are_connected(agent_pos, dirt) and dirt not in self.unreachable_targets]
+            if not uncleaned_dirt:
+                return None
+            
+            if self.target_selection == TargetSelection.DISTANCE_FIELD:
+                return self.select_target_by_distance_field(agent_pos, uncleaned_dirt)
+            if self.target_selection == TargetSelection.TOUR:
+                return self.select_target_from_tour(agent_pos, uncleaned_dirt)
+            
             best_dist = float('inf')
             target = None
             
@@ -144,6 +298,49 @@ class IntelligentVacuumAgent:
         else:
             return last_target
     
+    def select_target_by_distance_field(self, agent_pos: GridPos, uncleaned_dirt: List[GridPos]) -> Optional[GridPos]:
+        """Select the dirt particle with the shortest path from the agent.
+        
+        The Breadth-First sweep stops at the first dirt it reaches and is kept, so that
+        plan_to_target can take the path from it instead of searching again.
+        
+        Args:
+            agent_pos: The position of the agent
+            uncleaned_dirt: The candidate targets
+            
+        Returns:
+            The closest reachable dirt, or None if no dirt is reachable
+        """
+        start_time = time.time()
+        self.target_field = DistanceField(self.world.maze, agent_pos, uncleaned_dirt, target_limit=1)
+        self.target_field_time = (time.time() - start_time) * 1000
+        return self.target_field.nearest_target()
+    
+    def select_target_from_tour(self, agent_pos: GridPos, uncleaned_dirt: List[GridPos]) -> Optional[GridPos]:
+        """Select the next dirt particle of the tour, planning the tour first if needed.
+        
+        The paths along the tour come from the distance fields of the dirt, which are
+        kept in the path cache while the tour is planned if the cache can hold them all.
+        
+        Args:
+            agent_pos: The position of the agent
+            uncleaned_dirt: The dirt particles left to clean
+            
+        Returns:
+            The next reachable dirt of the tour, or None if no dirt is reachable
+        """
+        self.tour = [dirt for dirt in self.tour
+                     if self.world.get_dirt_at_position(dirt) is not None and dirt not in self.unreachable_targets]
+        if not self.tour:
+            start_time = time.time()
+            self.tour = plan_dirt_tour(self.world.maze, agent_pos, uncleaned_dirt, self.path_cache)
+            elapsed_time = (time.time() - start_time) * 1000
+            self.log(f"planned a tour through {len(self.tour)} dirt particles in {elapsed_time:.1f} msec")
+            if not self.tour:
+                return None
+        
+        return self.tour.pop(0)
+    
     def step_to_target(self, path: List[SearchNode], world: World) -> Action:
         """Make one step towards the target following the path.
         
@@ -155,7 +352,7 @@ class IntelligentVacuumAgent:
             The action to take
         """
         if not path:
-            agent_print("NO PATH FOUND!")
+            self.log("NO PATH FOUND!")
             return Action.NO_OPERATION
         
         if self.current_path_index >= len(path):
@@ -203,29 +400,162 @@ class IntelligentVacuumAgent:
         if start is None or goal is None:
             return []
         
-        agent_print(f"planning from {start} to {goal}")
+        self.log(f"planning from {start} to {goal}")
+        self.search_gave_up = False
         
-        search_result = self.search_plan(world, start, goal, self.search_method, True)
+        # Drop what was cached for the maze before its walls changed
+        fingerprint = world.maze.get_fingerprint()
+        if self.maze_fingerprint is not None and self.maze_fingerprint != fingerprint:
+            self.path_cache.invalidate(self.maze_fingerprint)
+        self.maze_fingerprint = fingerprint
+        
+        field = self.target_field
+        if (self.target_selection == TargetSelection.DISTANCE_FIELD and
+                field is not None and field.source == start and field.distance_to(goal) is not None):
+            return self.plan_from_distance_field(field.path_to(goal), field.num_expanded_nodes,
+                                                 self.target_field_time, field, world)
+        
+        if self.target_selection == TargetSelection.TOUR:
+            # The field of the target is cached if the tour fitted in the cache, otherwise a
+            # sweep from the target that stops at the agent gives the path
+            start_time = time.time()
+            if self.path_cache.has_distance_field(world.maze, goal):
+                field = self.path_cache.get_distance_field(world.maze, goal)
+                num_expanded = 0
+            else:
+                field = DistanceField(world.maze, goal, [start])
+                num_expanded = field.num_expanded_nodes
+            elapsed_time = (time.time() - start_time) * 1000
+            return self.plan_from_distance_field(field.path_from(start), num_expanded, elapsed_time, field, world)
+        
+        method_key = (self.search_method.value, self.heuristic.value, self.heuristic_weight)
+        start_time = time.time()
+        path = self.path_cache.get_path(world.maze, start, goal, method_key)
+        if path is not None:
+            elapsed_time = (time.time() - start_time) * 1000
+            self.record_plan(elapsed_time, len(path), 0, cached=True)
+            world.mark_current_path([node.get_state() for node in path])
+            if world.is_observed(WorldEvent.EXPANDED_CHANGED):
+                world.mark_expanded_cells(())
+            return path
+        
+        search_result = self.search_plan(world, start, goal, self.search_method, self.verbose)
         
         if search_result:
             path = search_result.get_path()
+            self.search_gave_up = search_result.budget_spent
+            if isinstance(search_result, DStarLiteSearch):
+                self.replanner = search_result
+            
+            # Random search gives a different path each time, there is no point in caching it;
+            # neither in caching a failure, which may come from a search limit
+            if path and self.search_method != SearchMethod.RANDOM_SEARCH:
+                self.path_cache.put_path(world.maze, start, goal, method_key, path)
             
             # Update path graphics in world
             if path:
                 path_positions = [node.get_state() for node in path]
                 world.mark_current_path(path_positions)
             
-            # Update explored state graphics in world
-            expanded_positions = [node.get_state() for node in search_result.get_all_expanded_nodes()]
-            world.mark_expanded_nodes(expanded_positions)
+            # Update explored state graphics in world, if anything shows them
+            if world.is_observed(WorldEvent.EXPANDED_CHANGED):
+                world.mark_expanded_cells(search_result.get_expanded_cells())
             
             return path
         
         return []
     
+    def plan_from_distance_field(self,
+                                 path: List[SearchNode],
+                                 num_expanded: int,
+                                 elapsed_time: float,
+                                 field: DistanceField,
+                                 world: World) -> List[SearchNode]:
+        """Use a path taken from a distance field as the plan.
+        
+        Args:
+            path: The path from the agent to the target
+            num_expanded: The nodes expanded to get the field (0 if it was cached)
+            elapsed_time: The time spent on getting the field, in msec
+            field: The distance field the path was taken from
+            world: The world to plan in
+            
+        Returns:
+            The path
+        """
+        self.record_plan(elapsed_time, len(path), num_expanded)
+        
+        world.mark_current_path([node.get_state() for node in path])
+        if world.is_observed(WorldEvent.EXPANDED_CHANGED):
+            world.mark_expanded_cells(field.get_reached_cells())
+        return path
+    
     def reset_plan(self):
         self.current_path = []
         self.current_path_index = 0
+        self.replanner = None
+    
+    def on_walls_changed(self, cells: List[int]):
+        """Collect the cells changed by a maze edit, to adapt the plan at the next step."""
+        self.changed_cells.extend(cells)
+        self.unreachable_targets.clear()
+    
+    def repair_plan(self):
+        """Adapt the plan to the walls that changed since the last step.
+        
+        The target is dropped if it cannot be reached anymore, so that another one gets
+        selected. A D* Lite plan is repaired: the search moves its start to the agent and
+        only redoes the work around the changed cells; a plan taken from the path cache or
+        a distance field has no D* Lite search to repair yet, so one is run from the agent.
+        Other plans are dropped if a new wall blocks the rest of the path, and planned again
+        from scratch.
+        """
+        changed, self.changed_cells = self.changed_cells, []
+        if self.target is None or not self.world.agent:
+            return
+        
+        maze = self.world.maze
+        agent_pos = GridPos(self.world.agent.x, self.world.agent.y)
+        if not maze.are_connected(agent_pos, self.target):
+            self.log(f"{self.target} cannot be reached anymore")
+            self.target = None
+            self.reset_plan()
+            return
+        
+        if not self.current_path:
+            return
+        
+        if self.replanner is None and self.search_method == SearchMethod.D_STAR_LITE:
+            self.log(f"setting up D* Lite from {agent_pos} to {self.target} to repair the plan")
+            search_result = self.search_plan(self.world, agent_pos, self.target, self.search_method, self.verbose)
+            path = search_result.get_path() if search_result else []
+            if not path:
+                self.reset_plan()
+                return
+            self.replanner = search_result
+        elif self.replanner is not None:
+            self.log(f"repairing the D* Lite plan from {agent_pos} to {self.target}")
+            start_time = time.time()
+            num_expanded = self.replanner.num_expanded_nodes
+            self.replanner.update_start(agent_pos)
+            self.replanner.update_cells(changed)
+            path = self.replanner.replan()
+            elapsed_time = (time.time() - start_time) * 1000
+            self.record_plan(elapsed_time, len(path), self.replanner.num_expanded_nodes - num_expanded)
+        
+        if self.replanner is not None:
+            # The repaired path starts at the agent, so the next step is its second node
+            self.current_path = path
+            self.current_path_index = 1
+            self.world.mark_current_path([node.get_state() for node in path])
+            if self.world.is_observed(WorldEvent.EXPANDED_CHANGED):
+                self.world.mark_expanded_cells(self.replanner.get_expanded_cells())
+            return
+        
+        remaining = self.current_path[self.current_path_index:]
+        if any(maze.is_wall(node.get_state()) for node in remaining):
+            self.log("a new wall blocks the path, planning again")
+            self.reset_plan()
     
     def search_plan(self, 
                    world: World, 
@@ -245,38 +575,81 @@ class IntelligentVacuumAgent:
         Returns:
             The search object with results, or None if failed
         """
-        start_time = time.time()
-        problem = SearchProblem(world, start, goal)
+        problem = SearchProblem(world, start, goal, use_cell_ids=self.use_cell_ids, heuristic=self.heuristic)
         
+        if not problem.is_goal_reachable():
+            if print_result:
+                self.log(f"{goal} cannot be reached from {start}, skipping the search")
+            return None
         
         if method == SearchMethod.RANDOM_SEARCH:
             if print_result:
-                agent_print("starting Random Search")
+                self.log("starting Random Search")
             search_run = RandomSearch()
         elif method == SearchMethod.BREADTH_FIRST_SEARCH:
             if print_result:
-                agent_print("starting Breadth First Search Method (BFS)")
+                self.log("starting Breadth First Search Method (BFS)")
             search_run = BreadthFirstSearch()
+        elif method == SearchMethod.ARRAY_BREADTH_FIRST_SEARCH:
+            if print_result:
+                self.log("starting array-based Breadth First Search Method (BFS)")
+            search_run = ArrayBreadthFirstSearch()
         elif method == SearchMethod.DEPTH_FIRST_SEARCH:
             if print_result:
-                agent_print("starting Depth First Search Method (DFS)")
+                self.log("starting Depth First Search Method (DFS)")
             search_run = DepthFirstSearch()
         elif method == SearchMethod.A_STAR_SEARCH:
             if print_result:
-                agent_print("starting A*")
+                self.log("starting A*")
             search_run = AStarSearch()
+        elif method == SearchMethod.ARRAY_A_STAR_SEARCH:
+            if print_result:
+                self.log("starting array-based A*")
+            search_run = ArrayAStarSearch()
+        elif method == SearchMethod.JUMP_POINT_SEARCH:
+            if print_result:
+                self.log("starting Jump Point Search (JPS)")
+            search_run = JumpPointSearch()
+        elif method == SearchMethod.BIDIRECTIONAL_BREADTH_FIRST_SEARCH:
+            if print_result:
+                self.log("starting bidirectional Breadth First Search Method (BFS)")
+            search_run = BidirectionalBreadthFirstSearch()
+        elif method == SearchMethod.BIDIRECTIONAL_A_STAR_SEARCH:
+            if print_result:
+                self.log("starting bidirectional A*")
+            search_run = BidirectionalAStarSearch()
+        elif method == SearchMethod.D_STAR_LITE:
+            if print_result:
+                self.log("starting D* Lite")
+            search_run = DStarLiteSearch()
+        elif method == SearchMethod.ITERATIVE_DEEPENING_A_STAR_SEARCH:
+            if print_result:
+                self.log("starting Iterative Deepening A* (IDA*)")
+            search_run = IterativeDeepeningAStarSearch()
+        elif method == SearchMethod.FRINGE_SEARCH:
+            if print_result:
+                self.log("starting Fringe Search")
+            search_run = FringeSearch()
+        elif method == SearchMethod.ITERATIVE_DEEPENING_DEPTH_FIRST_SEARCH:
+            if print_result:
+                self.log("starting Iterative Deepening Depth First Search (IDDFS)")
+            search_run = IterativeDeepeningDepthFirstSearch()
+        elif method == SearchMethod.UNIFORM_COST_SEARCH:
+            if print_result:
+                self.log("starting bucket queue Uniform Cost Search (UCS)")
+            search_run = BucketUniformCostSearch()
+        elif method == SearchMethod.WEIGHTED_A_STAR_SEARCH:
+            if print_result:
+                self.log(f"starting weighted A* (weight {self.heuristic_weight})")
+            search_run = WeightedAStarSearch(self.heuristic_weight)
         else:
-            agent_print(f"Unknown search method: {method}")
+            self.log(f"Unknown search method: {method}")
             return None
         
+        search_run.max_depth = self.max_depth * self.budget_factor
         problem.reset_expanded_count()
-        path = search_run.search(problem)
-        
-        end_time = time.time()
-        elapsed_time = (end_time - start_time) * 1000
+        path, stats = search_run.search_with_stats(problem)
         
-        if print_result:
-            print(f"\tNeeded {elapsed_time:.1f} msec, PathLength: {len(path)}, "
-                  f"NumExpNodes: {problem.get_num_expanded_nodes()}")
+        self.record_plan(stats.get_time_ms(), len(path), stats.generated_nodes, print_result=print_result)
         
         return search_run
@@ -0,0 +1,265 @@
+"""
+Headless batch simulator, running grids of seeded worlds on all cores.
+
+Every combination of maze type, size, dirt count, search method and target selection is
+run for every seed in the given range. Each run (an episode) gives one episode record and
+one plan record per path the agent planned; both can be written as CSV or JSONL, and the
+episodes are summarized per combination.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from rich import print
+from rich.table import Table
+from .world.world import World
+from .world.maze import MazeType
+from .agent.vacuum_agent import IntelligentVacuumAgent, SearchMethod, TargetSelection
+from .agent.path_cache import PathCache
+from .search.problem import Heuristic
+
+
+# The fields that identify the configuration of an episode, shared by all of its records
+CONFIG_FIELDS = ['maze', 'size', 'dirt', 'search', 'targets', 'heuristic', 'cell_ids', 'seed']
+
+# The configuration fields that are aggregated over by the summary
+SUMMARY_FIELDS = ['maze', 'size', 'dirt', 'search', 'targets', 'heuristic', 'cell_ids']
+
+
+def make_configs(maze_types: Iterable[MazeType],
+                 sizes: Iterable[int],
+                 dirt_counts: Iterable[int],
+                 methods: Iterable[SearchMethod],
+                 seeds: Iterable[int],
+                 target_selections: Iterable[TargetSelection] = (TargetSelection.EUCLIDEAN,),
+                 heuristic: Heuristic = Heuristic.MANHATTAN,
+                 use_cell_ids: bool = False,
+                 max_steps: int = 10000) -> List[dict]:
+    """Build the configurations of all combinations of the given values.
+
+    Returns:
+        One configuration dict per episode, with the values of CONFIG_FIELDS and max_steps
+    """
+    return [{
+        'maze': maze_type.value,
+        'size': size,
+        'dirt': dirt,
+        'search': method.value,
+        'targets': selection.value,
+        'heuristic': heuristic.value,
+        'cell_ids': use_cell_ids,
+        'seed': seed,
+        'max_steps': max_steps,
+    } for maze_type, size, dirt, method, selection, seed in itertools.product(
+        maze_types, sizes, dirt_counts, methods, target_selections, seeds)]
+
+
+def run_episode(config: dict) -> Tuple[dict, List[dict]]:
+    """Let an agent clean one world, without printing anything.
+
+    The agent gets a path cache of its own, so that the results do not depend on which
+    episodes ran before in the same process.
+
+    Args:
+        config: The configuration of the episode, as built by make_configs
+
+    Returns:
+        The episode record and the plan records, all starting with the configuration fields
+    """
+    start_time = time.perf_counter()
+    world = World(width=config['size'],
+                  height=config['size'],
+                  num_dirt=config['dirt'],
+                  maze_type=MazeType(config['maze']),
+                  seed=config['seed'])
+    world_time = (time.perf_counter() - start_time) * 1000
+
+    agent = IntelligentVacuumAgent(world, path_cache=PathCache())
+    agent.set_verbose(False)
+    agent.set_search_method(SearchMethod(config['search']))
+    agent.set_target_selection(TargetSelection(config['targets']))
+    agent.set_heuristic(Heuristic(config['heuristic']))
+    agent.set_use_cell_ids(config['cell_ids'])
+
+    steps = 0
+    while not world.is_terminated() and steps < config['max_steps']:
+        agent.step(world)
+        steps += 1
+    episode_time = (time.perf_counter() - start_time) * 1000
+
+    key = {field: config[field] for field in CONFIG_FIELDS}
+    plans = [dict(key, plan=index, **record) for index, record in enumerate(agent.plan_records)]
+    episode = dict(key,
+                   success=world.is_terminated(),
+                   steps=steps,
+                   dirt_collected=world.agent.get_dirt_collected() if world.agent else 0,
+                   remaining_dirt=world.get_num_uncleaned_dirt(),
+                   plans=len(plans),
+                   planning_ms=sum(plan['planning_ms'] for plan in plans),
+                   expanded_nodes=sum(plan['expanded_nodes'] for plan in plans),
+                   path_length=sum(plan['path_length'] for plan in plans),
+                   world_ms=world_time,
+                   episode_ms=episode_time)
+    return episode, plans
+
+
+def run_batch(configs: Sequence[dict], workers: Optional[int] = None) -> Tuple[List[dict], List[dict]]:
+    """Run the episodes of all configurations, in parallel on a process pool.
+
+    Args:
+        configs: The configurations of the episodes
+        workers: Number of worker processes, all cores by default; 1 runs in this process
+
+    Returns:
+        The episode records and the plan records, in the order of the configurations
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(configs) <= 1:
+        results = [run_episode(config) for config in configs]
+    else:
+        # Hand out several episodes at a time, so that small worlds are not dominated by IPC
+        chunksize = max(1, len(configs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_episode, configs, chunksize=chunksize))
+
+    episodes = [episode for episode, _ in results]
+    plans = [plan for _, episode_plans in results for plan in episode_plans]
+    return episodes, plans
+
+
+def write_records(path: str, records: List[dict]):
+    """Write records to a CSV file, or to a JSON Lines file if the path ends with .jsonl."""
+    with open(path, 'w', newline='') as file:
+        if path.endswith('.jsonl'):
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+        else:
+            fields = list(records[0]) if records else CONFIG_FIELDS
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(records)
+
+
+def summarize(episodes: List[dict]) -> List[dict]:
+    """Aggregate the episodes of every configuration over its seeds.
+
+    Returns:
+        One dict per configuration with the number of episodes, the success rate, the mean
+        and median planning time, and the means of the steps, expanded nodes and path lengths
+    """
+    groups: Dict[tuple, List[dict]] = {}
+    for episode in episodes:
+        groups.setdefault(tuple(episode[field] for field in SUMMARY_FIELDS), []).append(episode)
+
+    summary = []
+    for key, group in groups.items():
+        count = len(group)
+        planning = sorted(episode['planning_ms'] for episode in group)
+        summary.append(dict(zip(SUMMARY_FIELDS, key),
+                            episodes=count,
+                            success_rate=sum(episode['success'] for episode in group) / count,
+                            mean_steps=sum(episode['steps'] for episode in group) / count,
+                            mean_planning_ms=sum(planning) / count,
+                            median_planning_ms=planning[count // 2],
+                            mean_expanded_nodes=sum(episode['expanded_nodes'] for episode in group) / count,
+                            mean_path_length=sum(episode['path_length'] for episode in group) / count))
+    return summary
+
+
+def print_summary(summary: List[dict]):
+    """Print the summary as a table, one row per configuration.
+
+    Configuration fields with the same value in all rows are given in the title instead.
+    """
+    varying = [field for field in SUMMARY_FIELDS if len({row[field] for row in summary}) > 1]
+    fixed = [f"{field}={summary[0][field]}" for field in SUMMARY_FIELDS if field not in varying and summary]
+    table = Table(title=f"Batch summary ({', '.join(fixed)})" if fixed else "Batch summary")
+    for field in varying:
+        table.add_column(field)
+    for column in ['episodes', 'success', 'steps', 'planning ms', 'median ms', 'expanded', 'path length']:
+        table.add_column(column, justify='right')
+
+    for row in summary:
+        table.add_row(*(str(row[field]) for field in varying),
+                      str(row['episodes']),
+                      f"{row['success_rate']:.0%}",
+                      f"{row['mean_steps']:.1f}",
+                      f"{row['mean_planning_ms']:.1f}",
+                      f"{row['median_planning_ms']:.1f}",
+                      f"{row['mean_expanded_nodes']:.0f}",
+                      f"{row['mean_path_length']:.1f}")
+    print(table)
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Vacuum World - headless batch simulator")
+
+    parser.add_argument('--maze', nargs='+', choices=[m.value for m in MazeType],
+                        default=[MazeType.MAZE_LABYRINTH.value], help='Maze types to run (default: labyrinth)')
+    parser.add_argument('--size', nargs='+', type=int, default=[20],
+                        help='Sizes of the mazes (default: 20)')
+    parser.add_argument('--dirt', nargs='+', type=int, default=[10],
+                        help='Numbers of dirt particles (default: 10)')
+    parser.add_argument('--search', nargs='+', choices=[s.value for s in SearchMethod],
+                        default=[SearchMethod.ARRAY_A_STAR_SEARCH.value],
+                        help='Search methods to run (default: astar-array)')
+    parser.add_argument('--targets', nargs='+', choices=[t.value for t in TargetSelection],
+                        default=[TargetSelection.EUCLIDEAN.value],
+                        help='Target selections to run (default: euclidean)')
+    parser.add_argument('--heuristic', choices=[h.value for h in Heuristic],
+                        default=Heuristic.MANHATTAN.value,
+                        help='Heuristic used by the A* searches (default: manhattan)')
+    parser.add_argument('--cell-ids', action='store_true',
+                        help='Search on integer cell ids instead of GridPos states')
+    parser.add_argument('--seeds', type=int, default=10,
+                        help='Number of seeded worlds per combination (default: 10)')
+    parser.add_argument('--first-seed', type=int, default=0,
+                        help='First seed of the range (default: 0)')
+    parser.add_argument('--max-steps', type=int, default=10000,
+                        help='Steps after which an episode is stopped (default: 10000)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of cores)')
+    parser.add_argument('--episodes-out', default=None,
+                        help='File for the episode records, .csv or .jsonl')
+    parser.add_argument('--plans-out', default=None,
+                        help='File for the plan records, .csv or .jsonl')
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    args = parse_arguments(argv)
+
+    configs = make_configs(maze_types=[MazeType(m) for m in args.maze],
+                           sizes=args.size,
+                           dirt_counts=args.dirt,
+                           methods=[SearchMethod(s) for s in args.search],
+                           seeds=range(args.first_seed, args.first_seed + args.seeds),
+                           target_selections=[TargetSelection(t) for t in args.targets],
+                           heuristic=Heuristic(args.heuristic),
+                           use_cell_ids=args.cell_ids,
+                           max_steps=args.max_steps)
+
+    print(f"[bold]Running [/bold][white]{len(configs)} episodes")
+    start_time = time.perf_counter()
+    episodes, plans = run_batch(configs, args.workers)
+    elapsed_time = time.perf_counter() - start_time
+    print(f"[bold]Finished [/bold][white]{len(episodes)} episodes and {len(plans)} plans "
+          f"in {elapsed_time:.1f} s")
+
+    if args.episodes_out:
+        write_records(args.episodes_out, episodes)
+    if args.plans_out:
+        write_records(args.plans_out, plans)
+
+    print_summary(summarize(episodes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Benchmark suite of the search algorithms, with regression gates against a stored baseline.
+
+Every search runs on a fixed corpus of problems: in seeded worlds of every maze type and
+several sizes, the paths from the agent to each dirt particle. Per search, maze type and
+size the suite measures the search time, the expanded nodes, the peak frontier size, the
+peak memory allocated during a search, and how much longer the paths are than the shortest
+ones.
+
+The results are compared with a baseline file committed with the code, and any metric that
+got worse by more than its tolerance is reported as a regression. Only the metrics that do
+not depend on the machine are gated by default; times are gated with --gate-time, against
+a baseline recorded (--update) on the same machine.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Tuple
+from rich import print
+from rich.table import Table
+from .world.world import World
+from .world.grid_pos import GridPos
+from .world.maze import MazeType
+from .search.problem import SearchProblem
+from .search.base_search import BaseSearch
+from .search.breadth_first_search import BreadthFirstSearch
+from .search.array_breadth_first_search import ArrayBreadthFirstSearch
+from .search.depth_first_search import DepthFirstSearch
+from .search.a_star_search import AStarSearch
+from .search.array_a_star_search import ArrayAStarSearch
+from .search.jump_point_search import JumpPointSearch
+from .search.bidirectional_search import BidirectionalBreadthFirstSearch, BidirectionalAStarSearch
+from .search.d_star_lite import DStarLiteSearch
+from .search.iterative_deepening import IterativeDeepeningAStarSearch, IterativeDeepeningDepthFirstSearch
+from .search.fringe_search import FringeSearch
+from .search.uniform_cost_search import BucketUniformCostSearch
+from .search.weighted_a_star_search import WeightedAStarSearch
+from .search.distance_field import DistanceField
+
+
+# The benchmarked searches, by the name used on the command line of the lab
+SEARCHES = {
+    'bfs': BreadthFirstSearch,
+    'bfs-array': ArrayBreadthFirstSearch,
+    'dfs': DepthFirstSearch,
+    'astar': AStarSearch,
+    'astar-array': ArrayAStarSearch,
+    'jps': JumpPointSearch,
+    'bibfs': BidirectionalBreadthFirstSearch,
+    'biastar': BidirectionalAStarSearch,
+    'dstar': DStarLiteSearch,
+    'ida': IterativeDeepeningAStarSearch,
+    'fringe': FringeSearch,
+    'iddfs': IterativeDeepeningDepthFirstSearch,
+    'ucs': BucketUniformCostSearch,
+    'wastar': WeightedAStarSearch,
+}
+
+CORPUS_SIZES = (15, 21, 45)
+CORPUS_SEEDS = range(4)
+CORPUS_DIRT = 3
+
+# Largest corpus mazes for searches that blow up beyond them: the frontiers of these
+# searches hold duplicate states, and the iterative deepening searches expand cells again
+# in every iteration, up to millions of times on the larger mazes
+MAX_SIZES = {
+    'bfs': 15,
+    'astar': 21,
+    'ida': 21,
+    'iddfs': 21,
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'benchmarks', 'search_baseline.json')
+
+# Relative increases beyond which a metric counts as regressed, and the absolute increases
+# below which it never does (to ignore noise on tiny values). These metrics are the same on
+# every machine, for a given Python version.
+DEFAULT_TOLERANCES = {
+    'expanded_nodes': (0.02, 0),
+    'peak_frontier': (0.02, 0),
+    'peak_kib': (0.25, 16.0),
+    'path_excess': (0.0, 0),
+    'failures': (0.0, 0),
+}
+
+# The tolerance of the search times, only gated on request
+TIME_TOLERANCE = (0.5, 2.0)
+
+# A benchmark problem: its group key, the world, start, goal and shortest path length
+Problem = Tuple[str, World, GridPos, GridPos, int]
+
+
+def make_corpus(sizes: Sequence[int] = CORPUS_SIZES,
+                seeds: Sequence[int] = CORPUS_SEEDS,
+                num_dirt: int = CORPUS_DIRT) -> List[Problem]:
+    """Build the problems of the corpus: paths from the agent to every dirt of seeded worlds.
+
+    Returns:
+        The problems, grouped by the key "<maze type>/<size>"
+    """
+    corpus = []
+    for maze_type in MazeType:
+        for size in sizes:
+            for seed in seeds:
+                world = World(width=size, height=size, num_dirt=num_dirt, maze_type=maze_type, seed=seed)
+                start = GridPos(world.agent.x, world.agent.y)
+                goals = sorted(world.iter_uncleaned_dirt(), key=lambda dirt: (dirt.x, dirt.y))
+                field = DistanceField(world.maze, start, goals)
+                for goal in goals:
+                    goal = GridPos(goal.x, goal.y)
+                    corpus.append((f"{maze_type.value}/{size}", world, start, goal, field.distance_to(goal)))
+    return corpus
+
+
+def run_search(search_class, world: World, start: GridPos, goal: GridPos) -> Tuple[float, int, int]:
+    """Run a search once on a fresh problem.
+
+    Returns:
+        The search time in msec, the number of expanded nodes and the length of the path
+        in moves (-1 if no path was found)
+    """
+    problem = SearchProblem(world, start, goal)
+    search: BaseSearch = search_class()
+    path, stats = search.search_with_stats(problem)
+    return stats.get_time_ms(), stats.generated_nodes, len(path) - 1 if path else -1
+
+
+def measure_peak_frontier(search_class, world: World, start: GridPos, goal: GridPos) -> int:
+    """Get the largest number of frontier entries during a traced search."""
+    problem = SearchProblem(world, start, goal)
+    search: BaseSearch = search_class()
+    _, stats = search.search_with_stats(problem, trace=True)
+    return stats.peak_frontier_size
+
+
+def measure_peak_memory(search_class, world: World, start: GridPos, goal: GridPos) -> float:
+    """Get the peak memory allocated while searching, in KiB."""
+    problem = SearchProblem(world, start, goal)
+    search: BaseSearch = search_class()
+    tracemalloc.start()
+    try:
+        search.search(problem)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def benchmark(search_names: Sequence[str], corpus: List[Problem], repeat: int = 3) -> Dict[str, dict]:
+    """Measure the searches on the corpus.
+
+    Times are the best of ``repeat`` runs per problem, summed per group; the peak frontier
+    and memory are measured in separate runs, as tracing slows the search down. Searches skip the mazes
+    larger than their MAX_SIZES entry, and anything they print is discarded.
+
+    Returns:
+        The metrics per "<search>/<maze type>/<size>" key
+    """
+    results = {}
+    for name in search_names:
+        search_class = SEARCHES[name]
+        for group, world, start, goal, shortest in corpus:
+            if world.width > MAX_SIZES.get(name, world.width):
+                continue
+            times = []
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                for _ in range(repeat):
+                    elapsed_time, expanded, length = run_search(search_class, world, start, goal)
+                    times.append(elapsed_time)
+                peak_frontier = measure_peak_frontier(search_class, world, start, goal)
+                peak_kib = measure_peak_memory(search_class, world, start, goal)
+
+            metrics = results.setdefault(f"{name}/{group}", {
+                'problems': 0, 'time_ms': 0.0, 'expanded_nodes': 0, 'peak_frontier': 0, 'peak_kib': 0.0,
+                'path_excess': 0, 'failures': 0,
+            })
+            metrics['problems'] += 1
+            metrics['time_ms'] += min(times)
+            metrics['expanded_nodes'] += expanded
+            metrics['peak_frontier'] = max(metrics['peak_frontier'], peak_frontier)
+            metrics['peak_kib'] = max(metrics['peak_kib'], peak_kib)
+            if length < 0:
+                metrics['failures'] += 1
+            else:
+                metrics['path_excess'] += length - shortest
+
+    for metrics in results.values():
+        metrics['time_ms'] = round(metrics['time_ms'], 3)
+        metrics['peak_kib'] = round(metrics['peak_kib'], 1)
+    return results
+
+
+def compare(results: Dict[str, dict],
+            baseline: Dict[str, dict],
+            tolerances: Dict[str, Tuple[float, float]] = DEFAULT_TOLERANCES) -> List[dict]:
+    """Find the metrics that got worse than in the baseline by more than their tolerance.
+
+    Args:
+        results: The current metrics per key
+        baseline: The baseline metrics per key; keys and metrics missing from it are not compared
+        tolerances: Per gated metric, the allowed relative and absolute increase
+
+    Returns:
+        One dict per regression with the key, metric, baseline and current value
+    """
+    regressions = []
+    for key, metrics in results.items():
+        if key not in baseline:
+            continue
+        for metric, (relative, absolute) in tolerances.items():
+            if metric not in baseline[key]:
+                continue
+            before, after = baseline[key][metric], metrics[metric]
+            if after > before * (1 + relative) and after - before > absolute:
+                regressions.append({'key': key, 'metric': metric, 'baseline': before, 'current': after})
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def save_baseline(path: str, results: Dict[str, dict]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        'machine': f"{platform.machine()} {platform.processor()}".strip(),
+        'python': platform.python_version(),
+        'corpus': {'sizes': list(CORPUS_SIZES), 'seeds': list(CORPUS_SEEDS), 'dirt': CORPUS_DIRT,
+                   'max_sizes': MAX_SIZES},
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def print_results(results: Dict[str, dict], baseline: Dict[str, dict]):
+    """Print the metrics of every key next to their baseline values."""
+    table = Table(title="Search benchmark")
+    table.add_column("search/maze/size")
+    for column in ['time ms', 'expanded', 'peak frontier', 'peak KiB', 'excess', 'failures']:
+        table.add_column(column, justify='right')
+
+    def cell(key: str, metric: str, text: str) -> str:
+        if metric in baseline.get(key, {}):
+            before = baseline[key][metric]
+            before = f"{before:.1f}" if isinstance(before, float) else str(before)
+            return f"{text} ({before})"
+        return text
+
+    for key, metrics in results.items():
+        table.add_row(key,
+                      cell(key, 'time_ms', f"{metrics['time_ms']:.1f}"),
+                      cell(key, 'expanded_nodes', str(metrics['expanded_nodes'])),
+                      cell(key, 'peak_frontier', str(metrics['peak_frontier'])),
+                      cell(key, 'peak_kib', f"{metrics['peak_kib']:.1f}"),
+                      cell(key, 'path_excess', str(metrics['path_excess'])),
+                      cell(key, 'failures', str(metrics['failures'])))
+    print(table)
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Vacuum World - search benchmark suite")
+
+    parser.add_argument('--search', nargs='+', choices=list(SEARCHES), default=list(SEARCHES),
+                        help='Searches to benchmark (default: all)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per problem, of which the fastest is timed (default: 3)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Baseline file to compare with or to update')
+    parser.add_argument('--update', action='store_true',
+                        help='Record the results as the new baseline instead of comparing')
+    parser.add_argument('--gate-time', action='store_true',
+                        help='Also gate on search times, with a baseline recorded on this machine')
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE[0],
+                        help='Allowed relative increase of the search times with --gate-time (default: 0.5)')
+    parser.add_argument('--expanded-tolerance', type=float, default=DEFAULT_TOLERANCES['expanded_nodes'][0],
+                        help='Allowed relative increase of the expanded nodes and peak frontier (default: 0.02)')
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_TOLERANCES['peak_kib'][0],
+                        help='Allowed relative increase of the peak memory (default: 0.25)')
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    args = parse_arguments(argv)
+
+    corpus = make_corpus()
+    print(f"[bold]Benchmarking [/bold][white]{len(args.search)} searches on {len(corpus)} problems")
+    results = benchmark(args.search, corpus, args.repeat)
+
+    if args.update:
+        # Keep the baseline of the searches that were not run this time
+        baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) else {}
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        print_results(results, {})
+        print(f"[bold]Baseline written to [/bold][white]{args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) else {}
+    print_results(results, baseline)
+
+    tolerances = dict(DEFAULT_TOLERANCES)
+    tolerances['expanded_nodes'] = (args.expanded_tolerance, DEFAULT_TOLERANCES['expanded_nodes'][1])
+    tolerances['peak_frontier'] = (args.expanded_tolerance, DEFAULT_TOLERANCES['peak_frontier'][1])
+    tolerances['peak_kib'] = (args.memory_tolerance, DEFAULT_TOLERANCES['peak_kib'][1])
+    if args.gate_time:
+        tolerances['time_ms'] = (args.time_tolerance, TIME_TOLERANCE[1])
+
+    missing = [key for key in results if key not in baseline]
+    if missing:
+        print(f"[yellow]No baseline for {len(missing)} results, e.g. {missing[0]}; run with --update")
+
+    regressions = compare(results, baseline, tolerances)
+    if regressions:
+        print(f"[bold red]{len(regressions)} regressions:")
+        for regression in regressions:
+            print(f"[red]  {regression['key']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']}")
+        sys.exit(1)
+    print("[bold green]No regressions")
+
+
+if __name__ == "__main__":
+    main()
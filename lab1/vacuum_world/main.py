@@ -6,7 +6,9 @@ import sys
 from rich import print
 from .world.world import World
 from .world.maze import MazeType
-from .agent.vacuum_agent import IntelligentVacuumAgent, SearchMethod
+from .agent.vacuum_agent import IntelligentVacuumAgent, SearchMethod, TargetSelection
+from .agent.fleet import VacuumFleet
+from .search.problem import Heuristic
 from .visualization.pygame_viewer import PygameViewer
 
 
@@ -21,14 +23,44 @@ def parse_arguments():
                        help='Random seed for reproducible worlds')    
     parser.add_argument('--maze', choices=['default', 'simple', 'office', 'caves'],
                        default='default', help='Maze type to use (default: default)')
-    parser.add_argument('--search', choices=['bfs', 'dfs', 'astar', 'random'],
+    parser.add_argument('--search', choices=['bfs', 'bfs-array', 'dfs', 'astar', 'astar-array', 'jps',
+                                             'bibfs', 'biastar', 'dstar', 'ida', 'fringe', 'iddfs', 'ucs', 'wastar',
+                                             'random'],
                        default='bfs', help='Search method to use (default: bfs)')
+    parser.add_argument('--targets', choices=[t.value for t in TargetSelection],
+                       default=TargetSelection.EUCLIDEAN.value,
+                       help='How the next dirt is selected: closest by straight-line distance and then searched, '
+                            'closest by maze distance from a single sweep, or next of a planned tour '
+                            'through all dirt (default: euclidean)')
+    parser.add_argument('--heuristic', choices=[h.value for h in Heuristic],
+                       default=Heuristic.MANHATTAN.value,
+                       help='Heuristic used by the A* searches (default: manhattan)')
+    parser.add_argument('--weight', type=float, default=1.0,
+                       help='Heuristic weight of weighted A*; above 1 trades path cost for speed (default: 1)')
+    parser.add_argument('--terrain', type=int, default=1,
+                       help='Cover the maze with patches of terrain that cost up to this much to cross '
+                            '(default: 1, no terrain)')
+    parser.add_argument('--cell-ids', action='store_true',
+                       help='Search on integer cell ids instead of GridPos states')
+    parser.add_argument('--agents', type=int, default=1,
+                       help='Number of agents; a fleet shares out the dirt and plans collision-free paths, '
+                            'ignoring the search options (default: 1)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes of a fleet, 0 to plan in the main process '
+                            '(default: one per agent up to the number of CPUs)')
+    parser.add_argument('--tile-size', type=int, default=None,
+                       help='Keep the maze in memory-mapped tiles of this many cells square, generated as '
+                            'they are used, for worlds too large for memory, e.g. --size 10000 --tile-size 256; '
+                            'only with the euclidean targets and a single agent (default: in memory)')
     parser.add_argument('--no-gui', action='store_true',
                        help='Run without graphical interface')
     parser.add_argument('--cell-size', type=int, default=25,
                        help='Size of each grid cell in pixels (default: 25)')
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.tile_size is not None and (args.targets != TargetSelection.EUCLIDEAN.value or args.agents > 1):
+        parser.error("tiled mazes need the euclidean targets and a single agent")
+    return args
 
 
 def main():
@@ -47,30 +79,60 @@ def main():
         height=args.size,
         num_dirt=args.dirt,
         maze_type=maze_type,
-        seed=args.seed
+        seed=args.seed,
+        num_agents=args.agents,
+        tile_size=args.tile_size
     )
+    world.maze.generate_terrain(args.terrain, seed=world.seed)
     
     print(f"[bold]Created world: [/bold][white] {args.size}x{args.size}, {args.dirt} dirt particles")
     print(f"[bold]Maze type: [/bold][white] {maze_type.value}")
     print(f"[bold]Random seed: [/bold][white]{world.seed}")
+    if args.tile_size is not None:
+        print(f"[bold]Tiles: [/bold][white] {args.tile_size}x{args.tile_size} cells, memory-mapped")
+    if world.maze.has_terrain():
+        print(f"[bold]Terrain: [/bold][white] move costs up to {world.maze.get_max_move_cost()}")
     
     agent = IntelligentVacuumAgent(world)
     
     search_methods = {
         'bfs': SearchMethod.BREADTH_FIRST_SEARCH,
+        'bfs-array': SearchMethod.ARRAY_BREADTH_FIRST_SEARCH,
         'dfs': SearchMethod.DEPTH_FIRST_SEARCH,
         'astar': SearchMethod.A_STAR_SEARCH,
+        'astar-array': SearchMethod.ARRAY_A_STAR_SEARCH,
+        'jps': SearchMethod.JUMP_POINT_SEARCH,
+        'bibfs': SearchMethod.BIDIRECTIONAL_BREADTH_FIRST_SEARCH,
+        'biastar': SearchMethod.BIDIRECTIONAL_A_STAR_SEARCH,
+        'dstar': SearchMethod.D_STAR_LITE,
+        'ida': SearchMethod.ITERATIVE_DEEPENING_A_STAR_SEARCH,
+        'fringe': SearchMethod.FRINGE_SEARCH,
+        'iddfs': SearchMethod.ITERATIVE_DEEPENING_DEPTH_FIRST_SEARCH,
+        'ucs': SearchMethod.UNIFORM_COST_SEARCH,
+        'wastar': SearchMethod.WEIGHTED_A_STAR_SEARCH,
         'random': SearchMethod.RANDOM_SEARCH
     }
     agent.set_search_method(search_methods[args.search])
+    agent.set_use_cell_ids(args.cell_ids)
+    agent.set_heuristic(Heuristic(args.heuristic))
+    agent.set_heuristic_weight(args.weight)
+    agent.set_target_selection(TargetSelection(args.targets))
     
-    if args.no_gui:
-        run_without_gui(world, agent)
-    else:
-        run_with_gui(world, agent, args.cell_size)
+    if len(world.agents) > 1:
+        print(f"[bold]Fleet: [/bold][white] {len(world.agents)} agents")
+        agent.close()
+        agent = VacuumFleet(world, workers=args.workers)
+    
+    try:
+        if args.no_gui:
+            run_without_gui(world, agent)
+        else:
+            run_with_gui(world, agent, args.cell_size)
+    finally:
+        agent.close()
 
 
-def run_without_gui(world: World, agent: IntelligentVacuumAgent):
+def run_without_gui(world: World, agent):
     print("Running without GUI...")
     print("Initial state:", world.get_state_info())
     
@@ -86,6 +148,10 @@ def run_without_gui(world: World, agent: IntelligentVacuumAgent):
     
     print(f"\nSimulation completed after {step_count} steps")
     print("Final state:", world.get_state_info())
+    if isinstance(agent, IntelligentVacuumAgent):
+        print("Path cache:", agent.path_cache.get_stats())
+    else:
+        print(f"Fleet planning: {agent.planning_ms:.1f} msec for {agent.num_plans} paths")
     
     if world.is_terminated():
         print("SUCCESS: All dirt cleaned!")
@@ -93,20 +159,22 @@ def run_without_gui(world: World, agent: IntelligentVacuumAgent):
         print("FAILED: Simulation stopped witohut the problem being solved")
 
 
-def run_with_gui(world: World, agent: IntelligentVacuumAgent, cell_size: int):
+def run_with_gui(world: World, agent, cell_size: int):
     print("Starting GUI...")
     
     viewer = PygameViewer(world, agent, cell_size=cell_size)
-    world.add_observer(viewer)
     
     print("[bold]Controls:")
     print("[white]  SPACE - Pause/Resume")
     print("[white]  E - Toggle expanded nodes display")
     print("[white]  P - Toggle path display")
     print("[white]  +/- - Adjust simulation speed")
+    print("[white]  X - Fast-forward, END - Skip to the end")
+    print("[white]  ,/. and PAGE UP/DOWN - Scrub through the recorded steps, HOME - First step, L - Back to live")
+    print("[white]  Mouse wheel - Zoom, drag or arrows - Pan, F - Fit to window")
     print("[white]  ESC - Exit")
     print()
-    print("The agent will start moving automatically using the selected search algorithm.")
+    print("The agent will start moving automatically using the selected search algorithm, on its own thread.")
     
     try:
         viewer.run()
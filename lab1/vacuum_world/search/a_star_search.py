@@ -1,5 +1,5 @@
 import heapq
-from typing import List
+from typing import List, Tuple
 from vacuum_world.search.search_node import SearchNode
 from vacuum_world.search.problem import SearchProblem
 from vacuum_world.world.grid_pos import GridPos
@@ -48,11 +48,11 @@ class AStarSearch(BaseSearch):
         g(n): the path cost 
         h(n): the heuristic estimate.
     """    
-    def estimate(self, node: GridPos, goal: GridPos) -> float:
+    def estimate(self, problem: SearchProblem, state) -> float:
         """
-        estimate by manhattan distance
+        estimate with the heuristic of the problem (manhattan distance by default)
         """
-        return abs(node.x - goal.x) + abs(node.y - goal.y)
+        return problem.estimate_cost_to_goal(state)
         
 
     def __init__(self):
@@ -74,6 +74,7 @@ class AStarSearch(BaseSearch):
         """
         Perform a Breadth-First search to find a path to goal.
         """
+        self.problem = problem
         self.path = []
         self.visited = set()
         self.explored = []
@@ -81,7 +82,7 @@ class AStarSearch(BaseSearch):
         
         initial_state = problem.get_initial_state()
         current_node = SearchNode(initial_state, None, None, 0.0)
-        self.frontier.push(AStarNode(node=current_node, estimate=self.estimate(initial_state, problem.goal_state)))
+        self.frontier.push(AStarNode(node=current_node, estimate=self.estimate(problem, initial_state)))
         
         steps = 0
         
@@ -99,7 +100,7 @@ class AStarSearch(BaseSearch):
             
             # Check if we've reached the goal
             if problem.is_goal_state(current_state):
-                self.path = current_node.get_path_from_root()
+                self.path = problem.decode_path(current_node.get_path_from_root())
                 return self.path
             
             # Get all possible successors
@@ -112,7 +113,7 @@ class AStarSearch(BaseSearch):
             for next_state in successors:
                 if next_state not in self.visited:
                     next_node = SearchNode(next_state, current_node, None, current_node.get_cost() + 1)
-                    self.frontier.push(AStarNode(node=next_node, estimate=self.estimate(next_state, problem.goal_state)))
+                    self.frontier.push(AStarNode(node=next_node, estimate=self.estimate(problem, next_state)))
             
             current_node = next_node
             
@@ -121,11 +122,14 @@ class AStarSearch(BaseSearch):
         return []
     
     
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return len(self.frontier.to_list()), len(self.explored)
+    
     def get_frontier_nodes(self) -> List[SearchNode]:
-        return self.frontier.to_list()
+        return self._decode_nodes([pnode.get_search_node() for pnode in self.frontier.to_list()])
     
     def get_explored_nodes(self) -> List[SearchNode]:
-        return self.explored
+        return self._decode_nodes(self.explored)
     
     def get_all_expanded_nodes(self) -> List[SearchNode]:
         return []
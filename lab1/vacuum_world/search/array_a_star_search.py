@@ -0,0 +1,117 @@
+"""
+A* search on cell ids with a g-score table, a closed set and a lazily cleaned binary heap.
+"""
+import heapq
+from array import array
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+class ArrayAStarSearch(BaseSearch):
+    """
+    A* search that keeps the best known path cost g(n) of every cell in a flat array.
+
+    The frontier is a binary heap of (f, h, insertion counter, cell) tuples, which heapq compares
+    natively. Ties on f are broken towards the smaller h (nodes closer to the goal), then by
+    insertion order, so searches are deterministic. A cell is only pushed again when a cheaper
+    path to it is found; the outdated heap entries are skipped when they are popped (lazy
+    deletion). The heuristic is the one chosen by the problem and must be consistent, so that
+    closed cells never need to be reopened.
+
+    Every move costs 1 and f(n) = g(n) + h(n); subclasses change this through the weight of
+    the heuristic and _get_step_costs (see WeightedAStarSearch).
+    """
+
+    def __init__(self):
+        super().__init__()
+        # The factor applied to the heuristic in f
+        self.weight = 1.0
+        self.frontier = []
+
+        # g[cell] is -1 until the cell is reached, parent[cell] is -1 for the start cell
+        self.g = array('i')
+        self.parent = array('i')
+        self.closed = bytearray()
+
+        # cells in the order they were expanded
+        self.explored = array('i')
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform an A* search to find a path to goal.
+        """
+        self.problem = problem
+        self.path = []
+
+        num_cells = problem.maze.width * problem.maze.height
+        g = array('i', [-1]) * num_cells
+        parent = array('i', [-1]) * num_cells
+        closed = bytearray(num_cells)
+        explored = array('i')
+        frontier = []
+        self.g, self.parent, self.closed, self.explored, self.frontier = g, parent, closed, explored, frontier
+
+        start = problem.initial_cell
+        goal = problem.goal_cell
+        weight = self.weight
+        estimate = problem.get_cell_heuristic()
+        costs = self._get_step_costs(problem)
+        get_successor_cells = problem.get_successor_cells
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        g[start] = 0
+        h = estimate(start)
+        counter = 0
+        frontier.append((weight * h, h, counter, start))
+
+        while frontier and len(explored) < self.max_depth:
+            _, _, _, cell = heappop(frontier)
+            if closed[cell]:
+                # Outdated entry, the cell was already expanded with a lower cost
+                continue
+            closed[cell] = 1
+            explored.append(cell)
+
+            if cell == goal:
+                self.path = self._path_from_parents(self.parent, self.g, goal)
+                return self.path
+
+            cost = g[cell]
+            for next_cell in get_successor_cells(cell):
+                if closed[next_cell]:
+                    continue
+                next_g = cost + (costs[next_cell] if costs is not None else 1)
+                old_g = g[next_cell]
+                if old_g < 0 or next_g < old_g:
+                    g[next_cell] = next_g
+                    parent[next_cell] = cell
+                    h = estimate(next_cell)
+                    counter += 1
+                    heappush(frontier, (next_g + weight * h, h, counter, next_cell))
+
+        return []
+
+    def _get_step_costs(self, problem: SearchProblem) -> Optional[Sequence[int]]:
+        """Get the cost of moving into every cell indexed by cell id, or None when every move costs 1."""
+        return None
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        closed = self.closed
+        return chain(self.explored, (cell for _, _, _, cell in self.frontier if not closed[cell]))
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        closed = self.closed
+        cells = {cell for _, _, _, cell in self.frontier if not closed[cell]}
+        return self._make_nodes(sorted(cells), self.g)
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.explored, self.g)
@@ -0,0 +1,96 @@
+"""
+Breadth-First search on preallocated integer arrays.
+"""
+from array import array
+from typing import Iterable, List, Tuple
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+class ArrayBreadthFirstSearch(BaseSearch):
+    """
+    Breadth-First search that keeps its whole state in flat integer arrays indexed by cell id.
+
+    Cells are marked as visited when they are enqueued, so every cell enters the queue at most
+    once: the explored cells are queue[:head] and the frontier is queue[head:tail]. SearchNode
+    objects are only built for the returned path, or when the visualization asks for the
+    frontier and explored nodes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.queue = array('i')
+        self.head = 0
+        self.tail = 0
+
+        # distance[cell] is -1 until the cell is enqueued, parent[cell] is -1 for the start cell
+        self.distance = array('i')
+        self.parent = array('i')
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform a Breadth-First search to find a path to goal.
+        """
+        self.problem = problem
+        self.path = []
+
+        num_cells = problem.maze.width * problem.maze.height
+        queue = array('i', [0]) * num_cells
+        distance = array('i', [-1]) * num_cells
+        parent = array('i', [-1]) * num_cells
+        self.queue, self.distance, self.parent = queue, distance, parent
+        self.head, self.tail = 0, 0
+
+        start = problem.initial_cell
+        goal = problem.goal_cell
+        get_successor_cells = problem.get_successor_cells
+
+        queue[0] = start
+        distance[start] = 0
+        head, tail = 0, 1
+
+        if start == goal:
+            self.head, self.tail = head, tail
+            self.path = self._path_from_parents(self.parent, self.distance, goal)
+            return self.path
+
+        while head < tail and head < self.max_depth:
+            cell = queue[head]
+            head += 1
+            next_distance = distance[cell] + 1
+
+            for next_cell in get_successor_cells(cell):
+                if distance[next_cell] < 0:
+                    distance[next_cell] = next_distance
+                    parent[next_cell] = cell
+                    queue[tail] = next_cell
+                    tail += 1
+
+                    # Unit step costs: the first time we reach the goal is along a shortest path
+                    if next_cell == goal:
+                        self.head, self.tail = head, tail
+                        self.path = self._path_from_parents(self.parent, self.distance, goal)
+                        return self.path
+
+        self.head, self.tail = head, tail
+        return []
+
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return self.tail - self.head, self.tail
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        # A view: the queue is never resized, and the next search gets a new one
+        return memoryview(self.queue)[:self.tail]
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.queue[self.head:self.tail], self.distance)
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.queue[:self.head], self.distance)
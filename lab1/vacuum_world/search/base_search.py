@@ -2,9 +2,11 @@
 Abstract base class for all search algorithms.
 """
 from abc import ABC, abstractmethod
-from typing import List
+from time import perf_counter_ns
+from typing import Iterable, List, Optional, Sequence, Tuple
 from .search_node import SearchNode
 from .problem import SearchProblem
+from .search_stats import SearchStats, ExpansionCallback
 
 
 class BaseSearch(ABC):
@@ -27,6 +29,16 @@ class BaseSearch(ABC):
         self.max_depth = max_depth
         self.path: List[SearchNode] = []
 
+        # Whether the last search gave up because it spent its max_depth budget, rather than
+        # because there is no path; set by the searches that count expansions against it
+        self.budget_spent = False
+
+        # The problem of the last search, used to convert cell id states back to GridPos
+        self.problem: Optional[SearchProblem] = None
+
+        # The measurements of the last search run with search_with_stats
+        self.stats: Optional[SearchStats] = None
+
         # Tailor the following data structures to the needs of the search algorithm
         self.frontier = []
         self.explored = []
@@ -45,6 +57,48 @@ class BaseSearch(ABC):
         """
         pass
     
+    def search_with_stats(self,
+                          problem: SearchProblem,
+                          trace: bool = False,
+                          on_expand: Optional[ExpansionCallback] = None) -> Tuple[List[SearchNode], SearchStats]:
+        """
+        Perform the search and measure it.
+        
+        Args:
+            problem: The search problem to solve
+            trace: Whether to take the per-expansion measurements (see SearchStats)
+            on_expand: Optional callback for the position of every expanded node
+            
+        Returns:
+            The path (as returned by search) and the measurements of the run
+        """
+        stats = SearchStats(trace, on_expand)
+        generated_before = problem.get_num_expanded_nodes()
+        problem.start_trace(stats, self.get_search_sizes)
+        started = perf_counter_ns()
+        try:
+            path = self.search(problem)
+        finally:
+            stats.add_phase_time("search", perf_counter_ns() - started)
+            problem.stop_trace()
+
+        stats.generated_nodes = problem.get_num_expanded_nodes() - generated_before
+        stats.path_length = len(path)
+        if stats.traced:
+            stats.observe_sizes(*self.get_search_sizes())
+        self.stats = stats
+        return path, stats
+    
+    def get_search_sizes(self) -> Tuple[int, int]:
+        """
+        Get the current number of frontier entries and of visited states, for tracing.
+        
+        Searches whose frontier or visited set is not held in ``frontier`` and ``explored``
+        override this. Searches that keep their queue bounds in local variables while running
+        only report their sizes at the end of the search.
+        """
+        return len(self.frontier), len(self.explored)
+    
     def get_path(self) -> List[SearchNode]:
         """
         Get the path found by the search.
@@ -74,6 +128,83 @@ class BaseSearch(ABC):
         """
         pass
     
+    def _decode_nodes(self, nodes: List[SearchNode]) -> List[SearchNode]:
+        """
+        Convert nodes of the last search to GridPos-based nodes for the caller.
+        """
+        if self.problem is None:
+            return nodes
+        return self.problem.decode_nodes(nodes)
+    
+    def _trace_parents(self, parent: Sequence[int], goal: int) -> List[int]:
+        """
+        Follow a parent table indexed by cell id from the goal back to the start.
+        
+        Args:
+            parent: The parent cell of every reached cell, -1 for the start
+            goal: The cell id the path ends at
+            
+        Returns:
+            The cell ids of the path, from the start to the goal
+        """
+        cells = []
+        cell = goal
+        while cell >= 0:
+            cells.append(cell)
+            cell = parent[cell]
+        cells.reverse()
+        return cells
+    
+    def _make_path(self, cells: Iterable[int], cost: Optional[Sequence[float]] = None) -> List[SearchNode]:
+        """
+        Build the chain of SearchNodes of a path given as cell ids.
+        
+        Args:
+            cells: The cell ids of the path, from the start to the goal
+            cost: The path cost of every cell, indexed by cell id; the number of moves
+                  along the path if omitted
+            
+        Returns:
+            List of SearchNode objects, each linked to its predecessor
+        """
+        path = []
+        node = None
+        cell_pos = self.problem.maze.cell_pos
+        for index, cell in enumerate(cells):
+            node = SearchNode(cell_pos(cell), node, None, index if cost is None else cost[cell])
+            path.append(node)
+        return path
+    
+    def _path_from_parents(self, parent: Sequence[int], cost: Optional[Sequence[float]], goal: int) -> List[SearchNode]:
+        """
+        Build the path to the goal of a search that keeps a parent table indexed by cell id.
+        
+        Args:
+            parent: The parent cell of every reached cell, -1 for the start
+            cost: The path cost of every cell, indexed by cell id (see _make_path)
+            goal: The cell id the path ends at
+            
+        Returns:
+            List of SearchNode objects from the start to the goal
+        """
+        return self._make_path(self._trace_parents(parent, goal), cost)
+    
+    def _make_nodes(self, cells: Iterable[int], cost: Optional[Sequence[float]] = None) -> List[SearchNode]:
+        """
+        Build unlinked SearchNodes for the frontier and explored cells of the visualization.
+        
+        Args:
+            cells: The cell ids to convert
+            cost: The path cost of every cell, indexed by cell id; 0 if omitted
+            
+        Returns:
+            List of SearchNode objects, one per cell
+        """
+        cell_pos = self.problem.maze.cell_pos
+        if cost is None:
+            return [SearchNode(cell_pos(cell)) for cell in cells]
+        return [SearchNode(cell_pos(cell), None, None, cost[cell]) for cell in cells]
+    
     def get_all_expanded_nodes(self) -> List[SearchNode]:
         """
         Get all nodes that have been expanded (frontier + explored).
@@ -84,6 +215,22 @@ class BaseSearch(ABC):
         Returns:
             List of all SearchNode objects that have been expanded
         """
-        all_nodes = self.get_explored_nodes()
-        all_nodes.extend(self.get_frontier_nodes())
-        return all_nodes
\ No newline at end of file
+        # Some searches hand out their explored list itself, which must not grow
+        return list(self.get_explored_nodes()) + list(self.get_frontier_nodes())
+    
+    def get_expanded_cells(self) -> Iterable[int]:
+        """
+        Get the cell ids of all explored and frontier nodes, for the visualization.
+        
+        Unlike get_all_expanded_nodes, this builds no SearchNode objects in the searches that
+        keep their state in cell id arrays; they override it to hand out (views of) those
+        arrays. The default implementation converts the nodes of get_all_expanded_nodes.
+        Cells may appear more than once.
+        
+        Returns:
+            An iterable of cell ids
+        """
+        if self.problem is None:
+            return ()
+        width = self.problem.maze.width
+        return (node.get_state().y * width + node.get_state().x for node in self.get_all_expanded_nodes())
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""
+Bidirectional searches, which search from the start and from the goal at the same time.
+"""
+import heapq
+from array import array
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence, Tuple
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+class BidirectionalSearch(BaseSearch):
+    """
+    Common bookkeeping of the bidirectional searches.
+
+    Both directions keep a distance table and a parent table indexed by cell id. Moves in the
+    maze are reversible, so the backward search uses the same successors as the forward one.
+    The two half paths are stitched together at the meeting cell.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cost_forward = array('i')
+        self.cost_backward = array('i')
+        self.parent_forward = array('i')
+        self.parent_backward = array('i')
+        self.meeting_cell = -1
+
+    def _reset(self, problem: SearchProblem):
+        self.problem = problem
+        self.path = []
+        num_cells = problem.maze.width * problem.maze.height
+        self.cost_forward = array('i', [-1]) * num_cells
+        self.cost_backward = array('i', [-1]) * num_cells
+        self.parent_forward = array('i', [-1]) * num_cells
+        self.parent_backward = array('i', [-1]) * num_cells
+        self.meeting_cell = -1
+
+    def _stitch_path(self, meeting_cell: int) -> List[SearchNode]:
+        """
+        Join the forward path start -> meeting cell and the backward path meeting cell -> goal.
+        """
+        cells = self._trace_parents(self.parent_forward, meeting_cell)
+
+        cell = self.parent_backward[meeting_cell]
+        while cell >= 0:
+            cells.append(cell)
+            cell = self.parent_backward[cell]
+
+        return self._make_path(cells)
+
+    def _make_nodes(self, cells: Iterable[int], cost: Optional[Sequence[float]] = None) -> List[SearchNode]:
+        """
+        Build the nodes of the visualization, by default with the distance from the side that
+        reached each cell.
+        """
+        if cost is None:
+            cells = list(cells)
+            cost_forward, cost_backward = self.cost_forward, self.cost_backward
+            cost = {cell: cost_forward[cell] if cost_forward[cell] >= 0 else cost_backward[cell]
+                    for cell in cells}
+        return super()._make_nodes(cells, cost)
+
+
+class BidirectionalBreadthFirstSearch(BidirectionalSearch):
+    """
+    Breadth-First search from both ends, expanding one whole layer of the smaller frontier at a time.
+
+    Each cell is queued at most once per direction. The search stops as soon as a newly reached
+    cell was already reached from the other side: every shorter path would have met earlier,
+    so the path through that cell is a shortest one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.queue_forward = array('i')
+        self.queue_backward = array('i')
+        self.heads = [0, 0]
+        self.tails = [0, 0]
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform a bidirectional Breadth-First search to find a path to goal.
+        """
+        self._reset(problem)
+        num_cells = problem.maze.width * problem.maze.height
+        start, goal = problem.initial_cell, problem.goal_cell
+        get_successor_cells = problem.get_successor_cells
+
+        queues = [array('i', [0]) * num_cells, array('i', [0]) * num_cells]
+        costs = [self.cost_forward, self.cost_backward]
+        parents = [self.parent_forward, self.parent_backward]
+        heads, tails = [0, 0], [1, 1]
+        self.queue_forward, self.queue_backward = queues
+        self.heads, self.tails = heads, tails
+
+        queues[0][0] = start
+        queues[1][0] = goal
+        costs[0][start] = 0
+        costs[1][goal] = 0
+        if start == goal:
+            self.meeting_cell = start
+            self.path = self._stitch_path(start)
+            return self.path
+
+        expanded = 0
+        while heads[0] < tails[0] and heads[1] < tails[1] and expanded < self.max_depth:
+            side = 0 if tails[0] - heads[0] <= tails[1] - heads[1] else 1
+            queue, cost, parent = queues[side], costs[side], parents[side]
+            other_cost = costs[1 - side]
+            head, tail = heads[side], tails[side]
+            layer_end = tail
+
+            while head < layer_end:
+                cell = queue[head]
+                head += 1
+                next_cost = cost[cell] + 1
+
+                for next_cell in get_successor_cells(cell):
+                    if cost[next_cell] < 0:
+                        cost[next_cell] = next_cost
+                        parent[next_cell] = cell
+                        queue[tail] = next_cell
+                        tail += 1
+
+                        if other_cost[next_cell] >= 0:
+                            heads[side], tails[side] = head, tail
+                            self.meeting_cell = next_cell
+                            self.path = self._stitch_path(next_cell)
+                            return self.path
+
+            expanded += head - heads[side]
+            heads[side], tails[side] = head, tail
+
+        return []
+
+    def get_search_sizes(self) -> Tuple[int, int]:
+        reached = self.tails[0] + self.tails[1]
+        return reached - self.heads[0] - self.heads[1], reached
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        return chain(self.queue_forward[:self.tails[0]], self.queue_backward[:self.tails[1]])
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(list(self.queue_forward[self.heads[0]:self.tails[0]]) +
+                                list(self.queue_backward[self.heads[1]:self.tails[1]]))
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(list(self.queue_forward[:self.heads[0]]) +
+                                list(self.queue_backward[:self.heads[1]]))
+
+
+class BidirectionalAStarSearch(BidirectionalSearch):
+    """
+    A* from both ends: the forward search estimates the cost to the goal, the backward search
+    the cost to the start, and the side with the smaller open list is expanded next.
+
+    Whenever a cell gets a cost from one side while the other side already reached it, the
+    joined path is a candidate solution. With a consistent heuristic, the best candidate is
+    optimal once the smallest f value of either open list is no lower than its cost.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = [[], []]
+        self.closed = [bytearray(), bytearray()]
+        self.explored = array('i')
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform a bidirectional A* search to find a path to goal.
+        """
+        self._reset(problem)
+        num_cells = problem.maze.width * problem.maze.height
+        start, goal = problem.initial_cell, problem.goal_cell
+        get_successor_cells = problem.get_successor_cells
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        costs = [self.cost_forward, self.cost_backward]
+        parents = [self.parent_forward, self.parent_backward]
+        estimates = [problem.get_cell_heuristic(), problem.get_cell_heuristic(problem.initial_state)]
+        closed = [bytearray(num_cells), bytearray(num_cells)]
+        frontiers = [[], []]
+        explored = array('i')
+        self.frontier, self.closed, self.explored = frontiers, closed, explored
+
+        counter = 0
+        for side, cell in ((0, start), (1, goal)):
+            costs[side][cell] = 0
+            h = estimates[side](cell)
+            frontiers[side].append((h, h, counter, cell))
+
+        best_cost = 0 if start == goal else float('inf')
+        meeting_cell = start if start == goal else -1
+
+        while frontiers[0] and frontiers[1] and len(explored) < self.max_depth:
+            # Drop outdated entries so that the tops hold the true smallest f values
+            for side in (0, 1):
+                frontier, side_closed = frontiers[side], closed[side]
+                while frontier and side_closed[frontier[0][3]]:
+                    heappop(frontier)
+            if not frontiers[0] or not frontiers[1]:
+                break
+            if max(frontiers[0][0][0], frontiers[1][0][0]) >= best_cost:
+                break
+
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            frontier, cost, parent = frontiers[side], costs[side], parents[side]
+            side_closed, other_cost, estimate = closed[side], costs[1 - side], estimates[side]
+
+            _, _, _, cell = heappop(frontier)
+            side_closed[cell] = 1
+            explored.append(cell)
+
+            next_cost = cost[cell] + 1
+            for next_cell in get_successor_cells(cell):
+                if side_closed[next_cell]:
+                    continue
+                old_cost = cost[next_cell]
+                if old_cost < 0 or next_cost < old_cost:
+                    cost[next_cell] = next_cost
+                    parent[next_cell] = cell
+                    h = estimate(next_cell)
+                    counter += 1
+                    heappush(frontier, (next_cost + h, h, counter, next_cell))
+
+                    if other_cost[next_cell] >= 0 and next_cost + other_cost[next_cell] < best_cost:
+                        best_cost = next_cost + other_cost[next_cell]
+                        meeting_cell = next_cell
+
+        if meeting_cell < 0:
+            return []
+        self.meeting_cell = meeting_cell
+        self.path = self._stitch_path(meeting_cell)
+        return self.path
+
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return len(self.frontier[0]) + len(self.frontier[1]), len(self.explored)
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        frontier_cells = (cell for frontier, side_closed in zip(self.frontier, self.closed)
+                          for _, _, _, cell in frontier if not side_closed[cell])
+        return chain(self.explored, frontier_cells)
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        cells = set()
+        for frontier, side_closed in zip(self.frontier, self.closed):
+            cells.update(cell for _, _, _, cell in frontier if not side_closed[cell])
+        return self._make_nodes(sorted(cells))
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.explored)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 from vacuum_world.search.search_node import SearchNode
 from vacuum_world.search.problem import SearchProblem
 from vacuum_world.world.grid_pos import GridPos
@@ -38,6 +38,7 @@ class BreadthFirstSearch(BaseSearch):
         """
         Perform a Breadth-First search to find a path to goal.
         """
+        self.problem = problem
         self.path = []
         self.visited = set()
         self.explored = []
@@ -66,7 +67,7 @@ class BreadthFirstSearch(BaseSearch):
             
             # Check if we've reached the goal
             if problem.is_goal_state(current_state):
-                self.path = self.__find_path(current_node)
+                self.path = problem.decode_path(self.__find_path(current_node))
                 return self.path
             
             # Get all possible successors
@@ -91,8 +92,11 @@ class BreadthFirstSearch(BaseSearch):
         return []
     
     
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return len(self.frontier), len(self.visited)
+    
     def get_frontier_nodes(self) -> List[SearchNode]:
-        return list(self.frontier)
+        return self._decode_nodes(list(self.frontier))
     
     def get_explored_nodes(self) -> List[SearchNode]:
-        return self.explored
\ No newline at end of file
+        return self._decode_nodes(self.explored)
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+D* Lite: a shortest path search that repairs its result when the start moves or walls change.
+"""
+import heapq
+from array import array
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+from ..world.grid_pos import GridPos
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+# Cost of unreachable cells; stays far below the int32 limit when a step cost is added
+INFINITY = 1 << 30
+
+
+class DStarLiteSearch(BaseSearch):
+    """
+    D* Lite (Koenig and Likhachev, 2002) on cell ids, with unit step costs.
+
+    The search runs backwards from the goal, keeping for every cell its distance to the goal
+    g(s) and the one-step lookahead rhs(s) = min over neighbours s' of 1 + g(s'). Cells where
+    the two differ are inconsistent and sit in a priority queue, keyed by
+    [min(g, rhs) + h(start, s) + km, min(g, rhs)]. When walls change, only the changed cells
+    and their neighbours get a new rhs, and processing the queue repairs the distances around
+    them. When the start moves, the key modifier km grows by the heuristic distance moved
+    instead of re-keying the whole queue.
+
+    After the first ``search(problem)``, call ``update_start`` as the agent moves,
+    ``update_cells`` with the cells whose walls changed, and ``replan`` to get the repaired
+    path. Walls are read directly from the occupancy grid of the maze, so the search does not
+    depend on the neighbour table, which is rebuilt from scratch after every change.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        self.g = array('i')
+        self.rhs = array('i')
+
+        # The key each inconsistent cell is queued with; heap entries with other keys are stale
+        self.open_keys: Dict[int, Tuple[int, int]] = {}
+        self.km = 0
+        self.start_cell = -1
+        self.goal_cell = -1
+
+        # Cells expanded by the last search or repair in order, and the nodes generated by
+        # all of them since the first search
+        self.explored = array('i')
+        self.num_expanded_nodes = 0
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform a D* Lite search to find a path to goal.
+        """
+        self.problem = problem
+        self.path = []
+
+        num_cells = problem.maze.width * problem.maze.height
+        self.g = array('i', [INFINITY]) * num_cells
+        self.rhs = array('i', [INFINITY]) * num_cells
+        self.frontier = []
+        self.open_keys = {}
+        self.km = 0
+        self.start_cell = problem.initial_cell
+        self.goal_cell = problem.goal_cell
+        self.num_expanded_nodes = 0
+
+        self.rhs[self.goal_cell] = 0
+        self.__queue(self.goal_cell)
+        return self.replan()
+
+    def update_start(self, pos: GridPos):
+        """Move the start of the search, e.g. after the agent moved along the path."""
+        cell = self.problem.maze.cell_id(pos.x, pos.y)
+        if cell != self.start_cell:
+            self.km += self.__heuristic(self.start_cell, cell)
+            self.start_cell = cell
+
+    def update_cells(self, cells: Iterable[int]):
+        """Take wall changes into account: recompute the lookahead of the cells and their neighbours.
+
+        Args:
+            cells: The ids of the cells that became walls or free cells
+        """
+        rhs, goal = self.rhs, self.goal_cell
+        for cell in cells:
+            for affected in [cell] + self.__neighbors(cell):
+                if affected != goal:
+                    rhs[affected] = self.__lookahead(affected)
+                self.__update_vertex(affected)
+
+    def replan(self) -> List[SearchNode]:
+        """Repair the distances after the start moved or walls changed, and extract the path.
+
+        Returns:
+            List of SearchNode objects from the start to the goal, empty if no path exists
+        """
+        self.explored = array('i')
+        self.__compute_shortest_path()
+        self.path = self.__extract_path()
+        return self.path
+
+    def __heuristic(self, a: int, b: int) -> int:
+        width = self.problem.maze.width
+        ay, ax = divmod(a, width)
+        by, bx = divmod(b, width)
+        return abs(ax - bx) + abs(ay - by)
+
+    def __key(self, cell: int) -> Tuple[int, int]:
+        best = min(self.g[cell], self.rhs[cell])
+        return best + self.__heuristic(self.start_cell, cell) + self.km, best
+
+    def __queue(self, cell: int):
+        key = self.__key(cell)
+        self.open_keys[cell] = key
+        heapq.heappush(self.frontier, (key[0], key[1], cell))
+
+    def __update_vertex(self, cell: int):
+        if self.g[cell] != self.rhs[cell]:
+            self.__queue(cell)
+        else:
+            self.open_keys.pop(cell, None)
+
+    def __neighbors(self, cell: int) -> List[int]:
+        """Get the cells next to a cell, walls included, in the order north, south, east, west."""
+        width, height = self.problem.maze.width, self.problem.maze.height
+        y, x = divmod(cell, width)
+        neighbors = []
+        if y > 0:
+            neighbors.append(cell - width)
+        if y < height - 1:
+            neighbors.append(cell + width)
+        if x < width - 1:
+            neighbors.append(cell + 1)
+        if x > 0:
+            neighbors.append(cell - 1)
+        return neighbors
+
+    def __lookahead(self, cell: int) -> int:
+        """Get 1 + the smallest g of the free neighbours of a free cell, or INFINITY."""
+        grid, g = self.problem.maze.grid, self.g
+        if grid[cell]:
+            return INFINITY
+        best = INFINITY
+        for neighbor in self.__neighbors(cell):
+            if not grid[neighbor] and g[neighbor] + 1 < best:
+                best = g[neighbor] + 1
+        return best
+
+    def __top(self):
+        """Get the smallest up-to-date heap entry, dropping the stale ones, or None."""
+        frontier, open_keys = self.frontier, self.open_keys
+        while frontier:
+            k1, k2, cell = frontier[0]
+            if open_keys.get(cell) == (k1, k2):
+                return frontier[0]
+            heapq.heappop(frontier)
+        return None
+
+    def __compute_shortest_path(self):
+        g, rhs, grid = self.g, self.rhs, self.problem.maze.grid
+        open_keys, frontier, explored = self.open_keys, self.frontier, self.explored
+        goal = self.goal_cell
+        neighbors_of = self.__neighbors
+
+        while len(explored) < self.max_depth:
+            top = self.__top()
+            start = self.start_cell
+            if top is None:
+                break
+            if (top[0], top[1]) >= self.__key(start) and rhs[start] <= g[start]:
+                break
+
+            k1, k2, cell = top
+            new_key = self.__key(cell)
+            if (k1, k2) < new_key:
+                # The key was computed before the start moved; queue the cell again
+                heapq.heappop(frontier)
+                open_keys[cell] = new_key
+                heapq.heappush(frontier, (new_key[0], new_key[1], cell))
+                continue
+
+            heapq.heappop(frontier)
+            del open_keys[cell]
+            explored.append(cell)
+            neighbors = neighbors_of(cell)
+            num_free = sum(1 for neighbor in neighbors if not grid[neighbor])
+            self.num_expanded_nodes += num_free
+            self.problem.add_expanded_nodes(num_free, cell)
+
+            if g[cell] > rhs[cell]:
+                # Overconsistent: the distance got shorter, pass it on to the neighbours
+                g[cell] = rhs[cell]
+                through = g[cell] + 1
+                for neighbor in neighbors:
+                    if (neighbor != goal and not grid[neighbor] and not grid[cell]
+                            and through < rhs[neighbor]):
+                        rhs[neighbor] = through
+                        self.__update_vertex(neighbor)
+            else:
+                # Underconsistent: the distance got longer, the cell and the neighbours that
+                # relied on it need a new lookahead
+                old_through = g[cell] + 1
+                g[cell] = INFINITY
+                for affected in neighbors + [cell]:
+                    if affected != goal and (affected == cell or rhs[affected] == old_through):
+                        rhs[affected] = self.__lookahead(affected)
+                    self.__update_vertex(affected)
+
+    def __extract_path(self) -> List[SearchNode]:
+        g, grid = self.g, self.problem.maze.grid
+        cell, goal = self.start_cell, self.goal_cell
+        if grid[goal] or (g[cell] >= INFINITY and self.rhs[cell] >= INFINITY):
+            return []
+
+        cells = [cell]
+        while cell != goal:
+            best, best_g = -1, INFINITY
+            for neighbor in self.__neighbors(cell):
+                if not grid[neighbor] and g[neighbor] < best_g:
+                    best, best_g = neighbor, g[neighbor]
+            if best < 0 or len(cells) > len(g):
+                return []
+            cell = best
+            cells.append(cell)
+
+        return self._make_path(cells)
+
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return len(self.open_keys), len(self.explored)
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        return chain(self.explored, self.open_keys)
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(sorted(self.open_keys), self.g)
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.explored, self.g)
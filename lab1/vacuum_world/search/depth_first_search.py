@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 from vacuum_world.search.search_node import SearchNode
 from vacuum_world.search.problem import SearchProblem
 from .base_search import BaseSearch
@@ -13,6 +13,7 @@ class DepthFirstSearch(BaseSearch):
         self.path = []
 
     def search(self, problem):
+        self.problem = problem
         start_state = problem.get_initial_state()
         start_node = SearchNode(start_state)
         self.stack = [start_node]
@@ -22,12 +23,10 @@ class DepthFirstSearch(BaseSearch):
         while self.stack:
             node = self.stack.pop()
             state = node.state
-            print(f'explored {state}')
 
             if problem.is_goal_state(state):
-                print(f'goal state', node.get_path_from_root())
-                self.path = node.get_path_from_root()
-                return node.get_path_from_root()
+                self.path = problem.decode_path(node.get_path_from_root())
+                return self.path
             
             if state in explored:
                 continue
@@ -42,8 +41,11 @@ class DepthFirstSearch(BaseSearch):
 
         return []
     
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return len(self.stack), len(self.explored_nodes)
+
     def get_explored_nodes(self):
-        return list(self.explored_nodes)
+        return self._decode_nodes(list(self.explored_nodes))
     
     def get_frontier_nodes(self):
-        return list(self.stack)
\ No newline at end of file
+        return self._decode_nodes(list(self.stack))
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Maze distances from one cell to many others, computed with a single Breadth-First sweep.
+"""
+from array import array
+from typing import Iterable, List, Optional
+from ..world.grid_pos import GridPos
+from ..world.maze import Maze
+from .search_node import SearchNode
+
+
+class DistanceField:
+    """
+    Distance and parent tables of a Breadth-First sweep from a source cell.
+
+    Without targets, the sweep covers the whole connected region of the source. With targets,
+    it stops as soon as ``target_limit`` of them (all by default) have been reached; the
+    targets are then reached in order of increasing maze distance, so ``reached_targets[0]``
+    is the nearest one. Cells the sweep did not reach have no distance.
+
+    Following the parents from any reached cell leads back to the source, so the field also
+    gives shortest paths both to and from the source.
+    """
+
+    def __init__(self,
+                 maze: Maze,
+                 source: GridPos,
+                 targets: Optional[Iterable[GridPos]] = None,
+                 target_limit: Optional[int] = None):
+        """Sweep the maze from the source.
+
+        Args:
+            maze: The maze to measure distances in
+            source: The position distances are measured from
+            targets: Positions to look for, or None to sweep the whole region
+            target_limit: Stop after reaching this many targets (all targets by default)
+        """
+        self.maze = maze
+        self.source = source
+        self.source_cell = maze.cell_id(source.x, source.y)
+        self.reached_targets: List[GridPos] = []
+        self.num_expanded_nodes = 0
+
+        num_cells = maze.width * maze.height
+        self.distance = array('i', [-1]) * num_cells
+        self.parent = array('i', [-1]) * num_cells
+        self.queue = array('i', [0]) * num_cells
+        self.num_reached = 0
+
+        self._sweep(targets, target_limit)
+
+    def _sweep(self, targets: Optional[Iterable[GridPos]], target_limit: Optional[int]):
+        maze = self.maze
+        distance, parent, queue = self.distance, self.parent, self.queue
+        offsets, neighbor_table = maze.get_adjacency()
+
+        remaining = None
+        if targets is not None:
+            remaining = {}
+            for target in targets:
+                remaining[maze.cell_id(target.x, target.y)] = target
+            if target_limit is None:
+                target_limit = len(remaining)
+
+        def reach(cell: int) -> bool:
+            """Record a reached target, returning True once the sweep can stop."""
+            self.reached_targets.append(remaining.pop(cell))
+            return len(self.reached_targets) >= target_limit or not remaining
+
+        source = self.source_cell
+        distance[source] = 0
+        queue[0] = source
+        head, tail = 0, 1
+        if remaining is not None and (not remaining or (source in remaining and reach(source))):
+            self.num_reached = tail
+            return
+
+        expanded = 0
+        done = False
+        while head < tail and not done:
+            cell = queue[head]
+            head += 1
+            next_distance = distance[cell] + 1
+            neighbors = neighbor_table[offsets[cell]:offsets[cell + 1]]
+            expanded += len(neighbors)
+
+            for next_cell in neighbors:
+                if distance[next_cell] < 0:
+                    distance[next_cell] = next_distance
+                    parent[next_cell] = cell
+                    queue[tail] = next_cell
+                    tail += 1
+                    if remaining is not None and next_cell in remaining and reach(next_cell):
+                        done = True
+                        break
+
+        self.num_expanded_nodes = expanded
+        self.num_reached = tail
+
+    def distance_to(self, pos: GridPos) -> Optional[int]:
+        """Get the maze distance between the source and a position.
+
+        Returns:
+            The number of moves, or None if the sweep did not reach the position
+        """
+        if not (0 <= pos.x < self.maze.width and 0 <= pos.y < self.maze.height):
+            return None
+        dist = self.distance[self.maze.cell_id(pos.x, pos.y)]
+        return dist if dist >= 0 else None
+
+    def nearest_target(self) -> Optional[GridPos]:
+        """Get the reached target closest to the source, or None if no target was reached."""
+        return self.reached_targets[0] if self.reached_targets else None
+
+    def _cells_to_source(self, pos: GridPos) -> List[int]:
+        cell = self.maze.cell_id(pos.x, pos.y)
+        if self.distance[cell] < 0:
+            return []
+        cells = []
+        while cell >= 0:
+            cells.append(cell)
+            cell = self.parent[cell]
+        return cells
+
+    def _make_path(self, cells: List[int]) -> List[SearchNode]:
+        path = []
+        node = None
+        cell_pos = self.maze.cell_pos
+        for cost, cell in enumerate(cells):
+            node = SearchNode(cell_pos(cell), node, None, cost)
+            path.append(node)
+        return path
+
+    def path_to(self, pos: GridPos) -> List[SearchNode]:
+        """Get a shortest path from the source to a position.
+
+        Returns:
+            List of SearchNode objects from the source to the position, empty if not reached
+        """
+        return self._make_path(self._cells_to_source(pos)[::-1])
+
+    def path_from(self, pos: GridPos) -> List[SearchNode]:
+        """Get a shortest path from a position to the source.
+
+        Returns:
+            List of SearchNode objects from the position to the source, empty if not reached
+        """
+        return self._make_path(self._cells_to_source(pos))
+
+    def get_reached_cells(self) -> array:
+        """Get the ids of all cells reached by the sweep, in order of increasing distance."""
+        return self.queue[:self.num_reached]
+
+    def get_reached_positions(self) -> List[GridPos]:
+        """Get all positions reached by the sweep, in order of increasing distance."""
+        cell_pos = self.maze.cell_pos
+        return [cell_pos(cell) for cell in self.queue[:self.num_reached]]
@@ -0,0 +1,128 @@
+"""
+Fringe search: the thresholds of IDA* without its repeated work, on cell ids.
+"""
+from typing import Dict, Iterable, List, Tuple
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+INFINITY = float('inf')
+
+
+class FringeSearch(BaseSearch):
+    """
+    Fringe search (Bjornsson, Enzenberger, Holte and Schaeffer, 2005).
+
+    Like IDA*, the search visits the cells depth first in iterations of increasing thresholds
+    on f = g + h. Instead of starting every iteration from scratch, it keeps the fringe: the
+    cells of the previous iteration that exceeded the threshold (the later list) become the
+    cells to visit (the now list) of the next one. A cache of the best known cost g and parent
+    of the cells reached so far skips paths that are no longer than a known one, so no cell
+    is expanded twice at the same cost and no priority queue needs to be sorted.
+
+    Entries of the lists are (cell, g) pairs; an entry is outdated, and skipped, when a cheaper
+    path to its cell was found since it was added. The cache is a dict, so memory grows with
+    the cells reached rather than with the size of the maze. max_depth bounds the number of
+    expansions, after which the search gives up and sets budget_spent.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # The entries to visit in this iteration and in the next one
+        self.frontier: List[Tuple[int, int]] = []
+        self.later: List[Tuple[int, int]] = []
+
+        # The best known cost and the parent of every reached cell (-1 for the start cell)
+        self.g: Dict[int, int] = {}
+        self.parent: Dict[int, int] = {}
+        self.num_iterations = 0
+        self.num_expansions = 0
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform a fringe search to find a path to goal.
+        """
+        self.problem = problem
+        self.path = []
+
+        start = problem.initial_cell
+        goal = problem.goal_cell
+        estimate = problem.get_cell_heuristic()
+        get_successor_cells = problem.get_successor_cells
+
+        g = {start: 0}
+        parent = {start: -1}
+        now = [(start, 0)]
+        later = []
+        self.g, self.parent, self.frontier, self.later = g, parent, now, later
+        self.num_iterations = 0
+        self.num_expansions = 0
+        self.budget_spent = False
+
+        threshold = estimate(start)
+        while now:
+            self.num_iterations += 1
+            next_threshold = INFINITY
+            while now:
+                cell, cost = now.pop()
+                if g[cell] != cost:
+                    # Outdated entry, the cell was reached again with a lower cost
+                    continue
+
+                f = cost + estimate(cell)
+                if f > threshold:
+                    if f < next_threshold:
+                        next_threshold = f
+                    later.append((cell, cost))
+                    continue
+
+                if cell == goal:
+                    now.append((cell, cost))
+                    self.path = self._path_from_parents(self.parent, self.g, goal)
+                    return self.path
+
+                self.num_expansions += 1
+                if self.num_expansions > self.max_depth:
+                    self.budget_spent = True
+                    return []
+
+                # Visit the successors right after their parent, the first one first
+                next_cost = cost + 1
+                for next_cell in reversed(get_successor_cells(cell)):
+                    old_cost = g.get(next_cell)
+                    if old_cost is None or next_cost < old_cost:
+                        g[next_cell] = next_cost
+                        parent[next_cell] = cell
+                        now.append((next_cell, next_cost))
+
+            # The fringe of this iteration is visited in the order it was left
+            later.reverse()
+            now, later = later, now
+            self.frontier, self.later = now, later
+            threshold = next_threshold
+
+        return []
+
+    def __fringe_cells(self) -> set:
+        g = self.g
+        return {cell for cell, cost in self.frontier + self.later if g[cell] == cost}
+
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return len(self.frontier) + len(self.later), len(self.g)
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        return self.g.keys()
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(sorted(self.__fringe_cells()), self.g)
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        fringe = self.__fringe_cells()
+        return self._make_nodes([cell for cell in self.g if cell not in fringe], self.g)
@@ -0,0 +1,166 @@
+"""
+Iterative deepening searches, which find shortest paths with memory proportional to the path length.
+"""
+from abc import abstractmethod
+from array import array
+from typing import Callable, Iterable, List, Optional
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+INFINITY = float('inf')
+
+
+class IterativeDeepeningSearch(BaseSearch):
+    """
+    Base class of the iterative deepening searches on cell ids.
+
+    Each iteration is a depth-first search that prunes the cells whose bound f = g + h exceeds
+    a threshold. The next iteration raises the threshold to the smallest bound that was pruned,
+    so the first path found is a shortest one (given an admissible h). The frontier only holds
+    the cells of the current path and their untried successors; the price is that cells are
+    expanded again in every iteration.
+
+    Within an iteration, a cell is only expanded again when it is reached by a shorter path
+    than before: the depth it was reached at is kept in a table of one entry per cell. This
+    also avoids cycles, and stops the search from following every one of the exponentially
+    many paths of an open room.
+
+    max_depth bounds the total number of expansions over all iterations, after which the
+    search gives up, returns an empty path and sets budget_spent.
+    """
+
+    def __init__(self, max_depth: int = 1000000):
+        super().__init__(max_depth)
+        # The successors still to try at every depth, and the cells of the current path
+        self.frontier: List[List[int]] = []
+        self.explored = array('i')
+        self.num_iterations = 0
+        self.num_expansions = 0
+
+    @abstractmethod
+    def get_estimate(self, problem: SearchProblem) -> Callable[[int], float]:
+        """Get the estimate h of the cost from a cell to the goal used in the bound."""
+        pass
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform iterations of bounded depth-first searches with increasing thresholds.
+        """
+        self.problem = problem
+        self.path = []
+        self.num_iterations = 0
+        self.num_expansions = 0
+        self.budget_spent = False
+
+        start = problem.initial_cell
+        estimate = self.get_estimate(problem)
+        threshold = estimate(start)
+        while threshold < INFINITY:
+            self.num_iterations += 1
+            threshold = self.__bounded_search(start, problem.goal_cell, threshold, estimate)
+            if threshold is None:
+                self.path = self._make_path(self.explored)
+                return self.path
+        return []
+
+    def __bounded_search(self,
+                         start: int,
+                         goal: int,
+                         threshold: float,
+                         estimate: Callable[[int], float]) -> Optional[float]:
+        """Search all paths whose bound stays within the threshold, depth first.
+
+        Returns:
+            None if the goal was reached (the path is left in self.explored), otherwise the
+            smallest pruned bound: the threshold of the next iteration (INFINITY if nothing
+            was pruned or the expansion budget is spent)
+        """
+        get_successor_cells = self.problem.get_successor_cells
+        path = array('i', [start])
+        # The smallest depth every cell was reached at in this iteration
+        num_cells = self.problem.maze.width * self.problem.maze.height
+        best_depth = array('i', [num_cells]) * num_cells
+        best_depth[start] = 0
+        pending = []
+        self.explored, self.frontier = path, pending
+        next_threshold = INFINITY
+
+        if start == goal:
+            return None
+
+        cell = start
+        while True:
+            if cell >= 0:
+                # Expand the last cell of the path; the best successors are tried first
+                self.num_expansions += 1
+                if self.num_expansions > self.max_depth:
+                    self.budget_spent = True
+                    return INFINITY
+                pending.append(sorted(get_successor_cells(cell), key=estimate, reverse=True))
+
+            untried = pending[-1]
+            if not untried:
+                pending.pop()
+                if not pending:
+                    return next_threshold
+                path.pop()
+                cell = -1
+                continue
+
+            cell = untried.pop()
+            depth = len(path)
+            if best_depth[cell] <= depth:
+                cell = -1
+                continue
+            bound = depth + estimate(cell)
+            if bound > threshold:
+                if bound < next_threshold:
+                    next_threshold = bound
+                cell = -1
+                continue
+
+            best_depth[cell] = depth
+            path.append(cell)
+            if cell == goal:
+                return None
+
+    def get_search_sizes(self):
+        return sum(len(untried) for untried in self.frontier), len(self.explored)
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        return [cell for untried in self.frontier for cell in untried] + list(self.explored)
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(sorted({cell for untried in self.frontier for cell in untried}))
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        """Get the cells of the current path (the path found, after a successful search)."""
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.explored)
+
+
+class IterativeDeepeningDepthFirstSearch(IterativeDeepeningSearch):
+    """
+    Iterative deepening depth-first search (IDDFS): the bound is the depth of a cell alone,
+    raised by one move per iteration.
+    """
+
+    def get_estimate(self, problem: SearchProblem) -> Callable[[int], float]:
+        return lambda cell: 0
+
+
+class IterativeDeepeningAStarSearch(IterativeDeepeningSearch):
+    """
+    Iterative deepening A* (IDA*, Korf 1985): the bound is the A* cost estimate g + h, with
+    the heuristic of the problem (Manhattan distance by default).
+    """
+
+    def get_estimate(self, problem: SearchProblem) -> Callable[[int], float]:
+        return problem.get_cell_heuristic()
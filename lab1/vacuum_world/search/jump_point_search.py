@@ -0,0 +1,216 @@
+"""
+Jump Point Search for 4-connected grids with uniform step costs.
+"""
+import heapq
+from array import array
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+class JumpPointSearch(BaseSearch):
+    """
+    Jump Point Search (JPS) is A* over "jump points" only.
+
+    From an expanded node, JPS scans in a straight line and skips every cell that a symmetric
+    path could also reach, stopping only at the goal or at cells with a forced neighbour
+    (a free side cell whose cell behind is blocked). Vertical scans also stop where a
+    horizontal scan would find a jump point. Successors are pruned by the direction of the
+    parent, so open areas are crossed without expanding the cells in between.
+
+    A vertical scan runs a horizontal scan both ways at every step, so the horizontal scans
+    are not run cell by cell: the first time a row is scanned in a direction, the jump point
+    reached from every cell of the row is computed at once with NumPy, and later scans of
+    the row are a lookup. A vertical scan thus costs constant time per step.
+
+    Only jump points count as expanded nodes; the returned path contains every cell.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+
+        # g[cell] is -1 until the cell is reached as a jump point, parent[cell] is -1 for the start
+        self.g = array('i')
+        self.parent = array('i')
+        self.closed = bytearray()
+
+        # The jump point of the horizontal scan from every cell, by row and direction
+        self.row_jumps: Dict[Tuple[int, int], array] = {}
+
+        # jump points in the order they were expanded
+        self.explored = array('i')
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform a Jump Point search to find a path to goal.
+        """
+        self.problem = problem
+        self.path = []
+
+        maze = problem.maze
+        width, height, grid = maze.width, maze.height, maze.grid
+        num_cells = width * height
+        g = array('i', [-1]) * num_cells
+        parent = array('i', [-1]) * num_cells
+        closed = bytearray(num_cells)
+        explored = array('i')
+        frontier = []
+        self.g, self.parent, self.closed, self.explored, self.frontier = g, parent, closed, explored, frontier
+        row_jumps = {}
+        self.row_jumps = row_jumps
+
+        start = problem.initial_cell
+        goal = problem.goal_cell
+        estimate = problem.get_cell_heuristic()
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        def walkable(x: int, y: int) -> bool:
+            return 0 <= x < width and 0 <= y < height and not grid[y * width + x]
+
+        goal_y, goal_x = divmod(goal, width)
+        columns = np.arange(width)
+
+        def scan_row(y: int, dx: int) -> array:
+            """Get the jump point of the horizontal scan from every cell of a row, -1 for none."""
+            # The row and the rows above and below, with blocked cells around the maze
+            free = np.zeros((3, width + 2), dtype=bool)
+            window = maze.get_grid_window(0, y - 1, width, y + 2)
+            first = 1 if y == 0 else 0
+            free[first:first + len(window), 1:-1] = window == 0
+
+            row = free[1, 1:-1]
+            behind = slice(1 - dx, width + 1 - dx)
+            forced = row & ((free[0, 1:-1] & ~free[0, behind]) | (free[2, 1:-1] & ~free[2, behind]))
+            if y == goal_y:
+                forced[goal_x] = row[goal_x]
+
+            # The scan from a cell ends at the next forced cell or wall in its direction
+            stops = forced | ~row
+            if dx > 0:
+                stop = np.minimum.accumulate(np.where(stops, columns, width)[::-1])[::-1]
+            else:
+                stop = np.maximum.accumulate(np.where(stops, columns, -1))
+            found = (stop >= 0) & (stop < width)
+            found[found] = forced[stop[found]]
+            jumps = array('i')
+            jumps.frombytes(np.where(found, y * width + stop, -1).astype(np.int32).tobytes())
+            return jumps
+
+        def jump_horizontal(x: int, y: int, dx: int) -> int:
+            if not (0 <= x < width and 0 <= y < height):
+                return -1
+            jumps = row_jumps.get((y, dx))
+            if jumps is None:
+                jumps = row_jumps[(y, dx)] = scan_row(y, dx)
+            return jumps[x]
+
+        def jump_vertical(x: int, y: int, dy: int) -> int:
+            while walkable(x, y):
+                cell = y * width + x
+                if cell == goal:
+                    return cell
+                if ((walkable(x - 1, y) and not walkable(x - 1, y - dy)) or
+                        (walkable(x + 1, y) and not walkable(x + 1, y - dy))):
+                    return cell
+                # Moving vertically, we must stop where a horizontal scan finds a jump point
+                if jump_horizontal(x + 1, y, 1) >= 0 or jump_horizontal(x - 1, y, -1) >= 0:
+                    return cell
+                y += dy
+            return -1
+
+        def successors(cell: int) -> List[int]:
+            y, x = divmod(cell, width)
+            parent_cell = parent[cell]
+            if parent_cell < 0:
+                directions = ((0, -1), (0, 1), (1, 0), (-1, 0))
+            else:
+                parent_y, parent_x = divmod(parent_cell, width)
+                dx = (x > parent_x) - (x < parent_x)
+                dy = (y > parent_y) - (y < parent_y)
+                if dx != 0:
+                    directions = ((0, -1), (0, 1), (dx, 0))
+                else:
+                    directions = ((-1, 0), (1, 0), (0, dy))
+
+            jump_points = []
+            for dx, dy in directions:
+                if dx != 0:
+                    jump_point = jump_horizontal(x + dx, y, dx)
+                else:
+                    jump_point = jump_vertical(x, y + dy, dy)
+                if jump_point >= 0:
+                    jump_points.append(jump_point)
+            return jump_points
+
+        g[start] = 0
+        h = estimate(start)
+        counter = 0
+        frontier.append((h, h, counter, start))
+
+        while frontier and len(explored) < self.max_depth:
+            _, _, _, cell = heappop(frontier)
+            if closed[cell]:
+                continue
+            closed[cell] = 1
+            explored.append(cell)
+
+            if cell == goal:
+                self.path = self.__find_path(goal)
+                return self.path
+
+            jump_points = successors(cell)
+            problem.add_expanded_nodes(len(jump_points), cell)
+
+            y, x = divmod(cell, width)
+            for jump_point in jump_points:
+                if closed[jump_point]:
+                    continue
+                jump_y, jump_x = divmod(jump_point, width)
+                next_g = g[cell] + abs(jump_x - x) + abs(jump_y - y)
+                old_g = g[jump_point]
+                if old_g < 0 or next_g < old_g:
+                    g[jump_point] = next_g
+                    parent[jump_point] = cell
+                    h = estimate(jump_point)
+                    counter += 1
+                    heappush(frontier, (next_g + h, h, counter, jump_point))
+
+        return []
+
+    def __find_path(self, goal: int) -> List[SearchNode]:
+        """
+        Expand the chain of jump points into the full path of neighbouring cells.
+        """
+        width = self.problem.maze.width
+        jump_points = self._trace_parents(self.parent, goal)
+
+        cells = [jump_points[0]]
+        for jump_point in jump_points[1:]:
+            step = width if abs(jump_point - cells[-1]) >= width else 1
+            if jump_point < cells[-1]:
+                step = -step
+            cells.extend(range(cells[-1] + step, jump_point + step, step))
+
+        return self._make_path(cells)
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        closed = self.closed
+        return chain(self.explored, (cell for _, _, _, cell in self.frontier if not closed[cell]))
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        closed = self.closed
+        cells = {cell for _, _, _, cell in self.frontier if not closed[cell]}
+        return self._make_nodes(sorted(cells), self.g)
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.explored, self.g)
@@ -1,61 +1,325 @@
 """
 Representation of a search problem, which contains the world, the initial state, and the goal.
 """
-from typing import List
+import math
+from enum import Enum
+from time import perf_counter_ns
+from typing import Callable, List, Optional, Sequence, Tuple
 from ..world.grid_pos import GridPos
 from ..world.world import World
+from .search_node import SearchNode, State
+from .search_stats import SearchStats
+
+
+class Heuristic(Enum):
+    """Estimates of the remaining cost to the goal, used by informed searches."""
+    MANHATTAN = "manhattan"
+    EUCLIDEAN = "euclidean"
+    NONE = "none"
 
 
 class SearchProblem:
-    """Search problem for navigating in the grid world."""
-    
-    def __init__(self, world: World, initial_state: GridPos, goal_state: GridPos):
+    """Search problem for navigating in the grid world.
+
+    By default states are GridPos objects. With ``use_cell_ids`` enabled, states are
+    integer cell ids (``y * width + x``) instead, which are much cheaper to create,
+    hash and compare. Searches then work on cell ids internally and use the decode
+    methods to hand GridPos-based nodes back to their callers.
+    """
+
+    def __init__(self,
+                 world: World,
+                 initial_state: GridPos,
+                 goal_state: GridPos,
+                 use_cell_ids: bool = False,
+                 heuristic: Heuristic = Heuristic.MANHATTAN):
         """Initialize the grid search problem.
-        
+
         Args:
             world: The world instance
             initial_state: The starting position
             goal_state: The target position
+            use_cell_ids: Whether search states are integer cell ids instead of GridPos objects
+            heuristic: The estimate of the remaining cost used by informed searches
         """
         self.world = world
+        self.maze = world.maze
         self.initial_state = initial_state
         self.goal_state = goal_state
+        self.use_cell_ids = use_cell_ids
+        self.heuristic = heuristic
+        self._cell_heuristic: Optional[Callable[[int], float]] = None
+        self.initial_cell = self.maze.cell_id(initial_state.x, initial_state.y)
+        self.goal_cell = self.maze.cell_id(goal_state.x, goal_state.y)
         self.num_expanded_nodes = 0  # A counter that is automatically managed
-    
-    def get_initial_state(self) -> GridPos:
+        self.stats: Optional[SearchStats] = None
+
+    def get_initial_state(self) -> State:
         """Get the initial state.
-        
+
         Returns:
-            The initial GridPos
+            The initial GridPos, or its cell id when using cell ids
         """
+        if self.use_cell_ids:
+            return self.initial_cell
         return self.initial_state
-    
-    def is_goal_state(self, state: GridPos) -> bool:
+
+    def is_goal_state(self, state: State) -> bool:
         """Check if a state is a goal state.
-        
+
         Args:
             state: The state to check
-            
+
         Returns:
             True if it's the goal state, False otherwise
         """
+        if self.use_cell_ids:
+            return state == self.goal_cell
         return state == self.goal_state
-    
-    def get_successors(self, state: GridPos) -> List[GridPos]:
+
+    def is_goal_reachable(self) -> bool:
+        """Check in constant time whether any path leads from the initial state to the goal.
+
+        Returns:
+            True if the initial and goal positions lie in the same connected region of the maze
+        """
+        return self.maze.are_connected(self.initial_state, self.goal_state)
+
+    def get_successors(self, state: State) -> Sequence[State]:
         """Get all reachable states from the given state.
-        
+
         Args:
             state: The current state
-            
+
+        Returns:
+            List of reachable GridPos objects, or cell ids when using cell ids
+        """
+        if self.use_cell_ids:
+            return self.get_successor_cells(state)
+        successors = self.maze.get_reachable_positions(state)
+        self.num_expanded_nodes += len(successors)
+        return successors
+
+    def get_successor_cells(self, cell: int) -> Sequence[int]:
+        """Get the ids of all cells reachable from the given cell.
+
+        Available in both state modes, for searches that always work on cell ids.
+
+        Args:
+            cell: The current cell id
+
         Returns:
-            List of reachable GridPos objects
+            Read-only sequence of reachable cell ids
         """
-        successors = self.world.maze.get_reachable_positions(state)
+        successors = self.maze.get_neighbor_cells(cell)
         self.num_expanded_nodes += len(successors)
         return successors
-    
+
+    def get_step_cost(self, state: State, next_state: State) -> int:
+        """Get the cost of moving from a state to one of its successors.
+
+        Args:
+            state: The current state
+            next_state: A successor of the current state
+
+        Returns:
+            The move cost of the cell moved into, 1 without terrain
+        """
+        if self.use_cell_ids:
+            return self.maze.get_cell_cost(next_state)
+        return self.maze.get_move_cost(next_state)
+
+    def get_step_costs(self) -> Optional[bytearray]:
+        """Get the move costs of all cells at once, for searches that work on cell ids.
+
+        Returns:
+            The cost of moving into every cell indexed by cell id, or None when every move costs 1
+        """
+        return self.maze.costs
+
+    def get_path_cost(self, path: List[SearchNode]) -> int:
+        """Get the total move cost of a path found by any search.
+
+        Args:
+            path: Nodes holding GridPos states, from the initial state to the last one
+
+        Returns:
+            The sum of the move costs of the cells moved into
+        """
+        get_move_cost = self.maze.get_move_cost
+        return sum(get_move_cost(node.state) for node in path[1:])
+
+    def estimate_cost_to_goal(self, state: State) -> float:
+        """Estimate the cost from a state to the goal with the problem's heuristic.
+
+        Args:
+            state: The state to estimate from
+
+        Returns:
+            A lower bound on the number of moves to the goal, which is also a lower bound
+            on their cost as no move costs less than 1
+        """
+        if self.use_cell_ids:
+            if self._cell_heuristic is None:
+                self._cell_heuristic = self.get_cell_heuristic()
+            return self._cell_heuristic(state)
+        dx = state.x - self.goal_state.x
+        dy = state.y - self.goal_state.y
+        if self.heuristic == Heuristic.MANHATTAN:
+            return abs(dx) + abs(dy)
+        elif self.heuristic == Heuristic.EUCLIDEAN:
+            return math.hypot(dx, dy)
+        return 0
+
+    def get_cell_heuristic(self, target: Optional[GridPos] = None) -> Callable[[int], float]:
+        """Get the problem's heuristic as a function of a cell id.
+
+        Searches on cell ids should fetch this once per search rather than once per node.
+
+        Args:
+            target: The position to estimate the cost to, the goal by default
+                    (backward searches estimate the cost to the initial state instead)
+
+        Returns:
+            A function estimating the cost from a cell to the target
+        """
+        width = self.maze.width
+        if target is None:
+            target = self.goal_state
+        goal_x, goal_y = target.x, target.y
+
+        if self.heuristic == Heuristic.MANHATTAN:
+            def manhattan(cell: int) -> int:
+                y, x = divmod(cell, width)
+                return abs(x - goal_x) + abs(y - goal_y)
+            return manhattan
+        elif self.heuristic == Heuristic.EUCLIDEAN:
+            def euclidean(cell: int) -> float:
+                y, x = divmod(cell, width)
+                return math.hypot(x - goal_x, y - goal_y)
+            return euclidean
+        return lambda cell: 0
+
+    def decode_state(self, state: State) -> GridPos:
+        """Convert a search state back to a GridPos.
+
+        Args:
+            state: A state of this problem
+
+        Returns:
+            The grid position of the state
+        """
+        if self.use_cell_ids:
+            return self.maze.cell_pos(state)
+        return state
+
+    def decode_path(self, path: List[SearchNode]) -> List[SearchNode]:
+        """Convert a path of nodes to nodes holding GridPos states, keeping the parent links.
+
+        Args:
+            path: Nodes from the root to the last node, as found by a search
+
+        Returns:
+            The same path with GridPos states (the input itself when not using cell ids)
+        """
+        if not self.use_cell_ids:
+            return path
+
+        decoded = []
+        parent = None
+        for node in path:
+            parent = SearchNode(self.maze.cell_pos(node.state), parent, None, node.cost)
+            decoded.append(parent)
+        return decoded
+
+    def decode_nodes(self, nodes: List[SearchNode]) -> List[SearchNode]:
+        """Convert unrelated nodes (e.g. a frontier) to nodes holding GridPos states.
+
+        Args:
+            nodes: Nodes found by a search
+
+        Returns:
+            Parentless copies of the nodes with GridPos states (the input itself when not using cell ids)
+        """
+        if not self.use_cell_ids:
+            return nodes
+        cell_pos = self.maze.cell_pos
+        return [SearchNode(cell_pos(node.state), None, None, node.cost) for node in nodes]
+
+    def add_expanded_nodes(self, count: int, cell: Optional[int] = None):
+        """Count nodes generated by a search that does not use the successor methods.
+
+        Args:
+            count: The number of generated nodes
+            cell: The id of the expanded cell, for tracing
+        """
+        self.num_expanded_nodes += count
+
+    def start_trace(self, stats: SearchStats, get_sizes: Callable[[], Tuple[int, int]]):
+        """Measure every expansion of the searches on this problem into the given stats.
+
+        The successor methods of this instance are replaced by measuring versions, so that
+        problems that are not traced keep running the plain methods at no extra cost.
+
+        Args:
+            stats: The measurements to update; nothing is measured unless it is traced
+            get_sizes: Gives the current (frontier size, visited size) of the search
+        """
+        self.stats = stats
+        if not stats.traced:
+            return
+
+        get_successors = self.get_successors
+        get_successor_cells = self.get_successor_cells
+        add_expanded_nodes = self.add_expanded_nodes
+        decode_path = self.decode_path
+        decode_state, cell_pos = self.decode_state, self.maze.cell_pos
+        on_expand = stats.on_expand
+
+        def expanded(pos: Optional[GridPos], count: int, started: int):
+            stats.add_phase_time("expand", perf_counter_ns() - started)
+            stats.expanded_nodes += 1
+            stats.observe_sizes(*get_sizes())
+            if on_expand is not None and pos is not None:
+                on_expand(pos)
+
+        def traced_get_successors(state: State) -> Sequence[State]:
+            started = perf_counter_ns()
+            successors = get_successors(state)
+            expanded(decode_state(state), len(successors), started)
+            return successors
+
+        def traced_get_successor_cells(cell: int) -> Sequence[int]:
+            started = perf_counter_ns()
+            successors = get_successor_cells(cell)
+            expanded(cell_pos(cell), len(successors), started)
+            return successors
+
+        def traced_add_expanded_nodes(count: int, cell: Optional[int] = None):
+            started = perf_counter_ns()
+            add_expanded_nodes(count, cell)
+            expanded(cell_pos(cell) if cell is not None else None, count, started)
+
+        def traced_decode_path(path: List[SearchNode]) -> List[SearchNode]:
+            started = perf_counter_ns()
+            decoded = decode_path(path)
+            stats.add_phase_time("decode", perf_counter_ns() - started)
+            return decoded
+
+        # With cell ids, get_successors goes through get_successor_cells, which is traced already
+        self.get_successors = traced_get_successor_cells if self.use_cell_ids else traced_get_successors
+        self.get_successor_cells = traced_get_successor_cells
+        self.add_expanded_nodes = traced_add_expanded_nodes
+        self.decode_path = traced_decode_path
+
+    def stop_trace(self):
+        """Restore the plain successor methods after a traced search."""
+        for name in ('get_successors', 'get_successor_cells', 'add_expanded_nodes', 'decode_path'):
+            self.__dict__.pop(name, None)
+        self.stats = None
+
     def reset_expanded_count(self):
         self.num_expanded_nodes = 0
-    
+
     def get_num_expanded_nodes(self) -> int:
-        return self.num_expanded_nodes
\ No newline at end of file
+        return self.num_expanded_nodes
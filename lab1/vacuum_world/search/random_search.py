@@ -26,6 +26,7 @@ class RandomSearch(BaseSearch):
         """
         Perform a random search to find a path to goal.
         """
+        self.problem = problem
         self.path = []
         
         initial_state = problem.get_initial_state()
@@ -39,7 +40,7 @@ class RandomSearch(BaseSearch):
             
             # Check if we've reached the goal
             if problem.is_goal_state(current_state):
-                self.path = path_nodes
+                self.path = problem.decode_path(path_nodes)
                 return self.path
             
             # Get all possible successors
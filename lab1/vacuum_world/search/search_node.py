@@ -1,18 +1,22 @@
 """
 Search node representation for search algorithms.
 """
-from typing import Optional, List
+from typing import Optional, List, Union
 from ..world.grid_pos import GridPos
 
 
+# A search state is a grid position, or its integer cell id for problems that use cell ids
+State = Union[GridPos, int]
+
+
 class SearchNode:
     """Represents a node in the search tree."""
     
-    def __init__(self, state: GridPos, parent: Optional['SearchNode'] = None, action: Optional[str] = None, cost: float = 0.0):
+    def __init__(self, state: State, parent: Optional['SearchNode'] = None, action: Optional[str] = None, cost: float = 0.0):
         """Initialize a search node.
         
         Args:
-            state: The state (grid position) this node represents
+            state: The state (grid position or cell id) this node represents
             parent: The parent node (None for root)
             action: The action taken to reach this state (unused, kept for compatibility)
             cost: The path cost to reach this state
@@ -37,11 +41,11 @@ class SearchNode:
         # Reverse to get path from root to current
         return list(reversed(path))
     
-    def get_state(self) -> GridPos:
-        """Get the state (GridPos) of this node.
+    def get_state(self) -> State:
+        """Get the state (GridPos or cell id) of this node.
         
         Returns:
-            The grid position state
+            The state of this node
         """
         return self.state
     
@@ -0,0 +1,72 @@
+"""
+Measurements of a search run, collected through the tracing hook of SearchProblem.
+"""
+from typing import Callable, Dict, Optional
+from ..world.grid_pos import GridPos
+
+
+# Called with the position of every expanded node, while a search is traced
+ExpansionCallback = Callable[[GridPos], None]
+
+
+class SearchStats:
+    """
+    Counters and timings of one search.
+
+    Every search gets the total time of the run and the number of generated nodes (the
+    successors handed out by the problem, which is what the lab reports as expanded nodes).
+    The per-expansion measurements (expanded nodes, peak frontier and visited sizes, time
+    spent generating successors, the expansion callback) are only taken when the search is
+    traced, as they add work to every expansion.
+
+    Timings are kept in nanoseconds per phase: "search" is the whole run, "expand" the time
+    spent generating successors and "decode" the time spent converting the path back from
+    cell ids.
+    """
+
+    def __init__(self, traced: bool = False, on_expand: Optional[ExpansionCallback] = None):
+        """Initialize empty measurements.
+
+        Args:
+            traced: Whether the per-expansion measurements are taken
+            on_expand: Optional callback for every expanded node (implies traced)
+        """
+        self.traced = traced or on_expand is not None
+        self.on_expand = on_expand
+
+        self.expanded_nodes = 0
+        self.generated_nodes = 0
+        self.peak_frontier_size = 0
+        self.peak_visited_size = 0
+        self.path_length = 0
+        self.phase_ns: Dict[str, int] = {}
+
+    def add_phase_time(self, phase: str, nanoseconds: int):
+        self.phase_ns[phase] = self.phase_ns.get(phase, 0) + nanoseconds
+
+    def observe_sizes(self, frontier_size: int, visited_size: int):
+        """Update the peak sizes of the frontier and of the visited set."""
+        if frontier_size > self.peak_frontier_size:
+            self.peak_frontier_size = frontier_size
+        if visited_size > self.peak_visited_size:
+            self.peak_visited_size = visited_size
+
+    def get_time_ms(self, phase: str = "search") -> float:
+        """Get the time spent in a phase, in msec."""
+        return self.phase_ns.get(phase, 0) / 1e6
+
+    def to_dict(self) -> dict:
+        """Get the measurements as a flat dict, with the phase timings in msec."""
+        result = {
+            'path_length': self.path_length,
+            'expanded_nodes': self.expanded_nodes,
+            'generated_nodes': self.generated_nodes,
+            'peak_frontier_size': self.peak_frontier_size,
+            'peak_visited_size': self.peak_visited_size,
+        }
+        for phase in self.phase_ns:
+            result[f'{phase}_ms'] = self.get_time_ms(phase)
+        return result
+
+    def __repr__(self) -> str:
+        return f"SearchStats({self.to_dict()})"
@@ -0,0 +1,115 @@
+"""
+Uniform-cost search (Dijkstra) on cell ids with a bucket queue, for small integer move costs.
+"""
+from array import array
+from itertools import chain
+from typing import Iterable, List, Tuple
+from .search_node import SearchNode
+from .problem import SearchProblem
+from .base_search import BaseSearch
+
+
+class BucketUniformCostSearch(BaseSearch):
+    """
+    Uniform-cost search with Dial's bucket queue, which finds the cheapest path on terrain.
+
+    Move costs are integers from 1 to C (the highest cost of the maze), so the frontier
+    only ever holds costs g to g + C. It is kept as a ring of C + 1 buckets, one list of cells
+    per cost modulo C + 1: adding a cell appends to a list and taking the next one pops from
+    the current bucket, both in constant time, where a binary heap would pay a logarithmic
+    factor and a tuple per entry. The best known cost g, the parent and whether a cell is
+    closed live in flat arrays, so a million-cell map costs about 9 MB besides the buckets.
+
+    A cell is added again when a cheaper path to it is found; the outdated entry is skipped
+    once its cell is closed (lazy deletion). Without terrain this is a breadth-first search.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier: List[List[int]] = []
+
+        # g[cell] is -1 until the cell is reached, parent[cell] is -1 for the start cell
+        self.g = array('i')
+        self.parent = array('i')
+        self.closed = bytearray()
+
+        # cells in the order they were expanded
+        self.explored = array('i')
+
+    def search(self, problem: SearchProblem) -> List[SearchNode]:
+        """
+        Perform a uniform-cost search to find the cheapest path to goal.
+        """
+        self.problem = problem
+        self.path = []
+
+        num_cells = problem.maze.width * problem.maze.height
+        g = array('i', [-1]) * num_cells
+        parent = array('i', [-1]) * num_cells
+        closed = bytearray(num_cells)
+        explored = array('i')
+        num_buckets = problem.maze.get_max_move_cost() + 1
+        buckets = [[] for _ in range(num_buckets)]
+        self.g, self.parent, self.closed, self.explored, self.frontier = g, parent, closed, explored, buckets
+
+        start = problem.initial_cell
+        goal = problem.goal_cell
+        costs = problem.get_step_costs()
+        get_successor_cells = problem.get_successor_cells
+
+        g[start] = 0
+        buckets[0].append(start)
+        queued = 1
+        cost = 0
+
+        while queued and len(explored) < self.max_depth:
+            bucket = buckets[cost % num_buckets]
+            if not bucket:
+                cost += 1
+                continue
+            cell = bucket.pop()
+            queued -= 1
+            if closed[cell]:
+                # Outdated entry, the cell was already expanded with a lower cost
+                continue
+            closed[cell] = 1
+            explored.append(cell)
+
+            if cell == goal:
+                self.path = self._path_from_parents(self.parent, self.g, goal)
+                return self.path
+
+            for next_cell in get_successor_cells(cell):
+                if closed[next_cell]:
+                    continue
+                next_g = cost + (costs[next_cell] if costs is not None else 1)
+                old_g = g[next_cell]
+                if old_g < 0 or next_g < old_g:
+                    g[next_cell] = next_g
+                    parent[next_cell] = cell
+                    buckets[next_g % num_buckets].append(next_cell)
+                    queued += 1
+
+        return []
+
+    def __frontier_cells(self) -> Iterable[int]:
+        closed = self.closed
+        return (cell for bucket in self.frontier for cell in bucket if not closed[cell])
+
+    def get_search_sizes(self) -> Tuple[int, int]:
+        return sum(len(bucket) for bucket in self.frontier), len(self.explored)
+
+    def get_expanded_cells(self) -> Iterable[int]:
+        if self.problem is None:
+            return ()
+        return chain(self.explored, self.__frontier_cells())
+
+    def get_frontier_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(sorted(set(self.__frontier_cells())), self.g)
+
+    def get_explored_nodes(self) -> List[SearchNode]:
+        if self.problem is None:
+            return []
+        return self._make_nodes(self.explored, self.g)
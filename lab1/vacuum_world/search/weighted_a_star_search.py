@@ -0,0 +1,33 @@
+"""
+Weighted A* search on cell ids, which takes the move costs of the terrain into account.
+"""
+from typing import Optional, Sequence
+from .problem import SearchProblem
+from .array_a_star_search import ArrayAStarSearch
+
+
+class WeightedAStarSearch(ArrayAStarSearch):
+    """
+    A* search on the move costs of the maze, with f(n) = g(n) + weight * h(n).
+
+    g(n) sums the move costs of the cells entered, so with the default weight of 1 the path
+    found is the cheapest one: the heuristic counts moves, and no move costs less than 1.
+    A weight above 1 makes the search greedier, expanding fewer cells for a path that costs
+    at most weight times the cheapest one. Closed cells are never reopened, which keeps that
+    bound and the search linear in the number of cells.
+
+    The search itself is the one of ArrayAStarSearch, given the weight and the move costs.
+    """
+
+    def __init__(self, weight: float = 1.0):
+        """
+        Args:
+            weight: The factor applied to the heuristic, at least 1
+        """
+        super().__init__()
+        if weight < 1:
+            raise ValueError(f"The heuristic weight must be at least 1, got {weight}")
+        self.weight = weight
+
+    def _get_step_costs(self, problem: SearchProblem) -> Optional[Sequence[int]]:
+        return problem.get_step_costs()
@@ -0,0 +1,227 @@
+"""
+Simulation running on its own thread, publishing a snapshot of the world after every step.
+
+The viewer renders the latest snapshot (or any recorded one, to scrub through the run) at
+its own frame rate, so that planning never stalls the window and drawing never slows down
+the agent.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, FrozenSet, List, Optional, Set, Tuple
+from .world.world import World, ChangeSet, WorldEvent
+from .world.tiled_maze import TiledMaze
+from .world.grid_pos import GridPos
+
+
+class WorldSnapshot:
+    """
+    The state of the world at the end of a tick, as far as it is drawn.
+
+    Snapshots are never changed once taken. Parts that did not change during a tick are
+    shared with the previous snapshot: the world replaces its path and expanded cell
+    bitmap instead of changing them, and the walls and dirt are only copied after ticks that
+    changed them. Recording every step of a long run therefore stays cheap.
+    """
+
+    def __init__(self,
+                 tick: int,
+                 agent_pos: Optional[GridPos],
+                 agent_positions: Tuple[GridPos, ...],
+                 dirt_collected: int,
+                 dirt_cells: FrozenSet[int],
+                 grid: Optional[bytes],
+                 current_path: List[GridPos],
+                 expanded_cells: bytes,
+                 cells: Set[int],
+                 terminated: bool):
+        """Initialize a snapshot.
+
+        Args:
+            tick: The number of ticks before this snapshot
+            agent_pos: The position of the (first) agent, None without agent
+            agent_positions: The positions of all agents
+            dirt_collected: The number of dirt particles the agents collected
+            dirt_cells: The cell ids of the uncleaned dirt
+            grid: The occupancy grid of the maze, one byte per cell; None for a TiledMaze,
+                  which is too large to copy, so that its current walls are read instead
+            current_path: The path marked for visualization
+            expanded_cells: The bitmap of the cells marked as expanded (see pack_cells)
+            cells: The dirty cells of the tick that led to this snapshot
+            terminated: Whether all dirt is cleaned
+        """
+        self.tick = tick
+        self.agent_pos = agent_pos
+        self.agent_positions = agent_positions
+        self.dirt_collected = dirt_collected
+        self.dirt_cells = dirt_cells
+        self.grid = grid
+        self.current_path = current_path
+        self.expanded_cells = expanded_cells
+        self.cells = cells
+        self.terminated = terminated
+
+
+def take_snapshot(world: World,
+                  previous: Optional[WorldSnapshot] = None,
+                  changes: Optional[ChangeSet] = None) -> WorldSnapshot:
+    """Take a snapshot of the world, sharing what did not change with the previous one.
+
+    Args:
+        world: The world at the end of a tick
+        previous: The snapshot of the tick before, None to copy everything
+        changes: The changes of the tick since the previous snapshot
+
+    Returns:
+        The snapshot
+    """
+    events = changes.events if changes is not None and previous is not None else set(WorldEvent)
+    if isinstance(world.maze, TiledMaze):
+        grid = None
+    elif WorldEvent.WALLS_CHANGED in events:
+        grid = bytes(world.maze.grid)
+    else:
+        grid = previous.grid
+    agent = world.agent
+    return WorldSnapshot(
+        tick=world.tick,
+        agent_pos=GridPos(agent.x, agent.y) if agent else None,
+        agent_positions=tuple(GridPos(agent.x, agent.y) for agent in world.agents),
+        dirt_collected=sum(agent.get_dirt_collected() for agent in world.agents),
+        dirt_cells=frozenset(world.uncleaned_dirt) if WorldEvent.DIRT_CLEANED in events else previous.dirt_cells,
+        grid=grid,
+        current_path=world.current_path,
+        expanded_cells=world.expanded_cells,
+        cells=changes.cells if changes is not None else set(),
+        terminated=world.is_terminated())
+
+
+class SimulationRunner:
+    """
+    Steps an agent in its world on a background thread and records a snapshot per tick.
+
+    The world must not be touched by other threads while the runner is active; they read
+    the snapshots instead. The run goes at a target rate of steps per second, or as fast as
+    possible, and can be paused. The last ``history_limit`` snapshots are kept for scrubbing.
+    """
+
+    def __init__(self,
+                 world: World,
+                 agent=None,
+                 steps_per_second: Optional[float] = 5,
+                 max_steps: Optional[int] = None,
+                 history_limit: int = 100000):
+        """Initialize the runner, with the current state of the world as first snapshot.
+
+        Args:
+            world: The world to simulate
+            agent: The agent (or fleet) to step, None to only show the world
+            steps_per_second: The target rate, None for full speed
+            max_steps: Steps after which the run stops, unlimited by default
+            history_limit: The number of snapshots kept
+        """
+        self.world = world
+        self.agent = agent
+        self.steps_per_second = steps_per_second
+        self.max_steps = max_steps
+        self.steps = 0
+
+        self.history: Deque[WorldSnapshot] = deque([take_snapshot(world)], maxlen=history_limit)
+        self.pending_changes: Optional[ChangeSet] = None
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        world.subscribe(self.on_tick)
+
+    def on_tick(self, changes: ChangeSet):
+        """Keep the changes of the current step (called by the world, on the simulation thread)."""
+        self.pending_changes = changes
+
+    def step(self):
+        """Step the agent once and record the snapshot of the tick, changed or not."""
+        self.pending_changes = None
+        self.agent.step(self.world)
+        self.steps += 1
+        changes = self.pending_changes if self.pending_changes is not None else ChangeSet(self.world.tick)
+        snapshot = take_snapshot(self.world, self.history[-1], changes)
+        with self.lock:
+            self.history.append(snapshot)
+
+    def start(self, paused: bool = False):
+        """Start the simulation thread."""
+        if not paused:
+            self.running.set()
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Step the agent until the world is clean, the step limit is reached or the runner is stopped."""
+        next_step = time.perf_counter()
+        while not self.stopped.is_set() and not self.is_finished():
+            if not self.running.wait(timeout=0.1):
+                next_step = time.perf_counter()
+                continue
+
+            self.step()
+
+            if self.steps_per_second:
+                next_step = max(next_step + 1.0 / self.steps_per_second, time.perf_counter() - 0.1)
+                delay = next_step - time.perf_counter()
+                if delay > 0:
+                    self.stopped.wait(delay)
+
+    def stop(self):
+        """Stop the simulation thread and wait for the current step to finish."""
+        self.stopped.set()
+        self.running.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def is_finished(self) -> bool:
+        return (self.agent is None or self.world.is_terminated() or
+                (self.max_steps is not None and self.steps >= self.max_steps))
+
+    def is_paused(self) -> bool:
+        return not self.running.is_set()
+
+    def set_paused(self, paused: bool):
+        if paused:
+            self.running.clear()
+        else:
+            self.running.set()
+
+    def set_rate(self, steps_per_second: Optional[float]):
+        """Set the target rate in steps per second, None for full speed."""
+        self.steps_per_second = steps_per_second
+
+    def skip_to_end(self):
+        """Run the rest of the simulation at full speed."""
+        self.set_rate(None)
+        self.set_paused(False)
+
+    def latest(self) -> WorldSnapshot:
+        return self.history[-1]
+
+    def get_tick_range(self):
+        """Get the first and last tick with a recorded snapshot."""
+        with self.lock:
+            return self.history[0].tick, self.history[-1].tick
+
+    def get_snapshot(self, tick: int) -> WorldSnapshot:
+        """Get the recorded snapshot of a tick, clamped to the recorded range."""
+        with self.lock:
+            first = self.history[0].tick
+            index = max(0, min(len(self.history) - 1, tick - first))
+            return self.history[index]
+
+    def get_changed_cells(self, from_tick: int, to_tick: int) -> Set[int]:
+        """Get the cells that may differ between the snapshots of two ticks (in either order)."""
+        if from_tick > to_tick:
+            from_tick, to_tick = to_tick, from_tick
+        cells = set()
+        with self.lock:
+            first = self.history[0].tick
+            for index in range(max(0, from_tick + 1 - first), min(len(self.history), to_tick + 1 - first)):
+                cells |= self.history[index].cells
+        return cells
@@ -9,11 +9,13 @@ PINK = (255, 192, 203)
 RED = (255, 0, 0)
 DARK_GREEN = (0, 128, 0)
 ORANGE = (255, 165, 0)
+BROWN = (150, 100, 50)
 
 COLORS = {
     'wall': BLACK,
     'floor': WHITE,
     'passage': GRAY,
+    'terrain': BROWN,
     'agent': GREEN,
     'dirt': BLUE,
     'path': YELLOW,
@@ -1,17 +1,60 @@
 """
 PyGame-based visualization for the vacuum world.
 """
+import math
 import pygame
 import sys
-import time
-from typing import Optional, Tuple
-from ..world.world import World
+from typing import Tuple
+import numpy as np
+from ..world.world import World, unpack_cells
 from ..world.grid_pos import GridPos
+from ..world.tiled_maze import TiledMaze
+from ..simulation import SimulationRunner, WorldSnapshot
 from .colors import COLORS
 
 
-class PygameViewer:    
-    def __init__(self, 
+# Palette indices of the cell layers, which hold one pixel per cell; free cells with terrain
+# have their move cost (2 and up) as maze index, and the overlay index is a combination of
+# the EXPANDED and PATH flags
+FLOOR, WALL = 0, 1
+NO_OVERLAY, EXPANDED, PATH = 0, 1, 2
+
+# Zoom limits in pixels per cell, and the smallest cells that get borders and inset overlays
+MIN_CELL_SIZE = 1
+MAX_CELL_SIZE = 64
+DETAIL_CELL_SIZE = 8
+
+# Largest jump between snapshots for which only the cells changed in between are redrawn
+INCREMENTAL_JUMP_LIMIT = 64
+
+# Steps scrubbed by the page keys
+SCRUB_PAGE = 50
+
+# Least number of cells on each side of the visible ones in the layers of a tiled maze
+LAYER_MARGIN = 64
+
+
+class PygameViewer:
+    """
+    Viewer of the world with zoom and pan, fast enough for grids of several hundred cells.
+    
+    The agent runs on the thread of a SimulationRunner, and the viewer draws the snapshots
+    it records: the latest one, or any earlier one while scrubbing through the run. Planning
+    thus never freezes the window, and the frame rate never limits the simulation.
+    
+    The maze and the overlays (expanded nodes and path) are kept in two palette surfaces of
+    one pixel per cell. Moving to another snapshot only recomputes the cells that changed
+    in between. A frame scales the visible part of both layers to the zoom into a cached
+    view, which is only rebuilt when the layers, the zoom or the position change; dirt and
+    the agent are drawn on top for the visible cells only.
+    
+    The layers of a TiledMaze cover the cells around the visible ones only, and are placed
+    again when the view leaves them, so that the viewer reads the tiles on screen and not
+    the whole maze. Such a maze is not copied into the snapshots: its current walls are
+    shown whichever snapshot is on screen.
+    """
+    
+    def __init__(self,
                  world: World,
                  agent=None,
                  cell_size: int = 25,
@@ -22,22 +65,19 @@ class PygameViewer:
         Args:
             world: The world to visualize
             agent: The agent to control (optional)
-            cell_size: Size of each grid cell in pixels
+            cell_size: Initial size of each grid cell in pixels
             window_width: Window width
             window_height: Window height
         """
         self.world = world
         self.agent = agent
-        self.cell_size = cell_size
+        self.cell_size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, cell_size))
         self.window_width = window_width
         self.window_height = window_height
         
-        self.grid_width = world.width * cell_size
-        self.grid_height = world.height * cell_size
-        
-        # Center the grid in the window
-        self.grid_offset_x = (window_width - self.grid_width) // 2
-        self.grid_offset_y = (window_height - self.grid_height) // 2
+        # Screen position of the top left corner of the grid, centered in the window
+        self.grid_offset_x = (window_width - world.width * self.cell_size) // 2
+        self.grid_offset_y = (window_height - world.height * self.cell_size) // 2
         
         pygame.init()
         self.screen = pygame.display.set_mode((window_width, window_height))
@@ -47,20 +87,39 @@ class PygameViewer:
         self.small_font = pygame.font.Font(None, 16)
         
         self.running = True
-        self.paused = False
         self.show_expanded = True
         self.show_path = True
+        self.dragging = False
         
         # Initial simulation timing
         self.simulation_speed = 5  # Steps per second
-        self.last_step_time = 0
+        self.fast_forward = False
+        self.runner = SimulationRunner(world, agent, self.simulation_speed)
+        
+        # The snapshot on screen, and whether it follows the latest one
+        self.snapshot: WorldSnapshot = self.runner.latest()
+        self.follow_latest = True
+        
+        # Cell layers, indexed [x, y] like pygame.surfarray, for the cells of layer_rect: the
+        # whole world, or the cells around the visible ones (starting at the agent) if tiled
+        self.windowed = isinstance(world.maze, TiledMaze)
+        if self.windowed and world.agent:
+            self.grid_offset_x = window_width // 2 - world.agent.x * self.cell_size
+            self.grid_offset_y = window_height // 2 - world.agent.y * self.cell_size
+        self.layer_rect = pygame.Rect(0, 0, world.width, world.height)
+        self.path_cells = set()
+        self.place_layers()
+        
+        # The scaled view of the layers, and its screen position
+        self.view = None
+        self.view_pos = (0, 0)
     
     def grid_to_screen(self, grid_pos: GridPos) -> Tuple[int, int]:
         """Convert grid coordinates to screen coordinates.
         
         Args:
             grid_pos: Grid position
-            
+        
         Returns:
             Screen coordinates (x, y)
         """
@@ -68,75 +127,247 @@ class PygameViewer:
         screen_y = self.grid_offset_y + grid_pos.y * self.cell_size
         return (screen_x, screen_y)
     
-    def draw_grid(self):
-        for x in range(self.world.width):
-            for y in range(self.world.height):
-                pos = GridPos(x, y)
-                screen_x, screen_y = self.grid_to_screen(pos)
-                rect = pygame.Rect(screen_x, screen_y, self.cell_size, self.cell_size)
-                
-                # Draw cell background
-                if self.world.maze.is_wall(pos):
-                    pygame.draw.rect(self.screen, COLORS['wall'], rect)
-                else:
-                    pygame.draw.rect(self.screen, COLORS['floor'], rect)
-                
-                # Draw cell border
-                pygame.draw.rect(self.screen, COLORS['border'], rect, 1)
+    def screen_to_grid(self, screen_x: int, screen_y: int) -> Tuple[float, float]:
+        """Convert screen coordinates to (fractional) grid coordinates."""
+        return ((screen_x - self.grid_offset_x) / self.cell_size,
+                (screen_y - self.grid_offset_y) / self.cell_size)
     
-    def draw_expanded_nodes(self):
-        if not self.show_expanded:
+    def get_visible_cells(self) -> Tuple[int, int, int, int]:
+        """Get the range of cells inside the window.
+        
+        Returns:
+            The first and past-the-end columns and rows (x0, y0, x1, y1), empty if none is visible
+        """
+        size = self.cell_size
+        x0 = max(0, -self.grid_offset_x // size)
+        y0 = max(0, -self.grid_offset_y // size)
+        x1 = min(self.world.width, math.ceil((self.window_width - self.grid_offset_x) / size))
+        y1 = min(self.world.height, math.ceil((self.window_height - self.grid_offset_y) / size))
+        return x0, y0, max(x0, x1), max(y0, y1)
+    
+    def place_layers(self):
+        """Create the cell layers, around the visible cells for a tiled maze, and draw them."""
+        if self.windowed:
+            x0, y0, x1, y1 = self.get_visible_cells()
+            margin_x = max(LAYER_MARGIN, (x1 - x0) // 2)
+            margin_y = max(LAYER_MARGIN, (y1 - y0) // 2)
+            rect = pygame.Rect(x0 - margin_x, y0 - margin_y, x1 - x0 + 2 * margin_x, y1 - y0 + 2 * margin_y)
+            self.layer_rect = rect.clip(pygame.Rect(0, 0, self.world.width, self.world.height))
+            if not self.layer_rect.w or not self.layer_rect.h:
+                self.layer_rect = pygame.Rect(0, 0, 1, 1)
+        
+        size = self.layer_rect.size
+        self.maze_layer = pygame.Surface(size, depth=8)
+        self.maze_layer.set_palette(self.make_maze_palette())
+        self.overlay_layer = pygame.Surface(size, depth=8)
+        self.overlay_layer.set_palette([COLORS['background'], COLORS['expanded'], COLORS['path'], COLORS['path']] +
+                                       [COLORS['background']] * 252)
+        self.overlay_layer.set_colorkey(NO_OVERLAY)
+        self.overlay = np.zeros(size, dtype=np.uint8)
+        self.rebuild_layers()
+    
+    def get_walls(self, snapshot: WorldSnapshot) -> np.ndarray:
+        """Get the occupancy grid of a snapshot for the cells of the layers, indexed [x, y]."""
+        rect = self.layer_rect
+        if snapshot.grid is None:
+            return self.world.maze.get_grid_window(rect.left, rect.top, rect.right, rect.bottom).T
+        walls = np.frombuffer(snapshot.grid, dtype=np.uint8).reshape(self.world.height, self.world.width).T
+        return walls[rect.left:rect.right, rect.top:rect.bottom]
+    
+    def get_expanded(self, snapshot: WorldSnapshot) -> np.ndarray:
+        """Get 1 for the cells of the layers marked as expanded in a snapshot and 0 for the others, indexed [x, y]."""
+        width, height, rect = self.world.width, self.world.height, self.layer_rect
+        if not self.windowed:
+            return unpack_cells(snapshot.expanded_cells, width * height).reshape(height, width).T
+        # Read the bits of the layer cells only
+        cells = (np.arange(rect.left, rect.right)[:, np.newaxis] +
+                 np.arange(rect.top, rect.bottom)[np.newaxis, :] * width)
+        bitmap = np.frombuffer(snapshot.expanded_cells, dtype=np.uint8)
+        return (bitmap[cells >> 3] >> (7 - (cells & 7)).astype(np.uint8)) & 1
+    
+    def make_maze_palette(self):
+        """Get the maze layer colors: floor, wall, then terrain shades up to the highest move cost."""
+        max_cost = self.world.maze.get_max_move_cost()
+        floor, terrain = COLORS['floor'], COLORS['terrain']
+        shades = []
+        for cost in range(2, 256):
+            t = min(1.0, (cost - 1) / max(1, max_cost - 1))
+            shades.append(tuple(round(a + (b - a) * t) for a, b in zip(floor, terrain)))
+        return [floor, COLORS['wall']] + shades
+    
+    def get_maze_cells(self, snapshot: WorldSnapshot) -> np.ndarray:
+        """Get the maze layer indices of a snapshot indexed [x, y]: walls and the terrain of free cells."""
+        walls = self.get_walls(snapshot)
+        maze, rect = self.world.maze, self.layer_rect
+        if not maze.has_terrain():
+            return walls
+        costs = maze.get_cost_window(rect.left, rect.top, rect.right, rect.bottom).T
+        return np.where(walls, WALL, np.where(costs > 1, costs, FLOOR)).astype(np.uint8)
+    
+    def get_maze_index(self, cell: int) -> int:
+        """Get the maze layer index of a cell from the current walls and terrain."""
+        maze = self.world.maze
+        if maze.grid[cell]:
+            return WALL
+        cost = maze.get_cell_cost(cell)
+        return cost if cost > 1 else FLOOR
+    
+    def rebuild_layers(self):
+        """Build both cell layers from scratch from the snapshot on screen."""
+        snapshot = self.snapshot
+        walls = self.get_walls(snapshot)
+        pygame.surfarray.blit_array(self.maze_layer, self.get_maze_cells(snapshot))
+        
+        width, rect = self.world.width, self.layer_rect
+        self.path_cells = {pos.y * width + pos.x for pos in snapshot.current_path}
+        self.overlay.fill(NO_OVERLAY)
+        if self.show_expanded:
+            self.overlay[:] = self.get_expanded(snapshot) * EXPANDED
+        if self.show_path:
+            for pos in snapshot.current_path:
+                if rect.collidepoint(pos.x, pos.y):
+                    self.overlay[pos.x - rect.left, pos.y - rect.top] |= PATH
+        self.overlay[walls == WALL] = NO_OVERLAY
+        pygame.surfarray.blit_array(self.overlay_layer, self.overlay)
+        self.view = None
+    
+    def show_snapshot(self, snapshot: WorldSnapshot):
+        """Put another snapshot on screen, updating the cell layers for the cells changed in between."""
+        previous = self.snapshot
+        if snapshot is previous:
             return
-            
-        for pos in self.world.expanded_nodes:
-            if not self.world.maze.is_wall(pos):
-                screen_x, screen_y = self.grid_to_screen(pos)
-                rect = pygame.Rect(screen_x + 2, screen_y + 2, 
-                                 self.cell_size - 4, self.cell_size - 4)
-                pygame.draw.rect(self.screen, COLORS['expanded'], rect)
-    
-    def draw_path(self):
-        if not self.show_path:
+        self.snapshot = snapshot
+        if abs(snapshot.tick - previous.tick) > INCREMENTAL_JUMP_LIMIT:
+            self.rebuild_layers()
             return
-            
-        for pos in self.world.current_path:
-            if not self.world.maze.is_wall(pos):
-                screen_x, screen_y = self.grid_to_screen(pos)
-                rect = pygame.Rect(screen_x + 4, screen_y + 4, 
-                                 self.cell_size - 8, self.cell_size - 8)
-                pygame.draw.rect(self.screen, COLORS['path'], rect)
+        
+        if snapshot.current_path is not previous.current_path:
+            self.path_cells = {pos.y * self.world.width + pos.x for pos in snapshot.current_path}
+        
+        overlay, grid, width = self.overlay, snapshot.grid, self.world.width
+        if grid is None:
+            grid = self.world.maze.grid
+        rect, left, top = self.layer_rect, self.layer_rect.left, self.layer_rect.top
+        expanded = snapshot.expanded_cells
+        # Cells of a tiled maze whose walls may have changed, redrawn one by one
+        maze_cells = []
+        for cell in self.runner.get_changed_cells(previous.tick, snapshot.tick):
+            y, x = divmod(cell, width)
+            if not rect.collidepoint(x, y):
+                continue
+            code = NO_OVERLAY
+            if not grid[cell]:
+                if self.show_expanded and expanded[cell >> 3] & (0x80 >> (cell & 7)):
+                    code |= EXPANDED
+                if self.show_path and cell in self.path_cells:
+                    code |= PATH
+            overlay[x - left, y - top] = code
+            if snapshot.grid is None:
+                maze_cells.append(cell)
+        
+        if snapshot.grid is not previous.grid:
+            pygame.surfarray.blit_array(self.maze_layer, self.get_maze_cells(snapshot))
+        elif maze_cells:
+            pixels = pygame.surfarray.pixels2d(self.maze_layer)
+            for cell in maze_cells:
+                y, x = divmod(cell, width)
+                pixels[x - left, y - top] = self.get_maze_index(cell)
+            del pixels
+        pygame.surfarray.blit_array(self.overlay_layer, self.overlay)
+        self.view = None
+    
+    def scrub(self, steps: int):
+        """Show the snapshot a number of steps before or after the one on screen, pausing the view there."""
+        self.follow_latest = False
+        self.show_snapshot(self.runner.get_snapshot(self.snapshot.tick + steps))
+    
+    def set_simulation_speed(self, speed: int):
+        self.simulation_speed = speed
+        self.fast_forward = False
+        self.runner.set_rate(speed)
+        print(f"Simulation speed: {self.simulation_speed} steps/sec")
+    
+    def build_view(self):
+        """Scale the visible part of the cell layers to the zoom, with cell borders when large enough."""
+        x0, y0, x1, y1 = self.get_visible_cells()
+        if x1 > x0 and y1 > y0 and not self.layer_rect.contains(pygame.Rect(x0, y0, x1 - x0, y1 - y0)):
+            self.place_layers()
+        size = self.cell_size
+        self.view_pos = (self.grid_offset_x + x0 * size, self.grid_offset_y + y0 * size)
+        self.view = pygame.Surface(((x1 - x0) * size, (y1 - y0) * size))
+        if x1 == x0 or y1 == y0:
+            return
+        
+        left, top = self.layer_rect.topleft
+        area = pygame.Rect(x0 - left, y0 - top, x1 - x0, y1 - y0)
+        self.view.blit(pygame.transform.scale(self.maze_layer.subsurface(area), self.view.get_size()), (0, 0))
+        
+        if size < DETAIL_CELL_SIZE:
+            overlay = pygame.transform.scale(self.overlay_layer.subsurface(area), self.view.get_size())
+            overlay.set_colorkey(NO_OVERLAY)
+            self.view.blit(overlay, (0, 0))
+            return
+        
+        # Large cells: overlays as insets, like the expanded nodes and path of the original drawing
+        visible = self.overlay[x0 - left:x1 - left, y0 - top:y1 - top]
+        for code, color, inset in ((EXPANDED, COLORS['expanded'], 2), (PATH, COLORS['path'], 4)):
+            inset = max(1, inset * size // 25)
+            for x, y in zip(*np.nonzero(visible & code)):
+                pygame.draw.rect(self.view, color,
+                                 (x * size + inset, y * size + inset, size - 2 * inset, size - 2 * inset))
+        
+        width, height = self.view.get_size()
+        for x in range(0, width + 1, size):
+            pygame.draw.line(self.view, COLORS['border'], (x, 0), (x, height))
+        for y in range(0, height + 1, size):
+            pygame.draw.line(self.view, COLORS['border'], (0, y), (width, y))
+    
+    def draw_grid(self):
+        """Draw the maze and the overlays from the cached view."""
+        if self.view is None:
+            self.build_view()
+        self.screen.blit(self.view, self.view_pos)
     
     def draw_dirt(self):
-        for dirt in self.world.get_all_uncleaned_dirt():
-            screen_x, screen_y = self.grid_to_screen(dirt)
-            center_x = screen_x + self.cell_size // 2
-            center_y = screen_y + self.cell_size // 2
-            radius = max(3, self.cell_size // 6)
-            pygame.draw.circle(self.screen, COLORS['dirt'], (center_x, center_y), radius)
+        x0, y0, x1, y1 = self.get_visible_cells()
+        radius = max(1, self.cell_size // 6)
+        width = self.world.width
+        for cell in self.snapshot.dirt_cells:
+            y, x = divmod(cell, width)
+            if x0 <= x < x1 and y0 <= y < y1:
+                screen_x, screen_y = self.grid_to_screen(GridPos(x, y))
+                center_x = screen_x + self.cell_size // 2
+                center_y = screen_y + self.cell_size // 2
+                pygame.draw.circle(self.screen, COLORS['dirt'], (center_x, center_y), radius)
     
     def draw_agent(self):
-        if self.world.agent:
-            agent_pos = GridPos(self.world.agent.x, self.world.agent.y)
+        # Keep the agents visible when zoomed out
+        radius = max(3, self.cell_size // 4)
+        for agent_pos in self.snapshot.agent_positions:
             screen_x, screen_y = self.grid_to_screen(agent_pos)
             center_x = screen_x + self.cell_size // 2
             center_y = screen_y + self.cell_size // 2
-            radius = max(4, self.cell_size // 4)
             
             # Use different color if agent is on dirt
-            dirt_at_pos = self.world.get_dirt_at_position(agent_pos)
+            dirt_at_pos = agent_pos.y * self.world.width + agent_pos.x in self.snapshot.dirt_cells
             color = COLORS['agent_with_dirt'] if dirt_at_pos else COLORS['agent']
             
             pygame.draw.circle(self.screen, color, (center_x, center_y), radius)
     
     def draw_ui(self):
-        if self.world.agent:
+        snapshot = self.snapshot
+        if snapshot.agent_pos:
+            if len(snapshot.agent_positions) > 1:
+                agent_line = f"Agents: {len(snapshot.agent_positions)}"
+            else:
+                agent_line = f"Agent: ({snapshot.agent_pos.x}, {snapshot.agent_pos.y})"
             info_lines = [
-                f"Agent: ({self.world.agent.x}, {self.world.agent.y})",
-                f"Dirt collected: {self.world.agent.get_dirt_collected()}",
-                f"Remaining dirt: {len(self.world.get_all_uncleaned_dirt())}",
-                f"Status: {'COMPLETED' if self.world.is_terminated() else 'RUNNING'}"
+                agent_line,
+                f"Dirt collected: {snapshot.dirt_collected}",
+                f"Remaining dirt: {len(snapshot.dirt_cells)}",
+                f"Status: {'COMPLETED' if snapshot.terminated else 'RUNNING'}"
             ]
-            
+        
         else:
             info_lines = ["No agent present"]
         
@@ -153,6 +384,10 @@ class PygameViewer:
             "E - Toggle expanded nodes",
             "P - Toggle path display",
             "+/- - Speed up/down",
+            "X - Fast-forward, END - Skip to end",
+            ",/. PGUP/PGDN - Scrub, L - Live",
+            "Wheel - Zoom, drag/arrows - Pan",
+            "F - Fit to window",
             "ESC - Exit"
         ]
         
@@ -164,49 +399,116 @@ class PygameViewer:
         
         # Draw mode indicators
         mode_text = []
-        if self.paused:
+        if self.runner.is_paused():
             mode_text.append("PAUSED")
-        mode_text.append(f"Speed: {self.simulation_speed}/sec")
+        if self.fast_forward:
+            mode_text.append("Speed: fast-forward")
+        else:
+            mode_text.append(f"Speed: {self.simulation_speed}/sec")
+        _, last_tick = self.runner.get_tick_range()
+        if self.follow_latest:
+            mode_text.append(f"Step: {snapshot.tick}")
+        else:
+            mode_text.append(f"Step: {snapshot.tick}/{last_tick} (L - Live)")
+        mode_text.append(f"FPS: {self.clock.get_fps():.0f}")
         
         for i, text in enumerate(mode_text):
             surface = self.font.render(text, True, COLORS['text'])
             self.screen.blit(surface, (self.window_width - 200, 10 + i * 25))
     
+    def zoom(self, factor: float, center: Tuple[int, int]):
+        """Change the cell size by a factor, keeping the cell under the screen position in place."""
+        size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, round(self.cell_size * factor)))
+        if size == self.cell_size:
+            size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, self.cell_size + (1 if factor > 1 else -1)))
+        grid_x, grid_y = self.screen_to_grid(*center)
+        self.cell_size = size
+        self.grid_offset_x = round(center[0] - grid_x * size)
+        self.grid_offset_y = round(center[1] - grid_y * size)
+        self.view = None
+    
+    def pan(self, dx: int, dy: int):
+        """Move the grid on the screen by a number of pixels."""
+        self.grid_offset_x += dx
+        self.grid_offset_y += dy
+        self.view = None
+    
+    def fit_to_window(self):
+        """Zoom so that the whole grid fits in the window, and center it."""
+        self.cell_size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, self.window_width // self.world.width,
+                                                self.window_height // self.world.height))
+        self.grid_offset_x = (self.window_width - self.world.width * self.cell_size) // 2
+        self.grid_offset_y = (self.window_height - self.world.height * self.cell_size) // 2
+        self.view = None
+    
     def handle_events(self):
         """Handle PyGame events."""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
-            
+
+            elif event.type == pygame.MOUSEWHEEL:
+                self.zoom(1.25 ** event.y, pygame.mouse.get_pos())
+
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):
+                self.dragging = True
+
+            elif event.type == pygame.MOUSEBUTTONUP and event.button in (1, 2, 3):
+                self.dragging = False
+
+            elif event.type == pygame.MOUSEMOTION and self.dragging:
+                self.pan(*event.rel)
+
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
 
                 elif event.key == pygame.K_SPACE:
-                    self.paused = not self.paused
+                    self.runner.set_paused(not self.runner.is_paused())
 
                 elif event.key == pygame.K_e:
                     self.show_expanded = not self.show_expanded
+                    self.rebuild_layers()
 
                 elif event.key == pygame.K_p:
                     self.show_path = not self.show_path
+                    self.rebuild_layers()
+
+                elif event.key == pygame.K_f:
+                    self.fit_to_window()
+
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+                    step_x, step_y = self.window_width // 10, self.window_height // 10
+                    self.pan(step_x * ((event.key == pygame.K_LEFT) - (event.key == pygame.K_RIGHT)),
+                             step_y * ((event.key == pygame.K_UP) - (event.key == pygame.K_DOWN)))
 
                 elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
                     # (Quick fix for some non-standard keyboard layouts)
-                    self.simulation_speed = min(20, self.simulation_speed + 1)
-                    print(f"Simulation speed: {self.simulation_speed} steps/sec")
+                    self.set_simulation_speed(min(20, self.simulation_speed + 1))
 
                 elif event.key == pygame.K_MINUS:
-                    self.simulation_speed = max(1, self.simulation_speed - 1)
-                    print(f"Simulation speed: {self.simulation_speed} steps/sec")
-    
-    
-    def update(self):
-        """Update the visualization (called by world when it changes)."""
-        # TODO: Find out where this is used
-        # This method is called by the world when it changes
-        # We don't need to do anything here as we redraw everything each frame
-        pass
+                    self.set_simulation_speed(max(1, self.simulation_speed - 1))
+
+                elif event.key == pygame.K_x:
+                    self.fast_forward = not self.fast_forward
+                    self.runner.set_rate(None if self.fast_forward else self.simulation_speed)
+
+                elif event.key == pygame.K_END:
+                    self.fast_forward = True
+                    self.follow_latest = True
+                    self.runner.skip_to_end()
+
+                elif event.key in (pygame.K_COMMA, pygame.K_PERIOD):
+                    self.scrub(1 if event.key == pygame.K_PERIOD else -1)
+
+                elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                    self.scrub(SCRUB_PAGE if event.key == pygame.K_PAGEDOWN else -SCRUB_PAGE)
+
+                elif event.key == pygame.K_HOME:
+                    self.scrub(-self.snapshot.tick)
+
+                elif event.key == pygame.K_l:
+                    self.follow_latest = True
     
     def render(self):
         """Render one frame of the visualization."""
@@ -215,8 +517,6 @@ class PygameViewer:
         
         # Draw world elements
         self.draw_grid()
-        self.draw_expanded_nodes()
-        self.draw_path()
         self.draw_dirt()
         self.draw_agent()
         self.draw_ui()
@@ -230,20 +530,18 @@ class PygameViewer:
         Args:
             target_fps: Target frames per second
         """
-        while self.running:
-            self.handle_events()
-            
-            if not self.paused and self.agent:
-                current_time = time.time()
-                step_interval = 1.0 / self.simulation_speed
+        self.runner.start()
+        try:
+            while self.running:
+                self.handle_events()
                 
-                if current_time - self.last_step_time >= step_interval:
-                    if not self.world.is_terminated():
-                        self.agent.step(self.world)
-                        self.last_step_time = current_time
-            
-            self.render()
-            self.clock.tick(target_fps)
+                if self.follow_latest:
+                    self.show_snapshot(self.runner.latest())
+                
+                self.render()
+                self.clock.tick(target_fps)
+        finally:
+            self.runner.stop()
         
         pygame.quit()
-        sys.exit()
\ No newline at end of file
+        sys.exit()
@@ -1,9 +1,13 @@
 """
 Maze generation and representation for the vacuum world.
 """
+import hashlib
 import random
+from itertools import repeat, starmap
+from array import array
 from enum import Enum
-from typing import List, Set
+from typing import Callable, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
 from .grid_pos import GridPos
 
 
@@ -16,15 +20,339 @@ class MazeType(Enum):
 
 
 class Maze:
-    """Represents the maze structure of the world."""
-    
+    """Represents the maze structure of the world.
+
+    Walls are stored in a flat occupancy grid with one byte per cell, where the
+    cell with coordinates (x, y) has the id ``y * width + x``. A non-zero byte
+    marks a wall.
+
+    The free neighbours of every cell are kept in a compressed sparse row (CSR)
+    table: the neighbours of cell ``c`` are ``neighbors[offsets[c]:offsets[c + 1]]``.
+    The table is built on first use after generation and rebuilt after walls change.
+
+    The free cells are also labelled by connected region, so that whether two cells
+    are connected is answered in constant time. Like the neighbour table, the labels
+    are computed on first use and again after walls change.
+
+    Walls may change after generation (doors, obstacles). Every change goes through
+    set_walls, which tells the registered change listeners which cells changed, so that
+    planners can repair their results instead of starting over.
+
+    Free cells may have a terrain (carpet, tiles) that makes them slower to cross: moving
+    into a cell costs its integer move cost, from 1 to MAX_MOVE_COST. The costs are kept in
+    a second flat grid of one byte per cell, which only exists once a cost other than 1 was
+    set; until then every move costs 1. The searches that count moves rather than costs
+    ignore the terrain.
+    """
+
+    MAX_MOVE_COST = 255
+
     def __init__(self, width: int, height: int, maze_type: MazeType = MazeType.MAZE_LABYRINTH):
         self.width = width
         self.height = height
         self.maze_type = maze_type
-        self.walls: Set[GridPos] = set()
+        self.grid = self._new_grid()
+        self.costs: Optional[bytearray] = None
+        self._adjacency: Optional[Tuple[array, memoryview]] = None
+        self._fingerprint: Optional[bytes] = None
+        self._components: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._change_listeners: List[Callable[[List[int]], None]] = []
         self._generate_maze()
-    
+
+    def _new_grid(self) -> bytearray:
+        """Get the occupancy grid of the maze before generation, all cells free."""
+        return bytearray(self.width * self.height)
+
+    def __getstate__(self) -> dict:
+        """
+        Pickle the layout only, e.g. to plan in worker processes: the tables are rebuilt on
+        first use and the change listeners stay with the original.
+        """
+        state = self.__dict__.copy()
+        state['_adjacency'] = None
+        state['_components'] = None
+        state['_change_listeners'] = []
+        return state
+
+    def cell_id(self, x: int, y: int) -> int:
+        """Get the id of the cell at (x, y)."""
+        return y * self.width + x
+
+    def cell_pos(self, cell: int) -> GridPos:
+        """Get the position of the cell with the given id."""
+        y, x = divmod(cell, self.width)
+        return GridPos(x, y)
+
+    @property
+    def walls(self) -> Set[GridPos]:
+        """Set of all wall positions, built from the occupancy grid on each access."""
+        width = self.width
+        walls = np.flatnonzero(self.get_grid_window(0, 0, width, self.height))
+        return {GridPos(cell % width, cell // width) for cell in walls.tolist()}
+
+    def set_wall(self, pos: GridPos, wall: bool = True) -> bool:
+        """
+        Add or remove a wall at a position inside the maze.
+
+        Returns:
+            True if the cell changed
+        """
+        return bool(self.set_walls([(pos, wall)]))
+
+    def set_walls(self, changes: Iterable[Tuple[GridPos, bool]]) -> List[int]:
+        """
+        Add or remove walls at positions inside the maze, as one edit.
+
+        Args:
+            changes: Pairs of a position and whether it becomes a wall
+
+        Returns:
+            The ids of the cells that actually changed, which are also passed to the change listeners
+        """
+        changed = []
+        for pos, wall in changes:
+            cell = pos.y * self.width + pos.x
+            value = 1 if wall else 0
+            if self.grid[cell] != value:
+                self.grid[cell] = value
+                changed.append(cell)
+
+        if changed:
+            self._adjacency = None
+            self._fingerprint = None
+            self._components = None
+            for listener in list(self._change_listeners):
+                listener(changed)
+        return changed
+
+    def add_change_listener(self, listener: Callable[[List[int]], None]):
+        """
+        Register a function that is called with the ids of the changed cells after every edit.
+        """
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[List[int]], None]):
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def get_move_cost(self, pos: GridPos) -> int:
+        """
+        Get the cost of moving into a position.
+        """
+        if self.costs is None:
+            return 1
+        return self.costs[pos.y * self.width + pos.x]
+
+    def get_cell_cost(self, cell: int) -> int:
+        """
+        Get the cost of moving into the cell with the given id.
+        """
+        if self.costs is None:
+            return 1
+        return self.costs[cell]
+
+    def get_max_move_cost(self) -> int:
+        """
+        Get the highest move cost of the maze, walls included.
+        """
+        if self.costs is None:
+            return 1
+        return max(self.costs)
+
+    def has_terrain(self) -> bool:
+        """
+        Check whether any move costs more than 1.
+        """
+        return self.costs is not None
+
+    def set_costs(self, changes: Iterable[Tuple[GridPos, int]]) -> List[int]:
+        """
+        Set the move costs of positions inside the maze.
+
+        The change listeners are not called: they are told about wall changes only.
+
+        Args:
+            changes: Pairs of a position and the cost of moving into it
+
+        Returns:
+            The ids of the cells whose cost changed
+
+        Raises:
+            ValueError: If a cost is not between 1 and MAX_MOVE_COST
+        """
+        changed = []
+        for pos, cost in changes:
+            if not 1 <= cost <= self.MAX_MOVE_COST:
+                raise ValueError(f"Move costs must be between 1 and {self.MAX_MOVE_COST}, got {cost}")
+            cell = pos.y * self.width + pos.x
+            if self.get_cell_cost(cell) != cost:
+                if self.costs is None:
+                    self.costs = self._new_cost_grid()
+                self.costs[cell] = cost
+                changed.append(cell)
+
+        if changed:
+            self._fingerprint = None
+        return changed
+
+    def _new_cost_grid(self) -> bytearray:
+        """
+        Get a grid of move costs of 1 for every cell.
+        """
+        return bytearray(b'\x01') * (self.width * self.height)
+
+    def generate_terrain(self, max_cost: int, seed: Optional[int] = None):
+        """
+        Cover about 40% of the maze with patches of terrain of move costs 2 to max_cost.
+
+        The patches are grown from noise by the same cellular automaton as the caves, and
+        drawn from their own random generator, so adding terrain to a seeded world leaves its
+        maze, agent and dirt where they were.
+
+        Args:
+            max_cost: The highest move cost; 1 leaves the maze without terrain
+            seed: The seed of the random generator of the patches
+        """
+        # Share of the noise that seeds the patches; the automaton shrinks them to about 40%
+        PATCH_CHANCE = 0.6
+
+        if max_cost <= 1:
+            return
+        if max_cost > self.MAX_MOVE_COST:
+            raise ValueError(f"Move costs must be between 1 and {self.MAX_MOVE_COST}, got {max_cost}")
+        rng = np.random.default_rng(seed)
+        patches = (rng.random((self.height, self.width)) < PATCH_CHANCE).astype(np.uint8)
+        for _ in range(4):
+            patches = self._cellular_automata_step(patches, 5)
+
+        # Every patch gets a single cost, chosen per 8x8 block of the maze
+        blocks = rng.integers(2, max_cost + 1, size=((self.height + 7) // 8, (self.width + 7) // 8))
+        block_costs = np.repeat(np.repeat(blocks, 8, axis=0), 8, axis=1)[:self.height, :self.width]
+        costs = np.where(patches.astype(bool), block_costs, 1).astype(np.uint8)
+        self.costs = bytearray(costs.tobytes())
+        self._fingerprint = None
+
+    def get_fingerprint(self) -> bytes:
+        """
+        Get a digest of the maze size, walls and move costs; mazes with equal fingerprints have the same layout.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(f"{self.width}x{self.height}:".encode())
+            digest.update(self.grid)
+            if self.costs is not None:
+                digest.update(self.costs)
+            self._fingerprint = digest.digest()
+        return self._fingerprint
+
+    def get_adjacency(self) -> Tuple[array, memoryview]:
+        """
+        Get the CSR neighbour table as (offsets, neighbors), building it if needed; neighbors is read-only.
+        """
+        if self._adjacency is None:
+            self._adjacency = self._build_adjacency()
+        return self._adjacency
+
+    def _build_adjacency(self) -> Tuple[array, memoryview]:
+        width, height = self.width, self.height
+        free = self.get_grid_window(0, 0, width, height) == 0
+        cells = np.arange(width * height, dtype=np.int32).reshape(height, width)
+
+        # One column per direction, in the order north, south, east, west; -1 marks no neighbour
+        candidates = np.full((height, width, 4), -1, dtype=np.int32)
+        candidates[1:, :, 0] = np.where(free[:-1, :], cells[:-1, :], -1)
+        candidates[:-1, :, 1] = np.where(free[1:, :], cells[1:, :], -1)
+        candidates[:, :-1, 2] = np.where(free[:, 1:], cells[:, 1:], -1)
+        candidates[:, 1:, 3] = np.where(free[:, :-1], cells[:, :-1], -1)
+        candidates = candidates.reshape(-1, 4)
+
+        present = candidates >= 0
+        counts = np.zeros(width * height + 1, dtype=np.int32)
+        np.cumsum(present.sum(axis=1), out=counts[1:])
+
+        offsets = array('i')
+        offsets.frombytes(counts.tobytes())
+        neighbors = array('i')
+        neighbors.frombytes(candidates[present].tobytes())
+        return offsets, memoryview(neighbors).toreadonly()
+
+    def get_component_labels(self) -> np.ndarray:
+        """
+        Get the connected region label of every cell as a flat array indexed by cell id.
+
+        Regions are numbered from 0 in order of their lowest cell id; walls have label -1.
+        """
+        if self._components is None:
+            self._components = self._label_components()
+        return self._components[0]
+
+    def get_component_sizes(self) -> np.ndarray:
+        """
+        Get the number of free cells of every connected region, indexed by label.
+        """
+        if self._components is None:
+            self._components = self._label_components()
+        return self._components[1]
+
+    def get_component(self, pos: GridPos) -> int:
+        """
+        Get the label of the connected region of a position, or -1 for walls and outside positions.
+        """
+        if not (0 <= pos.x < self.width and 0 <= pos.y < self.height):
+            return -1
+        return int(self.get_component_labels()[pos.y * self.width + pos.x])
+
+    def are_connected(self, a: GridPos, b: GridPos) -> bool:
+        """
+        Check whether a path of free cells leads from one position to another.
+        """
+        component = self.get_component(a)
+        return component >= 0 and component == self.get_component(b)
+
+    def _label_components(self) -> Tuple[np.ndarray, np.ndarray]:
+        width, height = self.width, self.height
+        free = self.get_grid_window(0, 0, width, height) == 0
+
+        # Number the horizontal runs of free cells in cell id order
+        run_start = free.copy()
+        run_start[:, 1:] &= ~free[:, :-1]
+        run = (np.cumsum(run_start, dtype=np.int32) - 1).reshape(height, width)
+        num_runs = int(run_start.sum())
+
+        # Runs in neighbouring rows are joined where they touch; one edge per stretch of contact
+        touch = free[:-1, :] & free[1:, :]
+        contact_start = touch.copy()
+        contact_start[:, 1:] &= ~touch[:, :-1]
+        upper, lower = run[:-1, :][contact_start], run[1:, :][contact_start]
+
+        # Union-find in bulk: hook the larger root of every edge onto the smaller one,
+        # then compress all paths by pointer jumping, until no edge joins two roots
+        parent = np.arange(num_runs, dtype=np.int32)
+        while True:
+            root_upper, root_lower = parent[upper], parent[lower]
+            differ = root_upper != root_lower
+            if not differ.any():
+                break
+            upper, lower = upper[differ], lower[differ]
+            root_upper, root_lower = root_upper[differ], root_lower[differ]
+            np.minimum.at(parent,
+                          np.maximum(root_upper, root_lower),
+                          np.minimum(root_upper, root_lower))
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+
+        # Every root is the first run of its region, so renumbering the roots in increasing
+        # order numbers the regions by their lowest cell id
+        roots, run_labels = np.unique(parent, return_inverse=True)
+        component = np.full(width * height, -1, dtype=np.int32)
+        free = free.ravel()
+        component[free] = run_labels.astype(np.int32)[run.ravel()[free]]
+        sizes = np.bincount(component[free], minlength=len(roots)).astype(np.int32)
+        return component, sizes
+
     def _generate_maze(self):
         """Generate the maze structure based on the maze type."""
         if self.maze_type == MazeType.MAZE_ONLY_BORDER:
@@ -35,17 +363,34 @@ class Maze:
             self._generate_caves()
         else:
             self._generate_labyrinth()
-    
+
+    def _grid_view(self) -> np.ndarray:
+        """
+        Get a writable (height, width) NumPy view of the occupancy grid.
+        """
+        return np.frombuffer(self.grid, dtype=np.uint8).reshape(self.height, self.width)
+
+    @staticmethod
+    def _draw_walls(columns: int, rows: int, chance: float) -> np.ndarray:
+        """
+        Draw random walls for a block of cells in bulk, as a (rows, columns) boolean array.
+
+        The values come from the ``random`` module, in the column-by-column order of the
+        original per-cell loops, so that a seeded world keeps producing the same maze.
+        """
+        columns, rows = max(columns, 0), max(rows, 0)
+        count = columns * rows
+        draws = np.fromiter(starmap(random.random, repeat((), count)), dtype=np.float64, count=count)
+        return (draws < chance).reshape(columns, rows).T
+
     def _generate_border_only(self):
         """Generate a maze with walls only on the border."""
-        for x in range(self.width):
-            self.walls.add(GridPos(x, 0))
-            self.walls.add(GridPos(x, self.height - 1))
-        
-        for y in range(self.height):
-            self.walls.add(GridPos(0, y))
-            self.walls.add(GridPos(self.width - 1, y))
-    
+        cells = self._grid_view()
+        cells[0, :] = 1
+        cells[-1, :] = 1
+        cells[:, 0] = 1
+        cells[:, -1] = 1
+
     def _generate_office_maze(self):
         """
         Generate an office-like maze with a few rooms and openings between them.
@@ -54,19 +399,19 @@ class Maze:
 
         # Higher values of this make the probability that no path exists quite high
         WALL_CHANCE = 0.6
-        
+
         room_size = min(self.width, self.height) // 4
-        
-        for x in range(room_size, self.width - room_size + 1, room_size):
-            for y in range(1, self.height - 1):
-                if random.random() < WALL_CHANCE:
-                    self.walls.add(GridPos(x, y))
-        
-        for y in range(room_size, self.height - room_size + 1, room_size):
-            for x in range(1, self.width - 1):
-                if random.random() < WALL_CHANCE:
-                    self.walls.add(GridPos(x, y))
-    
+        cells = self._grid_view()
+
+        columns = list(range(room_size, self.width - room_size + 1, room_size))
+        walls = self._draw_walls(len(columns), self.height - 2, WALL_CHANCE)
+        cells[1:self.height - 1, columns] |= walls
+
+        # These walls were drawn row by row
+        rows = list(range(room_size, self.height - room_size + 1, room_size))
+        walls = self._draw_walls(len(rows), self.width - 2, WALL_CHANCE).T
+        cells[rows, 1:self.width - 1] |= walls
+
     def _generate_labyrinth(self):
         """
         Generate a maze with random walls.
@@ -75,96 +420,167 @@ class Maze:
 
         # Higher values of this make the probability that no path exists quite high
         WALL_CHANCE = 0.3
-        
-        for x in range(2, self.width - 2):
-            for y in range(2, self.height - 2):
-                if random.random() < WALL_CHANCE:
-                    self.walls.add(GridPos(x, y))
-    
+
+        walls = self._draw_walls(self.width - 4, self.height - 4, WALL_CHANCE)
+        if walls.size:
+            self._grid_view()[2:self.height - 2, 2:self.width - 2] |= walls
+
     def _generate_caves(self):
         """
         Generate cave-like structures using a cellular automaton.
         """
-        # TODO: add cave connectivity check
-
+        # The cave can be fragmented into several regions; World places the agent and the dirt
+        # in a single one of them (see get_component_labels).
         # Feel free to tweak these values if you find that the cave is too often fragmented into non-connex components.
         INITIAL_WALL_CHANCE = 0.61
         WALL_THRESHOLD = 5
-        
-        for x in range(self.width):
-            for y in range(self.height):
-                if random.random() < INITIAL_WALL_CHANCE:
-                    self.walls.add(GridPos(x, y))
-        
+
+        cells = self._draw_walls(self.width, self.height, INITIAL_WALL_CHANCE).astype(np.uint8)
+
         for _ in range(5):
-            self._cellular_automata_step(WALL_THRESHOLD)
-        
+            cells = self._cellular_automata_step(cells, WALL_THRESHOLD)
+
+        self.grid = bytearray(cells.tobytes())
         self._generate_border_only()
-    
-    def _cellular_automata_step(self, wall_threshold = 5):
-        new_walls = set()
-        
-        for x in range(1, self.width - 1):
-            for y in range(1, self.height - 1):
-                wall_neighbors = self._count_wall_neighbors(x, y)
-                
-                if wall_neighbors >= wall_threshold:
-                    new_walls.add(GridPos(x, y))
-        
-        self.walls = new_walls
-    
-    def _count_wall_neighbors(self, x: int, y: int) -> int:
-        count = 0
-        
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
+
+    @staticmethod
+    def _cellular_automata_step(cells: np.ndarray, wall_threshold: int = 5) -> np.ndarray:
+        """
+        Turn every inner cell with at least ``wall_threshold`` walls among its eight neighbours
+        into a wall and every other cell into floor. Cells outside the grid count as walls.
+        """
+        height, width = cells.shape
+        padded = np.pad(cells, 1, constant_values=1)
+
+        wall_neighbors = np.zeros((height, width), dtype=np.uint8)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
                 if dx == 0 and dy == 0:
                     continue
-                
-                neighbor_x = x + dx
-                neighbor_y = y + dy
-                
-                if (neighbor_x < 0 or neighbor_x >= self.width or 
-                    neighbor_y < 0 or neighbor_y >= self.height):
-                    count += 1
-                elif GridPos(neighbor_x, neighbor_y) in self.walls:
-                    count += 1
-        
-        return count
-    
+                wall_neighbors += padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+
+        new_cells = np.zeros((height, width), dtype=np.uint8)
+        new_cells[1:-1, 1:-1] = wall_neighbors[1:-1, 1:-1] >= wall_threshold
+        return new_cells
+
     def is_wall(self, pos: GridPos) -> bool:
-        return pos in self.walls
-    
+        """
+        Check if a position holds a wall. Positions outside the maze are not walls.
+        """
+        x, y = pos.x, pos.y
+        return (0 <= x < self.width and
+                0 <= y < self.height and
+                self.grid[y * self.width + x] != 0)
+
     def is_valid_position(self, pos: GridPos) -> bool:
         """
         Check if a position is valid (within bounds and not a wall).
         """
-        return (0 <= pos.x < self.width and 
-                0 <= pos.y < self.height and 
-                not self.is_wall(pos))
-    
+        x, y = pos.x, pos.y
+        return (0 <= x < self.width and
+                0 <= y < self.height and
+                not self.grid[y * self.width + x])
+
     def get_reachable_positions(self, pos: GridPos) -> List[GridPos]:
         """
-        Get all reachable positions from a given position.
+        Get all reachable positions from a given position, in the order north, south, east, west.
         """
+        x, y = pos.x, pos.y
+        width, height, grid = self.width, self.height, self.grid
+
+        if 0 <= x < width and 0 <= y < height:
+            return [GridPos(cell % width, cell // width)
+                    for cell in self.get_neighbor_cells(y * width + x)]
+
+        # Positions outside the maze can still border it
+        cell = y * width + x
         reachable = []
-        
-        for neighbor in pos.get_neighbors():
-            if self.is_valid_position(neighbor):
-                reachable.append(neighbor)
+
+        if 0 <= x < width:
+            if 0 < y <= height and not grid[cell - width]:
+                reachable.append(GridPos(x, y - 1))
+            if -1 <= y < height - 1 and not grid[cell + width]:
+                reachable.append(GridPos(x, y + 1))
+        if 0 <= y < height:
+            if -1 <= x < width - 1 and not grid[cell + 1]:
+                reachable.append(GridPos(x + 1, y))
+            if 0 < x <= width and not grid[cell - 1]:
+                reachable.append(GridPos(x - 1, y))
 
         return reachable
-    
-    def get_all_free_positions(self) -> List[GridPos]:
+
+    def get_neighbor_cells(self, cell: int) -> Sequence[int]:
+        """
+        Get the ids of all free cells next to a cell, in the order north, south, east, west.
+
+        The result is a read-only view into the CSR neighbour table, not a copy.
         """
-        Get all free (non-wall) positions in the maze.
+        if self._adjacency is None:
+            self._adjacency = self._build_adjacency()
+        offsets, neighbors = self._adjacency
+        return neighbors[offsets[cell]:offsets[cell + 1]]
+
+    def get_free_cells(self, component: Optional[int] = None) -> array:
         """
-        free_positions = []
+        Get the ids of all free (non-wall) cells, ordered by column then row.
 
-        for x in range(self.width):
-            for y in range(self.height):
-                pos = GridPos(x, y)
-                if self.is_valid_position(pos):
-                    free_positions.append(pos)
+        Args:
+            component: If given, only the cells of the connected region with this label
+        """
+        if component is None:
+            free = self.get_grid_window(0, 0, self.width, self.height).T.ravel() == 0
+        else:
+            labels = self.get_component_labels().reshape(self.height, self.width)
+            free = labels.T.ravel() == component
+        columns_first = np.flatnonzero(free)
+        x, y = np.divmod(columns_first, self.height)
+        cells = array('i')
+        cells.frombytes((y * self.width + x).astype(np.int32).tobytes())
+        return cells
 
-        return free_positions
\ No newline at end of file
+    def get_region_cells(self, pos: GridPos, limit: Optional[int] = None) -> array:
+        """
+        Get the ids of the free cells reachable from a position, in breadth-first order.
+
+        Args:
+            pos: The position to start from; nothing is reachable from walls and outside positions
+            limit: If given, the sweep stops after this many cells, so that it only touches
+                   the part of the maze around the position
+        """
+        cells = array('i')
+        if not self.is_valid_position(pos):
+            return cells
+        start = pos.y * self.width + pos.x
+        cells.append(start)
+        visited = {start}
+        get_neighbor_cells = self.get_neighbor_cells
+        head = 0
+        while head < len(cells) and (limit is None or len(cells) < limit):
+            for next_cell in get_neighbor_cells(cells[head]):
+                if next_cell not in visited:
+                    visited.add(next_cell)
+                    cells.append(next_cell)
+            head += 1
+        return cells[:limit] if limit is not None else cells
+
+    def get_grid_window(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """
+        Copy the occupancy grid of the columns x0 to x1 and rows y0 to y1 (past the end) into a (rows, columns) array.
+        """
+        return self._grid_view()[max(0, y0):y1, max(0, x0):x1].copy()
+
+    def get_cost_window(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """
+        Copy the move costs of the columns x0 to x1 and rows y0 to y1 (past the end) into a (rows, columns) array.
+        """
+        if self.costs is None:
+            return np.ones_like(self.get_grid_window(x0, y0, x1, y1))
+        costs = np.frombuffer(self.costs, dtype=np.uint8).reshape(self.height, self.width)
+        return costs[max(0, y0):y1, max(0, x0):x1].copy()
+
+    def get_all_free_positions(self) -> List[GridPos]:
+        """
+        Get all free (non-wall) positions in the maze, ordered by column then row.
+        """
+        width = self.width
+        return [GridPos(cell % width, cell // width) for cell in self.get_free_cells()]
@@ -0,0 +1,177 @@
+"""
+Byte grid stored in fixed-size tiles of a memory-mapped file, for worlds too large for memory.
+"""
+import mmap
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+import numpy as np
+
+
+# Called with the column and row of a tile that is used for the first time, it returns its
+# initial content: tile_size * tile_size bytes, row by row
+TileFill = Callable[[int, int], bytes]
+
+
+def _smallest_tile_size() -> int:
+    """Get the smallest power of two whose square is a multiple of the mmap offset granularity."""
+    size = 1
+    while (size * size) % mmap.ALLOCATIONGRANULARITY:
+        size *= 2
+    return size
+
+
+class TiledGrid:
+    """
+    A grid of one byte per cell with the interface of a bytearray indexed by cell id.
+
+    The cells are grouped into square tiles of tile_size x tile_size cells, and every tile is
+    stored contiguously in a file, so that it can be memory-mapped on its own. A tile is
+    mapped when a cell of it is first read or written, and unmapped again when more than
+    max_resident_tiles tiles are mapped, the least recently used first. Its content stays in
+    the file, so the memory used by the grid is bounded by the mapped tiles, whatever the
+    size of the grid.
+
+    Tiles that were never used are not stored either: the file is extended without being
+    written, and the fill function (if any) computes the content of a tile on first use.
+    Grids of billions of cells are thus created in constant time.
+
+    Reads and writes may come from several threads, e.g. the simulation and the viewer.
+    Mapping and unmapping tiles is done under a lock; a tile is never unmapped while a
+    reader still uses it, since unmapping only drops the reference of the grid.
+    """
+
+    # Tiles start at file offsets that are multiples of the mmap granularity of the platform
+    MIN_TILE_SIZE = _smallest_tile_size()
+    DEFAULT_TILE_SIZE = max(256, MIN_TILE_SIZE)
+    DEFAULT_MAX_RESIDENT_TILES = 256
+
+    def __init__(self,
+                 width: int,
+                 height: int,
+                 tile_size: int = DEFAULT_TILE_SIZE,
+                 max_resident_tiles: int = DEFAULT_MAX_RESIDENT_TILES,
+                 path: Optional[str] = None,
+                 fill: Optional[TileFill] = None):
+        """Initialize the grid, with all cells 0 or as given by the fill function.
+
+        Args:
+            width: Width of the grid in cells
+            height: Height of the grid in cells
+            tile_size: Width and height of the tiles, a power of two of at least MIN_TILE_SIZE
+            max_resident_tiles: The number of tiles that may be mapped at once, at least 1
+            path: The file of the tiles, which is overwritten; a temporary file by default
+            fill: Computes the initial content of a tile from its column and row
+
+        Raises:
+            ValueError: If the tile size or the number of resident tiles is invalid
+        """
+        if tile_size < self.MIN_TILE_SIZE or tile_size & (tile_size - 1):
+            raise ValueError(f"The tile size must be a power of two of at least {self.MIN_TILE_SIZE}, "
+                             f"got {tile_size}")
+        if max_resident_tiles < 1:
+            raise ValueError(f"At least one tile must be resident, got {max_resident_tiles}")
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.max_resident_tiles = max_resident_tiles
+        self.tiles_x = (width + tile_size - 1) // tile_size
+        self.tiles_y = (height + tile_size - 1) // tile_size
+        self.tile_bytes = tile_size * tile_size
+        self._shift = tile_size.bit_length() - 1
+        self._mask = tile_size - 1
+        self._size = width * height
+        self._fill = fill
+
+        self._file = open(path, 'w+b') if path is not None else tempfile.TemporaryFile()
+        self._file.truncate(self.tiles_x * self.tiles_y * self.tile_bytes)
+
+        # Mapped tiles by tile index (row * tiles_x + column), least recently used first
+        self._tiles: 'OrderedDict[int, mmap.mmap]' = OrderedDict()
+        # Whether every tile got its content from the fill function yet
+        self._filled = bytearray(self.tiles_x * self.tiles_y)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, cell: int) -> int:
+        if not 0 <= cell < self._size:
+            raise IndexError("grid index out of range")
+        y, x = divmod(cell, self.width)
+        shift, mask = self._shift, self._mask
+        tile = self._get_tile((y >> shift) * self.tiles_x + (x >> shift))
+        return tile[((y & mask) << shift) | (x & mask)]
+
+    def __setitem__(self, cell: int, value: int):
+        if not 0 <= cell < self._size:
+            raise IndexError("grid assignment index out of range")
+        y, x = divmod(cell, self.width)
+        shift, mask = self._shift, self._mask
+        tile = self._get_tile((y >> shift) * self.tiles_x + (x >> shift))
+        tile[((y & mask) << shift) | (x & mask)] = value
+
+    def _get_tile(self, index: int) -> mmap.mmap:
+        tiles = self._tiles
+        tile = tiles.get(index)
+        if tile is None:
+            return self._map_tile(index)
+        try:
+            tiles.move_to_end(index)
+        except KeyError:
+            # Unmapped by another thread in the meantime; the reference is still valid
+            pass
+        return tile
+
+    def _map_tile(self, index: int) -> mmap.mmap:
+        with self._lock:
+            tile = self._tiles.get(index)
+            if tile is not None:
+                return tile
+            tile = mmap.mmap(self._file.fileno(), self.tile_bytes,
+                             offset=index * self.tile_bytes, access=mmap.ACCESS_WRITE)
+            if not self._filled[index]:
+                if self._fill is not None:
+                    tile[:] = self._fill(index % self.tiles_x, index // self.tiles_x)
+                self._filled[index] = 1
+            self._tiles[index] = tile
+            while len(self._tiles) > self.max_resident_tiles:
+                # The mapping goes away with its last reference; its pages stay in the file
+                self._tiles.popitem(last=False)
+            return tile
+
+    def read_window(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """Copy the cells of the columns x0 to x1 and rows y0 to y1 (past the end) into a (rows, columns) array."""
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.width, x1), min(self.height, y1)
+        window = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=np.uint8)
+        size, shift = self.tile_size, self._shift
+        for tile_y in range(y0 >> shift, ((y1 - 1) >> shift) + 1 if y1 > y0 else 0):
+            for tile_x in range(x0 >> shift, ((x1 - 1) >> shift) + 1 if x1 > x0 else 0):
+                left, top = tile_x * size, tile_y * size
+                tile = np.frombuffer(self._get_tile(tile_y * self.tiles_x + tile_x),
+                                     dtype=np.uint8).reshape(size, size)
+                ax0, ay0 = max(x0, left), max(y0, top)
+                ax1, ay1 = min(x1, left + size), min(y1, top + size)
+                window[ay0 - y0:ay1 - y0, ax0 - x0:ax1 - x0] = tile[ay0 - top:ay1 - top, ax0 - left:ax1 - left]
+        return window
+
+    def get_num_resident_tiles(self) -> int:
+        """Get the number of tiles mapped right now, at most max_resident_tiles."""
+        return len(self._tiles)
+
+    def get_num_used_tiles(self) -> int:
+        """Get the number of tiles read or written at least once."""
+        return self._filled.count(1)
+
+    def flush(self):
+        """Write the mapped tiles to the file."""
+        for tile in list(self._tiles.values()):
+            tile.flush()
+
+    def close(self):
+        """Unmap all tiles and close the file, removing it if it was temporary."""
+        with self._lock:
+            self._tiles.clear()
+            self._file.close()
@@ -0,0 +1,297 @@
+"""
+Maze whose occupancy grid lives in memory-mapped tiles, generated tile by tile as it is used.
+"""
+import hashlib
+import random
+from array import array
+from itertools import repeat
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+import numpy as np
+from .grid_pos import GridPos
+from .maze import Maze, MazeType
+from .tiled_grid import TiledGrid
+
+
+# Salts of the random generators of a tile, one per use
+WALL_SALT, CAVE_SALT, PATCH_SALT, BLOCK_SALT = range(4)
+
+# Regions of fewer free cells than this are told apart by are_connected
+POCKET_LIMIT = 16384
+
+
+class TiledMaze(Maze):
+    """A maze for worlds too large to hold in memory, e.g. 10000 x 10000 cells.
+
+    The occupancy grid (and the move costs, if any) is a TiledGrid: fixed-size tiles in a
+    memory-mapped file, of which only the recently used ones are mapped. A tile is generated
+    when it is first used, from random generators seeded by the maze seed and the position of
+    the tile, so creating the maze costs nothing and a search only pays for the tiles it
+    reaches. The mazes look like those of Maze for the same type, but are not the same for
+    the same seed.
+
+    The searches, get_reachable_positions and the viewer work as on any maze, reading the
+    neighbours of a cell from the grid. Where a maze works on the whole grid, it differs:
+
+    - The connected regions are not labelled: all free cells count as one region for
+      get_component. are_connected sweeps the region of a position instead, up to
+      POCKET_LIMIT cells, so it tells the pockets of the maze apart from each other and from
+      the larger regions, but not two larger regions. get_region_cells lists the free cells
+      around a position without reading the whole maze.
+    - The CSR neighbour table (used by DistanceField and the target selections built on it),
+      get_free_cells and walls read every tile, which generates the whole maze and takes
+      memory for the whole grid: they only suit tiled mazes that would fit in memory.
+    - The fingerprint is a digest of the seed and the edits made since generation rather
+      than of the cells.
+    """
+
+    def __init__(self,
+                 width: int,
+                 height: int,
+                 maze_type: MazeType = MazeType.MAZE_LABYRINTH,
+                 seed: Optional[int] = None,
+                 tile_size: int = TiledGrid.DEFAULT_TILE_SIZE,
+                 max_resident_tiles: int = TiledGrid.DEFAULT_MAX_RESIDENT_TILES,
+                 path: Optional[str] = None):
+        """Initialize the maze, without generating any tile yet.
+
+        Args:
+            width: Width of the maze
+            height: Height of the maze
+            maze_type: Type of maze to generate
+            seed: Seed of the tile generators, drawn from the ``random`` module by default
+            tile_size: Width and height of the tiles (see TiledGrid)
+            max_resident_tiles: The number of tiles of each grid mapped at once
+            path: The file of the occupancy grid, a temporary file by default; the move costs
+                  go to the same path with the suffix ``.costs``
+        """
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.tile_size = tile_size
+        self.max_resident_tiles = max_resident_tiles
+        self.path = path
+        super().__init__(width, height, maze_type)
+        self.costs: Optional[TiledGrid] = None
+        self._max_cost = 1
+
+        # The layout is identified by how it was made: the generation, then every edit in
+        # order, recorded by a change listener that runs ahead of all others
+        self._history = hashlib.blake2b(digest_size=16)
+        self._history.update(f"tiled:{width}x{height}:{maze_type.value}:{self.seed}:{tile_size}:".encode())
+        self._change_listeners = [self._record_walls, self._forget_pockets]
+
+        # The pocket of every swept cell, None for the cells of larger regions
+        self._pockets: Dict[int, Optional[FrozenSet[int]]] = {}
+
+    def _new_grid(self) -> TiledGrid:
+        return TiledGrid(self.width, self.height, self.tile_size, self.max_resident_tiles, self.path,
+                         fill=self._generate_tile)
+
+    def _generate_maze(self):
+        # Every tile is generated when it is first used
+        pass
+
+    def _record_walls(self, cells: List[int]):
+        grid = self.grid
+        self._history.update(b"walls:" + array('i', cells).tobytes() + bytes(grid[cell] for cell in cells))
+
+    def _forget_pockets(self, cells: List[int]):
+        self._pockets.clear()
+
+    def get_fingerprint(self) -> bytes:
+        """
+        Get a digest of the generation and the edits of the maze; mazes with equal fingerprints have the same layout.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = self._history.copy().digest()
+        return self._fingerprint
+
+    def close(self):
+        """Unmap the tiles and close the files of the maze."""
+        self.grid.close()
+        if self.costs is not None:
+            self.costs.close()
+
+    def _tile_rng(self, seed: int, salt: int, tile_x: int, tile_y: int) -> np.random.Generator:
+        # The neighbours of the first tiles are at -1
+        return np.random.default_rng([seed, salt, tile_x + 1, tile_y + 1])
+
+    def _tile_coordinates(self, tile_x: int, tile_y: int, pad: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the columns (as a row) and rows (as a column) of the cells of a tile, grown by pad cells."""
+        size = self.tile_size
+        xs = np.arange(tile_x * size - pad, (tile_x + 1) * size + pad)[np.newaxis, :]
+        ys = np.arange(tile_y * size - pad, (tile_y + 1) * size + pad)[:, np.newaxis]
+        return xs, ys
+
+    def _grow_patches(self, seed: int, salt: int, tile_x: int, tile_y: int, chance: float, steps: int,
+                      wall_threshold: int = 5) -> np.ndarray:
+        """
+        Run the cellular automaton of Maze._cellular_automata_step on the noise around a tile.
+
+        Every step only depends on the cells next to a cell, so the cells of a tile after
+        ``steps`` steps are found from the noise of the tile grown by ``steps`` cells, which
+        comes from the generators of the tile and its neighbours: the patches continue
+        seamlessly across tiles, whichever tile is generated first.
+
+        Returns:
+            The patch cells of the tile as a (tile_size, tile_size) array of 0 and 1
+        """
+        size, pad = self.tile_size, steps
+        noise = np.block([[self._tile_rng(seed, salt, tile_x + dx, tile_y + dy).random((size, size)) < chance
+                           for dx in (-1, 0, 1)]
+                          for dy in (-1, 0, 1)])
+        cells = noise[size - pad:2 * size + pad, size - pad:2 * size + pad].astype(np.uint8)
+        xs, ys = self._tile_coordinates(tile_x, tile_y, pad)
+
+        for _ in range(steps):
+            # Cells outside the maze count as walls, and the border of the maze becomes floor
+            cells = np.where((xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height), cells, 1)
+            n = cells.shape[0]
+            wall_neighbors = np.zeros((n - 2, n - 2), dtype=np.uint8)
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    if dx or dy:
+                        wall_neighbors += cells[1 + dy:n - 1 + dy, 1 + dx:n - 1 + dx]
+            xs, ys = xs[:, 1:-1], ys[1:-1, :]
+            inner = (xs >= 1) & (xs < self.width - 1) & (ys >= 1) & (ys < self.height - 1)
+            cells = ((wall_neighbors >= wall_threshold) & inner).astype(np.uint8)
+        return cells
+
+    def _generate_tile(self, tile_x: int, tile_y: int) -> bytes:
+        """Generate the walls of a tile, like the generators of Maze do for the whole maze."""
+        width, height, size = self.width, self.height, self.tile_size
+        xs, ys = self._tile_coordinates(tile_x, tile_y)
+
+        if self.maze_type == MazeType.MAZE_CAVES:
+            walls = self._grow_patches(self.seed, CAVE_SALT, tile_x, tile_y, 0.61, 5).astype(bool)
+        else:
+            draws = self._tile_rng(self.seed, WALL_SALT, tile_x, tile_y).random((size, size))
+            if self.maze_type == MazeType.MAZE_LABYRINTH:
+                walls = (draws < 0.3) & (xs >= 2) & (xs < width - 2) & (ys >= 2) & (ys < height - 2)
+            elif self.maze_type == MazeType.MAZE_OFFICE:
+                room_size = max(1, min(width, height) // 4)
+                columns = ((xs % room_size == 0) & (xs >= room_size) & (xs <= width - room_size) &
+                           (ys >= 1) & (ys < height - 1))
+                rows = ((ys % room_size == 0) & (ys >= room_size) & (ys <= height - room_size) &
+                        (xs >= 1) & (xs < width - 1))
+                walls = (draws < 0.6) & (columns | rows)
+            else:
+                walls = np.zeros((size, size), dtype=bool)
+
+        walls |= (xs == 0) | (xs == width - 1) | (ys == 0) | (ys == height - 1)
+        return walls.astype(np.uint8).tobytes()
+
+    def get_neighbor_cells(self, cell: int) -> Sequence[int]:
+        """
+        Get the ids of all free cells next to a cell, in the order north, south, east, west.
+        """
+        width, grid = self.width, self.grid
+        y, x = divmod(cell, width)
+        neighbors = []
+        if y > 0 and not grid[cell - width]:
+            neighbors.append(cell - width)
+        if y < self.height - 1 and not grid[cell + width]:
+            neighbors.append(cell + width)
+        if x < width - 1 and not grid[cell + 1]:
+            neighbors.append(cell + 1)
+        if x > 0 and not grid[cell - 1]:
+            neighbors.append(cell - 1)
+        return neighbors
+
+    def get_component(self, pos: GridPos) -> int:
+        """
+        Get 0 for free positions, all of which count as one region, and -1 for walls and outside positions.
+        """
+        return 0 if self.is_valid_position(pos) else -1
+
+    def are_connected(self, a: GridPos, b: GridPos) -> bool:
+        """
+        Check whether a path of free cells may lead from one position to another.
+
+        Two free positions count as connected unless one of them lies in a pocket of fewer
+        than POCKET_LIMIT cells that does not hold the other.
+        """
+        if not (self.is_valid_position(a) and self.is_valid_position(b)):
+            return False
+        cell_a, cell_b = a.y * self.width + a.x, b.y * self.width + b.x
+        for cell, other in ((cell_a, cell_b), (cell_b, cell_a)):
+            pocket = self._get_pocket(cell)
+            if pocket is not None and other not in pocket:
+                return False
+        return True
+
+    def _get_pocket(self, cell: int) -> Optional[FrozenSet[int]]:
+        """
+        Get the free cells of the region of a free cell, or None if it has POCKET_LIMIT cells or more.
+        """
+        if cell not in self._pockets:
+            region = self.get_region_cells(self.cell_pos(cell), POCKET_LIMIT)
+            pocket = frozenset(region) if len(region) < POCKET_LIMIT else None
+            self._pockets.update(zip(region, repeat(pocket)))
+        return self._pockets[cell]
+
+    def _label_components(self) -> Tuple[np.ndarray, np.ndarray]:
+        # The labels of get_component: every free cell is in region 0
+        free = self.get_grid_window(0, 0, self.width, self.height).ravel() == 0
+        component = np.where(free, 0, -1).astype(np.int32)
+        return component, np.array([np.count_nonzero(free)], dtype=np.int32)
+
+    def get_grid_window(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        return self.grid.read_window(x0, y0, x1, y1)
+
+    def get_cost_window(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        if self.costs is None:
+            return np.ones_like(self.grid.read_window(x0, y0, x1, y1))
+        return self.costs.read_window(x0, y0, x1, y1)
+
+    def get_max_move_cost(self) -> int:
+        """
+        Get the highest move cost the maze may have, without reading every tile.
+        """
+        return self._max_cost if self.costs is not None else 1
+
+    def _new_cost_grid(self) -> TiledGrid:
+        tile_bytes = self.tile_size * self.tile_size
+        return self._make_cost_grid(lambda tile_x, tile_y: b'\x01' * tile_bytes)
+
+    def _make_cost_grid(self, fill) -> TiledGrid:
+        path = self.path + '.costs' if self.path is not None else None
+        return TiledGrid(self.width, self.height, self.tile_size, self.max_resident_tiles, path, fill)
+
+    def set_costs(self, changes) -> List[int]:
+        changed = super().set_costs(changes)
+        if changed:
+            costs = bytes(self.costs[cell] for cell in changed)
+            self._max_cost = max(self._max_cost, max(costs))
+            self._history.update(b"costs:" + array('i', changed).tobytes() + costs)
+        return changed
+
+    def generate_terrain(self, max_cost: int, seed: Optional[int] = None):
+        """
+        Cover about 40% of the maze with patches of terrain of move costs 2 to max_cost, tile by tile.
+
+        Args:
+            max_cost: The highest move cost; 1 leaves the maze without terrain
+            seed: The seed of the tile generators of the patches
+        """
+        PATCH_CHANCE = 0.6
+
+        if max_cost <= 1:
+            return
+        if max_cost > self.MAX_MOVE_COST:
+            raise ValueError(f"Move costs must be between 1 and {self.MAX_MOVE_COST}, got {max_cost}")
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+
+        def generate_costs(tile_x: int, tile_y: int) -> bytes:
+            patches = self._grow_patches(seed, PATCH_SALT, tile_x, tile_y, PATCH_CHANCE, 4, 5)
+            # The 8x8 blocks of Maze.generate_terrain, which never cross a tile edge
+            blocks = self._tile_rng(seed, BLOCK_SALT, tile_x, tile_y).integers(
+                2, max_cost + 1, size=(self.tile_size // 8, self.tile_size // 8))
+            block_costs = np.repeat(np.repeat(blocks, 8, axis=0), 8, axis=1)
+            return np.where(patches.astype(bool), block_costs, 1).astype(np.uint8).tobytes()
+
+        if self.costs is not None:
+            self.costs.close()
+        self.costs = self._make_cost_grid(generate_costs)
+        self._max_cost = max_cost
+        self._fingerprint = None
+        self._history.update(f"terrain:{max_cost}:{seed}:".encode())
@@ -2,10 +2,12 @@
 Main world class that coordinates all world components.
 """
 import random
-from typing import List, Optional, Set
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
 from enum import Enum
+import numpy as np
 from .grid_pos import GridPos
 from .maze import Maze, MazeType
+from .tiled_maze import TiledMaze
 from .dirt import Dirt
 from .agent import VacuumAgent
 
@@ -19,15 +21,92 @@ class Action(Enum):
     NO_OPERATION = "noop"
 
 
+class WorldEvent(Enum):
+    AGENT_MOVED = "agent_moved"
+    DIRT_CLEANED = "dirt_cleaned"
+    WALLS_CHANGED = "walls_changed"
+    PATH_CHANGED = "path_changed"
+    EXPANDED_CHANGED = "expanded_changed"
+
+
+class ChangeSet:
+    """
+    The changes of the world during one tick, delivered to the subscribers at its end.
+    
+    Besides the kinds of events that happened, the change set holds the dirty cells (the
+    ids of the cells whose drawing changed: the cells the agent left and entered, cleaned
+    dirt, changed walls, and the cells that joined or left the path or the expanded nodes)
+    and the dirt particles cleaned during the tick.
+    """
+    
+    def __init__(self, tick: int):
+        self.tick = tick
+        self.events: Set[WorldEvent] = set()
+        self.cells: Set[int] = set()
+        self.cleaned_dirt: List[Dirt] = []
+    
+    def record(self, event: WorldEvent, cells: Iterable[int] = ()):
+        self.events.add(event)
+        self.cells.update(cells)
+    
+    def has(self, event: WorldEvent) -> bool:
+        return event in self.events
+    
+    def __bool__(self) -> bool:
+        return bool(self.events)
+    
+    def __repr__(self) -> str:
+        events = sorted(event.value for event in self.events)
+        return f"ChangeSet(tick={self.tick}, events={events}, cells={len(self.cells)})"
+
+
+# Called with the change set of a tick, for the events it subscribed to
+ChangeCallback = Callable[[ChangeSet], None]
+
+
+# Free cells around the agent among which the dirt and the fleet of a tiled maze are placed
+TILED_PLACEMENT_REACH = 65536
+
+
+def pack_cells(cells: Iterable[int], num_cells: int) -> bytes:
+    """Pack a collection of cell ids into a bitmap with one bit per cell, in cell id order."""
+    bitmap = np.zeros((num_cells + 7) // 8, dtype=np.uint8)
+    if isinstance(cells, memoryview):
+        # Views of cell id arrays are read without a Python loop
+        cells = np.unique(np.asarray(cells, dtype=np.int64))
+    else:
+        cells = np.unique(np.fromiter(cells, dtype=np.int64))
+    if cells.size:
+        # Or together the bits of the cells of every byte, without a byte per cell of the world
+        index = cells >> 3
+        first = np.flatnonzero(np.concatenate(([True], index[1:] != index[:-1])))
+        bits = (0x80 >> (cells & 7)).astype(np.uint8)
+        bitmap[index[first]] = np.bitwise_or.reduceat(bits, first)
+    return bitmap.tobytes()
+
+
+def unpack_cells(bitmap: bytes, num_cells: int) -> np.ndarray:
+    """Unpack a bitmap of pack_cells into an array of one 0 or 1 per cell."""
+    return np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), count=num_cells)
+
+
 class World:
-    """The main world class containing the representations of the maze, agent, and dirt."""
+    """
+    The main world class containing the representations of the maze, agents, and dirt.
+    
+    Changes are not announced one by one: the world collects them in a change set, and
+    end_tick (called by the agent after every step) delivers it once to the subscribers
+    of any of its events. Nothing is recorded while there are no subscribers.
+    """
     
     def __init__(self, 
                  width: int = 20,
                  height: int = 20, 
                  num_dirt: int = 10,
                  maze_type: MazeType = MazeType.MAZE_LABYRINTH,
-                 seed: Optional[int] = None):
+                 seed: Optional[int] = None,
+                 num_agents: int = 1,
+                 tile_size: Optional[int] = None):
         """Initialize the world.
         
         Args:
@@ -36,7 +115,18 @@ class World:
             num_dirt: Number of dirt particles to place
             maze_type: Type of maze to generate
             seed: Seed for the random number generator
+            num_agents: Number of agents; a fleet of several shares the region of the first one
+            tile_size: If given, the maze is a TiledMaze with tiles of this size, for worlds too
+                       large for memory; the dirt is then placed among the
+                       TILED_PLACEMENT_REACH cells closest to the agent
+        
+        Raises:
+            ValueError: If a fleet of several agents is asked for in a tiled world
         """
+        if tile_size is not None and num_agents > 1:
+            # The fleet sweeps whole-maze distance tables and hands the maze to worker processes
+            raise ValueError(f"Tiled worlds have a single agent, got {num_agents} agents")
+        
         # Handle random seed
         if seed is None:
             seed = random.randint(0, 999999)
@@ -45,64 +135,162 @@ class World:
             
         self.width = width
         self.height = height
-        self.maze = Maze(width, height, maze_type)
+        if tile_size is not None:
+            self.maze = TiledMaze(width, height, maze_type, tile_size=tile_size)
+        else:
+            self.maze = Maze(width, height, maze_type)
         self.dirt_particles: Set[Dirt] = set()
+        # Uncleaned dirt by cell id; sucked dirt is removed from it but stays in dirt_particles
+        self.uncleaned_dirt: Dict[int, Dirt] = {}
         self.agent: Optional[VacuumAgent] = None
+        # All agents, the first one being self.agent; they never share a cell
+        self.agents: List[VacuumAgent] = []
         
         self._place_agent()
         self._place_dirt(num_dirt)
+        self._place_fleet(num_agents - 1)
         
         self.current_path: List[GridPos] = []
-        self.expanded_nodes: Set[GridPos] = set()
+        # The cells expanded by the last search, as a bitmap of pack_cells
+        self.expanded_cells = pack_cells((), width * height)
         
-        self.observers = []
+        self.tick = 0
+        self.changes = ChangeSet(self.tick)
+        self.subscribers: List[Tuple[Optional[FrozenSet[WorldEvent]], ChangeCallback]] = []
+        # The subscribed callback of every observer, to unsubscribe it again
+        self.observers: List[Tuple[object, ChangeCallback]] = []
     
     def _place_agent(self):
-        """Place the agent at a random free position."""
-        free_positions = self.maze.get_all_free_positions()
-        if free_positions:
-            pos = random.choice(free_positions)
+        """Place the agent at a random free position of the largest region of the maze.
+        
+        A position is drawn among all free cells first, and again among those of the largest
+        region if it fell elsewhere: every cell of the largest region is equally likely, and
+        a seeded world whose first draw lands there keeps its agent and dirt.
+        """
+        if isinstance(self.maze, TiledMaze):
+            self._place_agent_in_tiles()
+            return
+        free_cells = self.maze.get_free_cells()
+        if free_cells:
+            largest = int(np.argmax(self.maze.get_component_sizes()))
+            pos = self.maze.cell_pos(random.choice(free_cells))
+            if self.maze.get_component(pos) != largest:
+                pos = self.maze.cell_pos(random.choice(self.maze.get_free_cells(largest)))
             self.agent = VacuumAgent(pos.x, pos.y)
+            self.agents.append(self.agent)
     
-    def _place_dirt(self, num_dirt: int):
-        """Place dirt particles at random free positions."""
-        free_positions = self.maze.get_all_free_positions()
+    def _place_agent_in_tiles(self, attempts: int = 100):
+        """Place the agent at a random free position of a tiled maze, drawn without listing the free cells.
         
+        Positions in small pockets of the maze are passed over, as long as the attempts last:
+        the agent goes to the first position with TILED_PLACEMENT_REACH cells (or a quarter of
+        a smaller maze) in reach, else to where the most cells were in reach.
+        """
+        enough = min(TILED_PLACEMENT_REACH, self.width * self.height // 4)
+        best_pos, best_reach = None, 0
+        for _ in range(attempts):
+            pos = GridPos(random.randrange(self.width), random.randrange(self.height))
+            reach = len(self.maze.get_region_cells(pos, TILED_PLACEMENT_REACH))
+            if reach > best_reach:
+                best_pos, best_reach = pos, reach
+            if reach >= enough:
+                break
+        if best_pos is not None:
+            self.agent = VacuumAgent(best_pos.x, best_pos.y)
+            self.agents.append(self.agent)
+    
+    def _region_cells(self, agent_pos: GridPos):
+        """Get the free cells of the region of a position, or those closest to it in a tiled maze."""
+        if isinstance(self.maze, TiledMaze):
+            return self.maze.get_region_cells(agent_pos, TILED_PLACEMENT_REACH)
+        return self.maze.get_free_cells(self.maze.get_component(agent_pos))
+    
+    def _place_dirt(self, num_dirt: int):
+        """Place dirt particles at random free positions that the agent can reach."""
         if self.agent:
             agent_pos = GridPos(self.agent.x, self.agent.y)
-            free_positions = [pos for pos in free_positions if pos != agent_pos]
+            free_cells = self._region_cells(agent_pos)
+            free_cells.remove(self.maze.cell_id(agent_pos.x, agent_pos.y))
+        elif isinstance(self.maze, TiledMaze):
+            free_cells = []
+        else:
+            free_cells = self.maze.get_free_cells()
         
-        num_to_place = min(num_dirt, len(free_positions))
-        chosen_positions = random.sample(free_positions, num_to_place)
+        num_to_place = min(num_dirt, len(free_cells))
+        chosen_cells = random.sample(free_cells, num_to_place)
         
-        for pos in chosen_positions:
-            self.dirt_particles.add(Dirt(pos.x, pos.y))
+        for cell in chosen_cells:
+            pos = self.maze.cell_pos(cell)
+            dirt = Dirt(pos.x, pos.y)
+            self.dirt_particles.add(dirt)
+            self.uncleaned_dirt[cell] = dirt
     
-    def get_dirt_at_position(self, pos: GridPos) -> Optional[Dirt]:
-        """Get dirt at a specific position."""
-        for dirt in self.dirt_particles:
-            if dirt == pos and not dirt.is_cleaned():
-                return dirt
+    def _place_fleet(self, num_agents: int):
+        """Place more agents on free cells of the region of the first one, away from dirt.
+        
+        They are placed after the dirt, so that a seeded world has the same maze and dirt
+        whatever the size of its fleet.
+        """
+        if not self.agent or num_agents <= 0:
+            return
+        agent_pos = GridPos(self.agent.x, self.agent.y)
+        occupied = set(self.uncleaned_dirt) | {self.maze.cell_id(agent_pos.x, agent_pos.y)}
+        free_cells = [cell for cell in self._region_cells(agent_pos) if cell not in occupied]
+        for cell in random.sample(free_cells, min(num_agents, len(free_cells))):
+            pos = self.maze.cell_pos(cell)
+            self.agents.append(VacuumAgent(pos.x, pos.y))
+    
+    def get_agent_at(self, pos: GridPos) -> Optional[VacuumAgent]:
+        """Get the agent on a position, if any."""
+        for agent in self.agents:
+            if agent.at_position(pos):
+                return agent
         return None
     
+    def get_dirt_at_position(self, pos: GridPos) -> Optional[Dirt]:
+        """Get the uncleaned dirt at a specific position, if any."""
+        if not (0 <= pos.x < self.width and 0 <= pos.y < self.height):
+            return None
+        return self.uncleaned_dirt.get(self.maze.cell_id(pos.x, pos.y))
+    
     def get_all_uncleaned_dirt(self) -> List[Dirt]:
         """Get all uncleaned dirt particles."""
-        return [dirt for dirt in self.dirt_particles if not dirt.is_cleaned()]
+        return list(self.uncleaned_dirt.values())
+    
+    def iter_uncleaned_dirt(self) -> Iterator[Dirt]:
+        """Iterate over all uncleaned dirt particles, without copying them.
+        
+        The world must not change while the iteration is in progress; use
+        get_all_uncleaned_dirt to suck dirt along the way.
+        """
+        return iter(self.uncleaned_dirt.values())
+    
+    def get_num_uncleaned_dirt(self) -> int:
+        """Get the number of uncleaned dirt particles."""
+        return len(self.uncleaned_dirt)
     
     def is_terminated(self) -> bool:
         """Check if the world is in a terminal state (all dirt cleaned)."""
-        return len(self.get_all_uncleaned_dirt()) == 0
+        return not self.uncleaned_dirt
     
-    def move_agent(self, action: Action) -> bool:
-        """Move the agent according to the specified action.
+    def move_agent(self, action: Action, agent: Optional[VacuumAgent] = None) -> bool:
+        """Move an agent according to the specified action.
+        
+        Agents cannot move into walls or into the cell of another agent.
+        
+        Args:
+            action: The move to make
+            agent: The agent to move, the first one by default
             
         Returns:
             True if the move was successful, False otherwise
         """
-        if not self.agent:
+        if agent is None:
+            agent = self.agent
+        if not agent:
             return False
             
-        current_pos = GridPos(self.agent.x, self.agent.y)
+        current_pos = GridPos(agent.x, agent.y)
         new_pos = None
         
         if action == Action.GO_NORTH:
@@ -115,57 +303,164 @@ class World:
             new_pos = GridPos(current_pos.x - 1, current_pos.y)
         
         if new_pos and self.maze.is_valid_position(new_pos):
-            self.agent.move_to(new_pos)
-            self.notify_observers()
+            if len(self.agents) > 1 and self.get_agent_at(new_pos) is not None:
+                return False
+            agent.move_to(new_pos)
+            if self.subscribers:
+                self.changes.record(WorldEvent.AGENT_MOVED,
+                                    (self.maze.cell_id(current_pos.x, current_pos.y),
+                                     self.maze.cell_id(new_pos.x, new_pos.y)))
             return True
         
         return False
     
-    def suck_dirt(self) -> bool:
-        """Remove the dirt on the position of the agent, if there is some.
+    def suck_dirt(self, agent: Optional[VacuumAgent] = None) -> bool:
+        """Remove the dirt on the position of an agent, if there is some.
+        
+        Args:
+            agent: The agent that vacuums, the first one by default
         
         Returns:
             True if some dirt was removed, False otherwise
         """
-        if not self.agent:
+        if agent is None:
+            agent = self.agent
+        if not agent:
             return False
             
-        agent_pos = GridPos(self.agent.x, self.agent.y)
+        agent_pos = GridPos(agent.x, agent.y)
         dirt = self.get_dirt_at_position(agent_pos)
         
         if dirt:
             dirt.clean()
-            self.agent.collect_dirt()
-            self.notify_observers()
+            cell = self.maze.cell_id(dirt.x, dirt.y)
+            del self.uncleaned_dirt[cell]
+            agent.collect_dirt()
+            if self.subscribers:
+                self.changes.record(WorldEvent.DIRT_CLEANED, (cell,))
+                self.changes.cleaned_dirt.append(dirt)
             return True
         
         return False
     
+    def set_walls(self, changes: Iterable[Tuple[GridPos, bool]]) -> List[int]:
+        """Add or remove walls while the simulation runs, e.g. to open and close doors.
+        
+        No wall is placed on an agent. Dirt under a new wall stays uncleaned, and can be
+        reached again once the wall is removed.
+        
+        Args:
+            changes: Pairs of a position and whether it becomes a wall
+            
+        Returns:
+            The ids of the cells that changed
+        """
+        if self.agents:
+            changes = [(pos, wall) for pos, wall in changes
+                       if not (wall and self.get_agent_at(pos) is not None)]
+        changed = self.maze.set_walls(changes)
+        if changed and self.subscribers:
+            self.changes.record(WorldEvent.WALLS_CHANGED, changed)
+        return changed
+    
+    def set_wall(self, pos: GridPos, wall: bool = True) -> bool:
+        """Add or remove a single wall, see set_walls.
+        
+        Returns:
+            True if the cell changed
+        """
+        return bool(self.set_walls([(pos, wall)]))
+    
     def mark_current_path(self, path: List[GridPos]):
         """Mark the current path for visualization."""
+        if self.subscribers:
+            self.changes.record(WorldEvent.PATH_CHANGED, self._cells_changed(self.current_path, path))
         self.current_path = path.copy()
-        self.notify_observers()
     
-    def mark_expanded_nodes(self, nodes: List[GridPos]):
+    def mark_expanded_cells(self, cells: Iterable[int]):
+        """Mark the cells expanded by a search for visualization.
+        
+        Args:
+            cells: The ids of the expanded cells, duplicates allowed
+        """
+        num_cells = self.width * self.height
+        expanded_cells = pack_cells(cells, num_cells)
+        if self.subscribers:
+            before = np.frombuffer(self.expanded_cells, dtype=np.uint8)
+            after = np.frombuffer(expanded_cells, dtype=np.uint8)
+            # Unpack the bytes that differ only
+            diff = before ^ after
+            changed_bytes = np.flatnonzero(diff)
+            bytes_index, bits = np.nonzero(np.unpackbits(diff[changed_bytes]).reshape(-1, 8))
+            self.changes.record(WorldEvent.EXPANDED_CHANGED, (changed_bytes[bytes_index] * 8 + bits).tolist())
+        self.expanded_cells = expanded_cells
+    
+    def mark_expanded_nodes(self, nodes: Iterable[GridPos]):
         """Mark the expanded nodes for visualization."""
-        self.expanded_nodes = set(nodes)
-        self.notify_observers()
+        width = self.width
+        self.mark_expanded_cells(pos.y * width + pos.x for pos in nodes)
+    
+    @property
+    def expanded_nodes(self) -> Set[GridPos]:
+        """Get the positions of the cells marked as expanded."""
+        cell_pos = self.maze.cell_pos
+        cells = np.flatnonzero(unpack_cells(self.expanded_cells, self.width * self.height))
+        return {cell_pos(cell) for cell in cells.tolist()}
+    
+    def is_expanded(self, pos: GridPos) -> bool:
+        cell = pos.y * self.width + pos.x
+        return bool(self.expanded_cells[cell >> 3] & (0x80 >> (cell & 7)))
+    
+    def _cells_changed(self, before: Iterable[GridPos], after: Iterable[GridPos]) -> Set[int]:
+        """Get the ids of the cells in only one of two sets of positions."""
+        width = self.width
+        return {pos.y * width + pos.x for pos in before} ^ {pos.y * width + pos.x for pos in after}
+    
+    def subscribe(self, callback: ChangeCallback, events: Optional[Iterable[WorldEvent]] = None):
+        """Get the change set at the end of every tick with any of the given events.
+        
+        Args:
+            callback: Called with the change set; it must not change the world
+            events: The events of interest, all events by default
+        """
+        self.subscribers.append((frozenset(events) if events is not None else None, callback))
+    
+    def is_observed(self, event: WorldEvent) -> bool:
+        """Check whether any subscriber gets the changes of an event, e.g. to skip preparing them otherwise."""
+        return any(events is None or event in events for events, _ in self.subscribers)
+    
+    def unsubscribe(self, callback: ChangeCallback):
+        self.subscribers = [(events, subscribed) for events, subscribed in self.subscribers
+                            if subscribed != callback]
     
     def add_observer(self, observer):
-        """Add an observer for world changes."""
-        self.observers.append(observer)
+        """Add an observer for world changes, whose update method is called once per changed tick."""
+        callback = lambda changes: observer.update()
+        self.observers.append((observer, callback))
+        self.subscribe(callback)
+    
+    def remove_observer(self, observer):
+        """Remove an observer added with add_observer."""
+        for added, callback in [entry for entry in self.observers if entry[0] is observer]:
+            self.observers.remove((added, callback))
+            self.unsubscribe(callback)
     
-    def notify_observers(self):
-        """Notify all observers of world changes."""
-        for observer in self.observers:
-            if hasattr(observer, 'update'):
-                observer.update()
+    def end_tick(self):
+        """End the current tick and deliver its changes to the interested subscribers."""
+        changes = self.changes
+        self.tick += 1
+        self.changes = ChangeSet(self.tick)
+        if not changes:
+            return
+        for events, callback in self.subscribers:
+            if events is None or not events.isdisjoint(changes.events):
+                callback(changes)
     
     def get_state_info(self) -> dict:
         """Get current state information, for use in the commande-line interface."""
         return {
             'agent_position': (self.agent.x, self.agent.y) if self.agent else None,
-            'dirt_collected': self.agent.get_dirt_collected() if self.agent else 0,
-            'remaining_dirt': len(self.get_all_uncleaned_dirt()),
+            'dirt_collected': sum(agent.get_dirt_collected() for agent in self.agents),
+            'remaining_dirt': self.get_num_uncleaned_dirt(),
             'is_terminated': self.is_terminated()
         }
\ No newline at end of file